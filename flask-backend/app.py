@@ -25,9 +25,17 @@ migrate = Migrate(app, db)
 CORS(app)
 jwt = JWTManager(app)
 
+# orjson for request and response bodies, when it is installed
+from serializers import install_json_provider
+install_json_provider(app)
+
+# Write-behind for progress events, when PROGRESS_WRITE_BEHIND is set
+from progress_buffer import progress_buffer
+progress_buffer.init_app(app)
+
 # Import models and routes
 from models import User, Course, Lesson, Progress, Concept, Exercise
-from routes import auth_bp, courses_bp, lessons_bp, progress_bp, transcript_bp, lesson_progress_bp, homework_bp, week_videos_bp
+from routes import auth_bp, courses_bp, lessons_bp, progress_bp, transcript_bp, lesson_progress_bp, homework_bp, week_videos_bp, content_bp, search_bp
 from classify_topic import classify_bp
 
 # Register blueprints
@@ -39,6 +47,8 @@ app.register_blueprint(transcript_bp, url_prefix='/api/transcript')
 app.register_blueprint(lesson_progress_bp, url_prefix='/api/courses')
 app.register_blueprint(homework_bp, url_prefix='/api/courses')
 app.register_blueprint(week_videos_bp, url_prefix='/api/week-videos')
+app.register_blueprint(content_bp, url_prefix='/api/content')
+app.register_blueprint(search_bp, url_prefix='/api/search')
 app.register_blueprint(classify_bp, url_prefix='/api/classify')
 
 @app.route('/api/health')
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Batch Build Study Guides
+
+Builds study guides for many courses at once through the Message Batches API.
+Every week of every selected course is extracted up front, all the prompts
+are submitted as one batch (split only if it would exceed the API's size
+limit), and the results are written to <ROOT>/<COURSE>_New/W<N>/ once the
+batch ends. This trades latency for throughput and cost on full-catalog
+rebuilds; use process_course_by_weeks.py for a quick single-course build.
+
+The batch id and week list are saved to batch_runs/<batch_id>.json, so an
+interrupted run can be picked up again with --resume.
+
+Usage:
+    python batch_build_study_guides.py <COURSE_CODE> [COURSE_CODE ...] [--root DIR] [--local DIR]
+    python batch_build_study_guides.py --resume <BATCH_ID>
+
+Example:
+    python batch_build_study_guides.py CS162 CS170 --root ..
+    python batch_build_study_guides.py CS162 --local batch_runs/local --poll-interval 1
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+from lecture_pdf_extraction import PDFContentOrganizer
+from llm_client import MessageBatches, FileMessageBatches, message_text
+from process_course_by_weeks import find_week_folders, study_guide_system, week_instruction, write_week_outputs
+
+MANIFEST_DIR = Path("batch_runs")
+
+# The API accepts up to 256 MB per batch; leave headroom for the envelope
+MAX_BATCH_BYTES = 200_000_000
+
+def collect_week_requests(course_codes: List[str], root: Path,
+                          include_figures: bool = False) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """Extract every week of every course and build one batch request per week.
+
+    Returns the batch requests and a job entry per custom_id describing where
+    its study guide goes.
+    """
+    batch_requests = []
+    jobs = {}
+    system = study_guide_system(include_figures)
+    organizer = PDFContentOrganizer(include_figures=include_figures)
+
+    for course_code in course_codes:
+        course_dir = root / course_code
+        if not course_dir.exists():
+            print(f"⚠️  Course folder {course_dir} not found, skipping")
+            continue
+
+        for week_num, week_folder in find_week_folders(course_dir):
+            pdf_files = sorted(week_folder.glob("*.pdf"))
+            if not pdf_files:
+                continue
+
+            if not organizer.extract_pdfs(pdf_files, week_folder.name):
+                print(f"❌ Failed to extract content from {week_folder}")
+                continue
+
+            custom_id = f"{course_code}-W{week_num}"
+            batch_requests.append({
+                "custom_id": custom_id,
+                "params": organizer.build_claude_request(week_instruction(course_code, week_num), system=system)
+            })
+            jobs[custom_id] = {
+                "course_code": course_code,
+                "week_num": week_num,
+                "week_new_folder": str(root / f"{course_code}_New" / f"W{week_num}"),
+                "pdf_files": [str(p) for p in pdf_files]
+            }
+        print(f"📦 {course_code}: {sum(1 for job in jobs.values() if job['course_code'] == course_code)} weeks queued")
+
+    return batch_requests, jobs
+
+def split_batches(batch_requests: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Split requests into batches that stay under MAX_BATCH_BYTES."""
+    chunks = [[]]
+    size = 0
+    for batch_request in batch_requests:
+        request_size = len(json.dumps(batch_request))
+        if chunks[-1] and size + request_size > MAX_BATCH_BYTES:
+            chunks.append([])
+            size = 0
+        chunks[-1].append(batch_request)
+        size += request_size
+    return chunks
+
+def save_manifest(batch: Dict[str, Any], jobs: Dict[str, Dict[str, Any]], local_dir: Optional[str]):
+    """Record a submitted batch so the run can be resumed."""
+    MANIFEST_DIR.mkdir(exist_ok=True)
+    manifest = {"batch_id": batch["id"], "local_dir": local_dir, "jobs": jobs}
+    with open(MANIFEST_DIR / f"{batch['id']}.json", 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def write_batch_results(batches: MessageBatches, batch: Dict[str, Any], jobs: Dict[str, Dict[str, Any]]) -> int:
+    """Write each succeeded result to its week folder; return how many were written."""
+    written = 0
+    for entry in batches.results(batch):
+        job = jobs.get(entry["custom_id"])
+        result = entry["result"]
+        if job is None:
+            continue
+        if result["type"] != "succeeded":
+            print(f"❌ {entry['custom_id']}: {result['type']} {result.get('error', '')}")
+            continue
+
+        write_week_outputs(Path(job["week_new_folder"]), job["course_code"], job["week_num"],
+                           [Path(p) for p in job["pdf_files"]], message_text(result["message"]))
+        print(f"✅ Wrote {job['week_new_folder']}/study_guide.md")
+        written += 1
+    return written
+
+def wait_and_write(batch_id: str, local_dir: Optional[str] = None, poll_interval: float = 60.0) -> int:
+    """Wait for a submitted batch to end and write its study guides."""
+    with open(MANIFEST_DIR / f"{batch_id}.json", 'r') as f:
+        manifest = json.load(f)
+
+    local_dir = local_dir or manifest["local_dir"]
+    batches = FileMessageBatches(local_dir) if local_dir else MessageBatches()
+    batch = batches.wait(batch_id, poll_interval)
+    return write_batch_results(batches, batch, manifest["jobs"])
+
+def build_study_guides_batch(course_codes: List[str], root: str = "..", include_figures: bool = False,
+                             local_dir: Optional[str] = None, poll_interval: float = 60.0) -> bool:
+    """Build study guides for all weeks of the given courses in batch mode."""
+    batch_requests, jobs = collect_week_requests([c.upper() for c in course_codes], Path(root), include_figures)
+    if not batch_requests:
+        print("❌ No weeks with PDFs found")
+        return False
+
+    batches = FileMessageBatches(local_dir) if local_dir else MessageBatches()
+
+    batch_ids = []
+    for chunk in split_batches(batch_requests):
+        batch = batches.submit(chunk)
+        save_manifest(batch, {r["custom_id"]: jobs[r["custom_id"]] for r in chunk}, local_dir)
+        batch_ids.append(batch["id"])
+        print(f"🚀 Submitted batch {batch['id']} with {len(chunk)} weeks")
+
+    written = sum(wait_and_write(batch_id, local_dir, poll_interval) for batch_id in batch_ids)
+    print(f"\n🎉 Completed! Generated study guides for {written}/{len(batch_requests)} weeks")
+    return written == len(batch_requests)
+
+def main():
+    parser = argparse.ArgumentParser(description='Build study guides for many courses through the Message Batches API')
+    parser.add_argument('course_codes', nargs='*', help='Course codes (e.g., CS162 CS170)')
+    parser.add_argument('--root', default='..', help='Folder containing the course folders (default: ..)')
+    parser.add_argument('--include-figures', action='store_true',
+                        help='Attach deduplicated, size-capped lecture figures to each request')
+    parser.add_argument('--local', metavar='DIR',
+                        help='Use the file-backed batch stand-in in DIR instead of the Batches API')
+    parser.add_argument('--poll-interval', type=float, default=60.0, help='Seconds between status polls (default: 60)')
+    parser.add_argument('--resume', metavar='BATCH_ID', help='Wait for a previously submitted batch and write its results')
+
+    args = parser.parse_args()
+
+    if args.resume:
+        return 0 if wait_and_write(args.resume, args.local, args.poll_interval) else 1
+
+    if not args.course_codes:
+        parser.print_help()
+        return 1
+
+    success = build_study_guides_batch(args.course_codes, args.root, args.include_figures,
+                                       args.local, args.poll_interval)
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark Course Analytics
+
+Seeds an in-memory SQLite database with one course's LessonProgress rows
+(students x lessons, with realistic drop-off) and times a page of
+/api/courses/<course>/analytics two ways:
+
+    python - every progress row loaded into Python and aggregated there
+    sql    - course_analytics.course_analytics(): grouped aggregates over
+             ix_lesson_progress_course_lesson
+
+Both must produce the same statistics. Also prints SQLite's query plans, to
+show the aggregates are served from the covering index.
+
+Usage:
+    python benchmark_course_analytics.py [--students N] [--lessons N] [--per-page N] [--runs N]
+
+Example:
+    python benchmark_course_analytics.py
+    python benchmark_course_analytics.py --students 5000 --lessons 120 --runs 3
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime
+from statistics import median
+from typing import Callable, Dict, List, Tuple
+
+# Must be set before app is imported, which reads them at import time
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['RESPONSE_CACHE_DIR'] = tempfile.mkdtemp(prefix='analytics_')
+os.environ['SEARCH_INDEX_PATH'] = os.path.join(os.environ['RESPONSE_CACHE_DIR'], 'search_index.sqlite3')
+
+from sqlalchemy import event, text
+
+from app import app
+from models import db, User, LessonProgress
+import course_analytics
+
+COURSE = 'CS000'
+
+def seed(num_students: int, num_lessons: int) -> int:
+    """Fresh database where each student works through a prefix of the lessons; returns the row count."""
+    db.drop_all()
+    db.create_all()
+    random.seed(0)
+
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'email': f'student{i}@berkeley.edu', 'name': f'Student {i}'} for i in range(1, num_students + 1)
+    ])
+    lesson_ids = [f"{lesson // 8 + 1}-{lesson % 8 + 1}" for lesson in range(num_lessons)]
+    now = datetime.utcnow()
+
+    rows = 0
+    batch: List[Dict] = []
+    for user_id in range(1, num_students + 1):
+        reached = int(num_lessons * random.random() ** 0.5) + 1  # most students get far, some stop early
+        for position, lesson_id in enumerate(lesson_ids[:reached]):
+            progress = 100 if position < reached - 1 else random.randint(0, 100)
+            batch.append({
+                'user_id': user_id, 'course_code': COURSE, 'lesson_id': lesson_id,
+                'completed': progress == 100, 'progress': progress,
+                'completed_at': now if progress == 100 else None, 'created_at': now, 'updated_at': now
+            })
+        if len(batch) >= 20000:
+            db.session.execute(LessonProgress.__table__.insert(), batch)
+            rows += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(LessonProgress.__table__.insert(), batch)
+        rows += len(batch)
+
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    return rows
+
+def python_analytics(page: int, per_page: int) -> Dict:
+    """The same statistics from every row, aggregated in Python: what the endpoint replaces."""
+    distributions: Dict[str, Dict[int, int]] = {}
+    totals: Dict[str, Dict] = {}
+    students = set()
+    for record in LessonProgress.query.filter_by(course_code=COURSE).all():
+        students.add(record.user_id)
+        lesson = totals.setdefault(record.lesson_id, {'students': 0, 'completed': 0, 'progress_total': 0})
+        lesson['students'] += 1
+        lesson['completed'] += 1 if record.completed else 0
+        lesson['progress_total'] += record.progress or 0
+        counts = distributions.setdefault(record.lesson_id, {})
+        counts[record.progress or 0] = counts.get(record.progress or 0, 0) + 1
+
+    ordered = sorted(totals, key=course_analytics.lesson_sort_key)
+    start = (page - 1) * per_page
+    lessons = []
+    for position, lesson_id in enumerate(ordered[start:start + per_page], start=start):
+        lesson = totals[lesson_id]
+        previous = totals[ordered[position - 1]]['students'] if position else None
+        lessons.append({
+            'lesson_id': lesson_id,
+            'week': course_analytics.lesson_week(lesson_id),
+            'students': lesson['students'],
+            'completed': lesson['completed'],
+            'completion_rate': course_analytics.rate(lesson['completed'], lesson['students']),
+            'average_progress': round(lesson['progress_total'] / lesson['students'], 2),
+            'median_progress': course_analytics.median_progress(distributions[lesson_id]),
+            'histogram': course_analytics.histogram(distributions[lesson_id]),
+            'drop_off': round(1 - lesson['students'] / previous, 4) if previous else None
+        })
+    return {
+        'students': len(students),
+        'weeks': course_analytics.week_rollups(ordered, totals),
+        'lessons': lessons
+    }
+
+def time_median(fn: Callable, runs: int) -> Tuple[float, object]:
+    """(median ms, last result) of fn() over runs, each with an empty identity map."""
+    timings = []
+    result = None
+    for _ in range(runs):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings), result
+
+def print_plans():
+    """SQLite's plan for each aggregate course_analytics() runs."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        course_analytics.course_analytics(db.session, COURSE, 1, 10)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    with db.engine.connect() as connection:
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            print(f"  {' '.join(statement.split())[:70]}...")
+            for row in plan:
+                print(f"      {row[-1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the course analytics aggregates against loading every row')
+    parser.add_argument('--students', type=int, default=3000, help='Students to seed (default: 3000)')
+    parser.add_argument('--lessons', type=int, default=100, help='Lessons in the course (default: 100)')
+    parser.add_argument('--per-page', type=int, default=course_analytics.DEFAULT_PER_PAGE,
+                        help=f'Lessons per page (default: {course_analytics.DEFAULT_PER_PAGE})')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per measurement (default: 5)')
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f"🌱 Seeding {args.students} students x up to {args.lessons} lessons...")
+        rows = seed(args.students, args.lessons)
+        print(f"   {rows} LessonProgress rows")
+
+        python_ms, expected = time_median(lambda: python_analytics(1, args.per_page), args.runs)
+        sql_ms, result = time_median(
+            lambda: course_analytics.course_analytics(db.session, COURSE, 1, args.per_page), args.runs
+        )
+
+        print(f"\n📊 First page of {args.per_page} lessons (median of {args.runs} runs)")
+        print(f"  {'python':<8}{python_ms:>10.1f} ms")
+        print(f"  {'sql':<8}{sql_ms:>10.1f} ms   ({python_ms / sql_ms:.1f}x)")
+
+        print("\n🔎 Query plans")
+        print_plans()
+
+        if any(result[key] != expected[key] for key in expected):
+            print("\n❌ SQL aggregates don't match the Python ones")
+            return 1
+    print("\n✅ SQL aggregates match the Python ones")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
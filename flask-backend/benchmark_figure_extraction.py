@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark Figure Extraction
+
+Compares per-page figure extraction time and peak memory of the original
+PNG round-trip path (pix.tobytes("png") -> cv2.imdecode, one crop per contour)
+against the figure stage of PDFContentOrganizer (_collect_page_figures), with
+its dedup state and byte budget reset for every page.
+
+Usage:
+    python benchmark_figure_extraction.py [PDF ...] [--pages N]
+
+Example:
+    python benchmark_figure_extraction.py ../CS162/w1/1.pdf --pages 20
+"""
+
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pymupdf
+
+from lecture_pdf_extraction import PDFContentOrganizer
+
+def legacy_extract_page_figures(organizer: PDFContentOrganizer, page):
+    """The pre-vectorization implementation, kept here as a baseline."""
+    matrix = pymupdf.Matrix(organizer.zoom_factor, organizer.zoom_factor)
+    pix = page.get_pixmap(matrix=matrix)
+    img = cv2.imdecode(np.frombuffer(pix.tobytes("png"), np.uint8), cv2.IMREAD_COLOR)
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    figures = []
+    for contour in contours:
+        if cv2.contourArea(contour) > organizer.min_area:
+            x, y, w, h = cv2.boundingRect(contour)
+            x = max(0, x - organizer.padding)
+            y = max(0, y - organizer.padding)
+            w = min(img.shape[1] - x, w + 2 * organizer.padding)
+            h = min(img.shape[0] - y, h + 2 * organizer.padding)
+            _, buffer = cv2.imencode('.png', img[y:y+h, x:x+w])
+            figures.append(buffer)
+    return figures
+
+def collect_page_figures(organizer: PDFContentOrganizer, page, pdf_name: str):
+    """Image blocks the current figure stage attaches for a single page."""
+    organizer._reset_figure_budget()
+    organizer._collect_page_figures(page, pdf_name, page.number)
+    return [block for block in organizer._figure_blocks if block["type"] == "image"]
+
+def measure(label, extract, pages):
+    """Run extract over pages and report per-page time, peak memory and figure count."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    figure_count = 0
+    for page in pages:
+        figure_count += len(extract(page))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_page_ms = elapsed / max(len(pages), 1) * 1000
+    print(f"{label:<10} {per_page_ms:8.1f} ms/page  peak {peak / 1e6:7.1f} MB  {figure_count:5d} figures")
+    return per_page_ms, peak
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-page figure extraction')
+    parser.add_argument('pdfs', nargs='*', help='PDFs to benchmark (default: ../CS162/w1/*.pdf)')
+    parser.add_argument('--pages', type=int, default=20, help='Maximum pages per PDF (default: 20)')
+
+    args = parser.parse_args()
+
+    pdf_paths = [Path(p) for p in args.pdfs] or sorted(Path("../CS162/w1").glob("*.pdf"))
+    if not pdf_paths:
+        print("No PDFs to benchmark")
+        return 1
+
+    organizer = PDFContentOrganizer()
+
+    for pdf_path in pdf_paths:
+        doc = pymupdf.open(pdf_path)
+        pages = [doc.load_page(i) for i in range(min(len(doc), args.pages))]
+        print(f"\n📄 {pdf_path} ({len(pages)} pages)")
+
+        before_ms, before_peak = measure("before", lambda p: legacy_extract_page_figures(organizer, p), pages)
+        after_ms, after_peak = measure("after", lambda p: collect_page_figures(organizer, p, pdf_path.stem), pages)
+
+        print(f"speedup    {before_ms / after_ms:8.2f}x        memory {after_peak / max(before_peak, 1):6.2f}x")
+        doc.close()
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
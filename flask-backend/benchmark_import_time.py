@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark Import Time
+
+Measures the cold-start import time of app.py and each CLI entry point with
+`python -X importtime`, each in a fresh interpreter, and lists the slowest
+imports underneath it. Results can be saved and compared against a previous
+run to catch regressions (e.g. a heavy library imported at module level).
+
+Usage:
+    python benchmark_import_time.py [MODULE ...] [--runs N] [--top N] [--save FILE] [--compare FILE]
+
+Example:
+    python benchmark_import_time.py --save import_times.json
+    python benchmark_import_time.py app --compare import_times.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from statistics import median
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = [
+    "app",
+    "setup_course",
+    "setup_multiple_courses",
+    "process_course_by_weeks",
+    "simple_week_processor",
+    "batch_build_study_guides",
+    "course_pipeline",
+    "generate_week_videos",
+    "week_video_processor",
+    "lecture_pdf_extraction",
+]
+
+def measure_import(module: str) -> Tuple[float, List[Tuple[str, int, float]]]:
+    """Import module in a fresh interpreter; return (total ms, [(module, depth, cumulative ms), ...])."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is encoded as two spaces of indentation per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(cumulative) / 1000))
+
+    total = next(ms for name, depth, ms in reversed(imports) if name == module and depth == 0)
+    return total, imports
+
+def benchmark(module: str, runs: int, top: int) -> Dict:
+    """Median import time over runs, plus the slowest direct dependencies of the last run."""
+    totals = []
+    for _ in range(runs):
+        total, imports = measure_import(module)
+        totals.append(total)
+
+    # Depth 1 = imported directly by module (or by an earlier top-level import)
+    direct = [(name, ms) for name, depth, ms in imports if depth == 1]
+    slowest = sorted(direct, key=lambda item: item[1], reverse=True)[:top]
+    return {"median_ms": median(totals), "runs": totals, "slowest": slowest}
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark cold-start import time of the app and CLI entry points')
+    parser.add_argument('modules', nargs='*', help=f'Modules to import (default: {", ".join(ENTRY_POINTS)})')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters per module (default: 5)')
+    parser.add_argument('--top', type=int, default=5, help='Slowest direct imports to list (default: 5)')
+    parser.add_argument('--save', metavar='FILE', help='Save results as JSON')
+    parser.add_argument('--compare', metavar='FILE', help='Compare against results saved with --save')
+
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = {}
+    for module in args.modules or ENTRY_POINTS:
+        try:
+            results[module] = benchmark(module, args.runs, args.top)
+        except RuntimeError as e:
+            print(f"❌ {module}: {e}")
+            continue
+
+        line = f"{module:<26} {results[module]['median_ms']:8.1f} ms"
+        if module in baseline:
+            before = baseline[module]["median_ms"]
+            line += f"   (was {before:8.1f} ms, {results[module]['median_ms'] / before:5.2f}x)"
+        print(line)
+        for name, ms in results[module]["slowest"]:
+            print(f"    {name:<30} {ms:8.1f} ms")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark LLM Client
+
+Compares the old calling pattern (a new requests.post, and so a new TCP/TLS
+connection, per call) against the shared pooled ClaudeClient, sequentially and
+with concurrent callers. Run it against stub_llm_server.py or any other
+Messages API endpoint.
+
+Usage:
+    python benchmark_llm_client.py [--base-url URL] [--calls N] [--threads N]
+
+Example:
+    python stub_llm_server.py --port 8765 &
+    python benchmark_llm_client.py --base-url http://127.0.0.1:8765 --calls 200 --threads 8
+"""
+
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from llm_client import ClaudeClient, ANTHROPIC_VERSION
+
+PAYLOAD = {
+    "model": "claude-sonnet-4-20250514",
+    "max_tokens": 100,
+    "messages": [{"role": "user", "content": "Benchmark request"}]
+}
+
+def unpooled_call(base_url, api_key):
+    """The pre-pooling pattern: one connection per request."""
+    response = requests.post(
+        f"{base_url}/v1/messages",
+        headers={"Content-Type": "application/json", "x-api-key": api_key, "anthropic-version": ANTHROPIC_VERSION},
+        json=PAYLOAD,
+        timeout=30
+    )
+    response.raise_for_status()
+    return response.json()
+
+def run(label, call, calls, threads):
+    """Issue calls requests over threads workers and report throughput and mean latency."""
+    latencies = []
+
+    def timed_call(_):
+        start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(timed_call, range(calls)))
+    elapsed = time.perf_counter() - start
+
+    print(f"{label:<22} {calls / elapsed:8.1f} calls/s  mean {sum(latencies) / len(latencies) * 1000:7.1f} ms")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled vs. per-call Claude connections')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8765', help='Messages API base URL (default: local stub)')
+    parser.add_argument('--api-key', default='stub', help='API key to send (default: stub)')
+    parser.add_argument('--calls', type=int, default=200, help='Requests per run (default: 200)')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent callers for the threaded runs (default: 8)')
+
+    args = parser.parse_args()
+
+    client = ClaudeClient(api_key=args.api_key, base_url=args.base_url, max_concurrency=args.threads)
+
+    for threads in (1, args.threads):
+        print(f"\n{threads} thread(s), {args.calls} calls")
+        before = run("per-call connection", lambda: unpooled_call(args.base_url, args.api_key), args.calls, threads)
+        after = run("pooled client", lambda: client.create_message(**PAYLOAD), args.calls, threads)
+        print(f"speedup {before / after:.2f}x")
+
+    print(f"\nClient metrics: {client.summarize_metrics()}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
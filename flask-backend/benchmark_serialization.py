@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark Serialization
+
+Seeds an in-memory SQLite database with a large course (lessons with concepts
+and exercises) and a large week-video list, then times each stage of turning
+them into a JSON response body:
+
+    build   - ORM objects + to_dict()  vs  serializers (ORM objects)  vs  serializers.rows() (column tuples)
+    encode  - Flask's stdlib JSON provider  vs  the orjson provider (when installed)
+
+Every path is checked to produce the same data as to_dict() first.
+
+Usage:
+    python benchmark_serialization.py [--lessons N] [--children N] [--videos N] [--runs N]
+
+Example:
+    python benchmark_serialization.py
+    python benchmark_serialization.py --lessons 500 --videos 5000 --runs 10
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from statistics import median
+from typing import Callable, Dict, Tuple
+
+# Must be set before app is imported, which reads them at import time
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['RESPONSE_CACHE_DIR'] = tempfile.mkdtemp(prefix='serialization_')
+os.environ['SEARCH_INDEX_PATH'] = os.path.join(os.environ['RESPONSE_CACHE_DIR'], 'search_index.sqlite3')
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy.orm import selectinload
+
+from app import app
+from models import db, Course, Lesson, Concept, Exercise, WeekVideo
+import serializers
+
+def seed(num_lessons: int, children: int, num_videos: int) -> int:
+    """Fresh database with one course of lessons and num_videos week videos; returns the course id."""
+    db.drop_all()
+    db.create_all()
+
+    course = Course(code='CS000', name='Benchmark Course')
+    db.session.add(course)
+    db.session.flush()
+
+    for week in range(num_lessons):
+        lesson = Lesson(course_id=course.id, title=f'Lesson {week}', description='Lesson description ' * 5,
+                        week=week // 3 + 1, order=week % 3, duration=50, difficulty='Intermediate')
+        db.session.add(lesson)
+        db.session.flush()
+        for i in range(children):
+            db.session.add(Concept(lesson_id=lesson.id, title=f'Concept {i}', order=i,
+                                   content='Concept content ' * 20, analogy='An analogy ' * 5))
+            db.session.add(Exercise(lesson_id=lesson.id, title=f'Exercise {i}', order=i,
+                                    problem='Problem statement ' * 10, solution='Solution ' * 10,
+                                    hints=json.dumps([f'Hint {i}', 'Check the base case'])))
+
+    for i in range(num_videos):
+        db.session.add(WeekVideo(course_code='CS000', week_number=i % 15 + 1, topic=f'Topic {i}',
+                                 video_title=f'Video {i}', video_url=f'https://www.youtube.com/watch?v={i:011d}',
+                                 video_id=f'{i:011d}', channel_name='MIT OpenCourseWare',
+                                 duration_seconds=600 + i, relevance_score=(i % 100) / 100,
+                                 thumbnail_url=f'https://i.ytimg.com/vi/{i:011d}/hqdefault.jpg',
+                                 description='Video description ' * 10))
+
+    db.session.commit()
+    return course.id
+
+def time_median(fn: Callable, runs: int) -> Tuple[float, object]:
+    """(median ms, last result) of fn() over runs, each with an empty identity map."""
+    timings = []
+    result = None
+    for _ in range(runs):
+        db.session.expunge_all()
+        start = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return median(timings), result
+
+def build_paths(course_id: int) -> Dict[str, Dict[str, Callable]]:
+    """For lessons and videos: the ways of building the same list of dicts."""
+    def lessons_query():
+        return (Lesson.query.options(selectinload(Lesson.concepts), selectinload(Lesson.exercises))
+                .filter_by(course_id=course_id).order_by(Lesson.id).all())
+
+    def videos_query():
+        return WeekVideo.query.filter_by(course_code='CS000').order_by(WeekVideo.id).all()
+
+    def lessons_serialized():
+        return [
+            {**serializers.lesson(lesson),
+             'concepts': serializers.concept.many(lesson.concepts),
+             'exercises': serializers.exercise.many(lesson.exercises)}
+            for lesson in lessons_query()
+        ]
+
+    return {
+        'lessons': {
+            'to_dict()': lambda: [lesson.to_dict() for lesson in lessons_query()],
+            'serializers': lessons_serialized,
+            'serializers.rows()': lambda: serializers.lesson_trees(Lesson.course_id == course_id, order_by=(Lesson.id,)),
+        },
+        'videos': {
+            'to_dict()': lambda: [video.to_dict() for video in videos_query()],
+            'serializers': lambda: serializers.week_video.many(videos_query()),
+            'serializers.rows()': lambda: serializers.week_video.rows(WeekVideo.course_code == 'CS000', order_by=(WeekVideo.id,)),
+        },
+    }
+
+def encoders() -> Dict[str, Callable]:
+    """Response body encoders: Flask's default provider and, if installed, orjson."""
+    stdlib = DefaultJSONProvider(app)
+    found = {'stdlib json': lambda payload: stdlib.response(payload).get_data()}
+    if serializers.install_json_provider(app):
+        found['orjson'] = lambda payload: app.json.response(payload).get_data()
+    else:
+        print("ℹ️  orjson not installed; skipping its encoder")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark building and encoding large lesson and video responses')
+    parser.add_argument('--lessons', type=int, default=200, help='Lessons to seed (default: 200)')
+    parser.add_argument('--children', type=int, default=4, help='Concepts and exercises per lesson (default: 4)')
+    parser.add_argument('--videos', type=int, default=2000, help='Week videos to seed (default: 2000)')
+    parser.add_argument('--runs', type=int, default=5, help='Timed runs per measurement (default: 5)')
+
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(f"🌱 Seeding {args.lessons} lessons x {args.children} concepts/exercises and {args.videos} videos...")
+        course_id = seed(args.lessons, args.children, args.videos)
+        encode_with = encoders()
+
+        failed = False
+        for name, paths in build_paths(course_id).items():
+            print(f"\n📦 {name}")
+            print(f"  {'path':<22}{'build ms':>10}" + ''.join(f"{f'+ {encoder}':>16}" for encoder in encode_with))
+
+            expected = None
+            for path, build in paths.items():
+                build_ms, payload = time_median(build, args.runs)
+                if expected is None:
+                    expected = payload
+                    items = len(payload)
+                elif payload != expected:
+                    print(f"  ❌ {path} does not match to_dict()")
+                    failed = True
+                    continue
+
+                row = f"  {path:<22}{build_ms:>10.1f}"
+                for encode in encode_with.values():
+                    encode_ms, _ = time_median(lambda: encode(payload), args.runs)
+                    row += f"{build_ms + encode_ms:>16.1f}"
+                print(row)
+            print(f"  ({items} {name}; ms are medians of {args.runs} runs, build + encode in the encoder columns)")
+
+    if failed:
+        return 1
+    print("\n✅ All serialization paths match to_dict()")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark Table Detection
+
+Runs page.find_tables() on every page of the lecture PDFs (the old behaviour)
+and again behind PDFContentOrganizer._page_may_have_tables, then reports the
+speedup and the table recall of the gated run relative to the ungated one.
+
+Usage:
+    python benchmark_table_detection.py [COURSE_DIR ...]
+
+Example:
+    python benchmark_table_detection.py ../CS162 ../CS170
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import pymupdf
+
+from lecture_pdf_extraction import PDFContentOrganizer
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gated vs. ungated table detection')
+    parser.add_argument('course_dirs', nargs='*', default=['../CS162', '../CS170'],
+                        help='Course folders containing week subfolders of PDFs (default: ../CS162 ../CS170)')
+
+    args = parser.parse_args()
+
+    pdf_paths = []
+    for course_dir in args.course_dirs:
+        pdf_paths.extend(sorted(Path(course_dir).glob("*/*.pdf")))
+    if not pdf_paths:
+        print("No PDFs to benchmark")
+        return 1
+
+    organizer = PDFContentOrganizer()
+
+    total_pages = 0
+    candidate_pages = 0
+    ungated_time = 0.0
+    gated_time = 0.0
+    ungated_tables = 0
+    gated_tables = 0
+    missed = []
+
+    for pdf_path in pdf_paths:
+        doc = pymupdf.open(pdf_path)
+        for page_num in range(len(doc)):
+            page = doc.load_page(page_num)
+            total_pages += 1
+
+            start = time.perf_counter()
+            found = len(page.find_tables().tables)
+            ungated_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            if organizer._page_may_have_tables(page):
+                candidate_pages += 1
+                kept = len(page.find_tables().tables)
+            else:
+                kept = 0
+            gated_time += time.perf_counter() - start
+
+            ungated_tables += found
+            gated_tables += kept
+            if kept < found:
+                missed.append(f"{pdf_path} page {page_num + 1}: {found - kept} table(s)")
+        doc.close()
+
+    recall = gated_tables / ungated_tables if ungated_tables else 1.0
+
+    print(f"📄 {len(pdf_paths)} PDFs, {total_pages} pages")
+    print(f"Candidate pages:     {candidate_pages}/{total_pages} ({candidate_pages / total_pages:.0%})")
+    print(f"Ungated find_tables: {ungated_time:7.1f} s")
+    print(f"Gated find_tables:   {gated_time:7.1f} s")
+    print(f"Speedup:             {ungated_time / gated_time:7.1f}x")
+    print(f"Table recall:        {recall:.1%} ({gated_tables}/{ungated_tables})")
+
+    if missed:
+        print("\nTables skipped by the gate:")
+        for entry in missed:
+            print(f"  - {entry}")
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
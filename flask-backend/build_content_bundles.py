@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Build Content Bundles
+
+Compiles each course's <COURSE>_New/W*/study_guide.md weeks into one static
+bundle that /api/content/<course> serves from disk: rendered HTML sections
+with their lesson ids, each week's study guide topics and its YouTube videos
+from the database. Writes gzip (and brotli, when installed) variants next to
+it. Run after regenerating study guides or week videos.
+
+Usage:
+    python build_content_bundles.py [COURSE ...] [--root DIR] [--output DIR] [--no-videos]
+
+Example:
+    python build_content_bundles.py
+    python build_content_bundles.py CS162 CS170 --no-videos
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from content_bundles import ContentBundles, DEFAULT_DIRECTORY
+from study_guide_content import StudyGuideContent, DEFAULT_ROOT, DEFAULT_CACHE_DIRECTORY
+from topic_scanner import WEEK_FOLDER, scan_topics
+
+def week_numbers(course_dir: Path) -> List[int]:
+    return sorted(
+        int(match.group(1)) for match in (WEEK_FOLDER.match(path.parent.name) for path in course_dir.glob("*/study_guide.md"))
+        if match
+    )
+
+def course_videos(course_code: str) -> Dict[int, List[Dict]]:
+    """The course's week videos from the database, best first, keyed by week."""
+    from models import WeekVideo
+    import serializers
+
+    videos_by_week: Dict[int, List[Dict]] = {}
+    for video in serializers.week_video.rows(
+        WeekVideo.course_code == course_code,
+        order_by=(WeekVideo.week_number, WeekVideo.relevance_score.desc())
+    ):
+        videos_by_week.setdefault(video['week_number'], []).append(video)
+    return videos_by_week
+
+def build_course_bundle(course_code: str, guides: StudyGuideContent,
+                        videos_by_week: Optional[Dict[int, List[Dict]]] = None) -> Dict:
+    """Every week of a course, in order: lessons (rendered sections), topics and videos."""
+    weeks = []
+    for week in week_numbers(guides.root / f"{course_code}_New"):
+        guide = guides.week(course_code, week)
+        if guide is None:
+            print(f"⚠️  {course_code} week {week}: study guide not readable, skipped")
+            continue
+        _, lessons = guide
+        content = guides.guide_path(course_code, week).read_text(encoding='utf-8')
+        weeks.append({
+            'week': week,
+            'lessons': lessons,
+            'topics': scan_topics(content),
+            'videos': (videos_by_week or {}).get(week, [])
+        })
+    return {'course_code': course_code, 'weeks': weeks}
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile course study guides into static content bundles')
+    parser.add_argument('courses', nargs='*', help='Course codes (default: every <COURSE>_New folder)')
+    parser.add_argument('--root', default=str(DEFAULT_ROOT), help='Folder containing the <COURSE>_New folders')
+    parser.add_argument('--output', default=os.environ.get('CONTENT_BUNDLE_DIR', str(DEFAULT_DIRECTORY)),
+                        help='Bundle directory (default: instance/content_bundles)')
+    parser.add_argument('--no-videos', action='store_true', help="Don't read week videos from the database")
+
+    args = parser.parse_args()
+
+    root = Path(args.root)
+    courses = [code.upper() for code in args.courses] or sorted(
+        path.name[:-len("_New")] for path in root.glob("*_New") if path.is_dir()
+    )
+    guides = StudyGuideContent(root, os.environ.get('CONTENT_CACHE_DIR', DEFAULT_CACHE_DIRECTORY))
+    bundles = ContentBundles(args.output)
+
+    app_context = None
+    if not args.no_videos:
+        from app import app
+        app_context = app.app_context()
+        app_context.push()
+
+    failed = []
+    try:
+        for course_code in courses:
+            if not (root / f"{course_code}_New").is_dir():
+                print(f"❌ {course_code}: no {course_code}_New folder under {root}")
+                failed.append(course_code)
+                continue
+
+            start = time.perf_counter()
+            videos = None if args.no_videos else course_videos(course_code)
+            bundle = build_course_bundle(course_code, guides, videos)
+            entry = bundles.write(course_code, bundle)
+
+            lessons = sum(len(week['lessons']) for week in bundle['weeks'])
+            video_count = sum(len(week['videos']) for week in bundle['weeks'])
+            print(f"✅ {course_code}: {len(bundle['weeks'])} weeks, {lessons} lessons, {video_count} videos "
+                  f"-> {entry['file']} ({entry['size'] / 1024:.0f} KB; {', '.join(entry['encodings'])}) "
+                  f"in {time.perf_counter() - start:.1f}s")
+    finally:
+        if app_context is not None:
+            app_context.pop()
+
+    print(f"\n📦 Rendered {guides.renders} study guides; bundles in {bundles.directory}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
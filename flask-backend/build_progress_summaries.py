@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Build Progress Summaries
+
+Backfills the per (user, course) progress counters (course_progress_summaries)
+from the LessonProgress and Progress tables, e.g. after creating the table or
+restoring a database. New writes keep the counters current on their own.
+--check only compares the stored counters with freshly computed ones. Also
+creates the summary table, and indexes added to the progress tables, on
+existing databases.
+
+Usage:
+    python build_progress_summaries.py [COURSE ...] [--check]
+
+Example:
+    python build_progress_summaries.py
+    python build_progress_summaries.py CS162 --check
+"""
+
+import sys
+import time
+import argparse
+
+from progress_summary import COUNTER_COLUMNS, rebuild_summaries, summary_rows
+
+def check(session, courses) -> int:
+    """Number of summaries that are missing or differ from the progress tables."""
+    from models import CourseProgressSummary
+
+    query = session.query(CourseProgressSummary)
+    if courses is not None:
+        query = query.filter(CourseProgressSummary.course_code.in_(courses))
+    stored = {(summary.user_id, summary.course_code): summary for summary in query}
+
+    drifted = 0
+    for row in summary_rows(session, courses=courses):
+        summary = stored.pop((row['user_id'], row['course_code']), None)
+        differences = [
+            f"{column} {getattr(summary, column)} != {row[column]}"
+            for column in COUNTER_COLUMNS if summary is None or getattr(summary, column) != row[column]
+        ]
+        if differences:
+            drifted += 1
+            print(f"⚠️  user {row['user_id']} {row['course_code']}: "
+                  f"{'missing' if summary is None else ', '.join(differences)}")
+    for (user_id, course_code), summary in stored.items():
+        if any(getattr(summary, column) for column in COUNTER_COLUMNS):
+            drifted += 1
+            print(f"⚠️  user {user_id} {course_code}: summary without progress rows")
+    return drifted
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill per-course progress summaries')
+    parser.add_argument('courses', nargs='*', help='Course codes (default: all)')
+    parser.add_argument('--check', action='store_true', help="Only report summaries that don't match; change nothing")
+
+    args = parser.parse_args()
+    courses = [code.upper() for code in args.courses] or None
+
+    from app import app
+    from models import db, LessonProgress
+
+    with app.app_context():
+        db.create_all()  # creates course_progress_summaries on existing databases
+        for index in LessonProgress.__table__.indexes:  # create_all skips indexes of existing tables
+            index.create(db.engine, checkfirst=True)
+        start = time.perf_counter()
+
+        if args.check:
+            drifted = check(db.session, courses)
+            print(f"{'❌' if drifted else '✅'} {drifted} summaries out of date "
+                  f"(checked in {time.perf_counter() - start:.2f}s)")
+            return 1 if drifted else 0
+
+        try:
+            written = rebuild_summaries(db.session, courses)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Backfill failed: {e}")
+            return 1
+
+        print(f"✅ Wrote {written} progress summaries in {time.perf_counter() - start:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
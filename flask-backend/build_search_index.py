@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Build Search Index
+
+Brings the /api/search index up to date: study guides under the
+<COURSE>_New folders, Concept rows and homework assignments. Only sources
+that changed since the last run are reindexed, so it is cheap to rerun (e.g.
+after restoring a database). --rebuild starts from an empty index.
+
+Usage:
+    python build_search_index.py [--root DIR] [--rebuild] [--no-database] [--query TEXT]
+
+Example:
+    python build_search_index.py
+    python build_search_index.py --rebuild --query "page table"
+"""
+
+import sys
+import time
+import argparse
+
+from search_index import search_index, DEFAULT_ROOT
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or update the full-text search index')
+    parser.add_argument('--root', default=str(DEFAULT_ROOT), help='Folder containing the <COURSE>_New folders')
+    parser.add_argument('--rebuild', action='store_true', help='Delete the index and index everything again')
+    parser.add_argument('--no-database', action='store_true', help='Only index study guides')
+    parser.add_argument('--query', help='Run a search afterwards and print the top results')
+
+    args = parser.parse_args()
+
+    if args.rebuild:
+        for suffix in ('', '-wal', '-shm'):
+            search_index.path.with_name(search_index.path.name + suffix).unlink(missing_ok=True)
+        print(f"🗑️  Removed {search_index.path}")
+
+    start = time.perf_counter()
+    guides = search_index.refresh_guides(args.root)
+    print(f"📚 Reindexed {guides} study guides in {time.perf_counter() - start:.2f}s")
+
+    if not args.no_database:
+        from app import app
+        from models import db
+        with app.app_context():
+            start = time.perf_counter()
+            rows = search_index.refresh_database(db.session)
+            print(f"🗄️  Reindexed {rows} concepts and homework assignments in {time.perf_counter() - start:.2f}s")
+
+    documents, = search_index.connection().execute('SELECT count(*) FROM documents').fetchone()
+    print(f"✅ {documents} documents in {search_index.path}")
+
+    if args.query:
+        start = time.perf_counter()
+        results = search_index.search(args.query, limit=5)
+        print(f"\n🔎 \"{args.query}\": {len(results)} results in {(time.perf_counter() - start) * 1000:.1f} ms")
+        for result in results:
+            print(f"  {result['score']:>7.2f}  {result['course_code']} W{result['week']}  {result['title']}")
+            print(f"           {result['snippet']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Check Query Counts
+
+Runs the course and lesson routes against an in-memory SQLite database seeded
+at several sizes, counts the SQL statements each request issues, and fails if
+a count grows with the amount of data (an N+1 query from a lazy relationship
+serialized in to_dict()).
+
+Usage:
+    python check_query_counts.py [--sizes N [N ...]] [--children N]
+
+Example:
+    python check_query_counts.py
+    python check_query_counts.py --sizes 1 10 50 --children 4
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+from typing import Callable, Dict, List, Tuple
+
+# Must be set before app is imported, which reads them at import time
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['RESPONSE_CACHE_DIR'] = tempfile.mkdtemp(prefix='query_counts_')
+os.environ['SEARCH_INDEX_PATH'] = os.path.join(os.environ['RESPONSE_CACHE_DIR'], 'search_index.sqlite3')
+
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+
+from app import app
+from models import db, User, Course, Lesson, Concept, Exercise
+
+def seed(num_lessons: int, children: int) -> Dict[str, int]:
+    """Fresh database with one course of num_lessons lessons, each with `children` concepts and exercises."""
+    db.drop_all()
+    db.create_all()
+
+    user = User(email='harness@example.com', name='Harness')
+    course = Course(code='CS000', name='Harness Course')
+    db.session.add_all([user, course])
+    db.session.flush()
+
+    for week in range(num_lessons):
+        lesson = Lesson(course_id=course.id, title=f'Lesson {week}', week=week + 1, order=1)
+        db.session.add(lesson)
+        db.session.flush()
+        for i in range(children):
+            db.session.add(Concept(lesson_id=lesson.id, title=f'Concept {i}', order=i))
+            db.session.add(Exercise(lesson_id=lesson.id, title=f'Exercise {i}', order=i,
+                                    hints=json.dumps([f'Hint {i}'])))
+
+    db.session.commit()
+    return {'user_id': user.id, 'course_id': course.id, 'lesson_id': lesson.id}
+
+# (route name, URL built from the seeded ids)
+ROUTES: List[Tuple[str, Callable[[Dict[str, int]], str]]] = [
+    ('get_courses', lambda ids: '/api/courses/'),
+    ('get_course', lambda ids: f"/api/courses/{ids['course_id']}"),
+    ('get_course_lessons', lambda ids: f"/api/courses/{ids['course_id']}/lessons"),
+    ('get_lesson', lambda ids: f"/api/lessons/{ids['lesson_id']}"),
+]
+
+def count_queries(sizes: List[int], children: int) -> Dict[str, List[int]]:
+    """Statements issued by each route, per seeded size."""
+    statements = []
+    counts = {name: [] for name, _ in ROUTES}
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+        client = app.test_client()
+
+        for size in sizes:
+            ids = seed(size, children)
+            headers = {'Authorization': f"Bearer {create_access_token(identity=str(ids['user_id']))}"}
+
+            for name, url in ROUTES:
+                # Start every request with an empty identity map, like a real one
+                db.session.expunge_all()
+                statements.clear()
+                response = client.get(url(ids), headers=headers)
+                if response.status_code != 200:
+                    raise RuntimeError(f"{name} returned {response.status_code}: {response.get_data(as_text=True)}")
+                counts[name].append(len(statements))
+
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Fail if a route issues more queries as the data grows')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 5, 25], help='Lessons to seed (default: 1 5 25)')
+    parser.add_argument('--children', type=int, default=3, help='Concepts and exercises per lesson (default: 3)')
+
+    args = parser.parse_args()
+
+    counts = count_queries(args.sizes, args.children)
+
+    print(f"{'route':<22}" + ''.join(f"{f'N={size}':>8}" for size in args.sizes))
+    failed = []
+    for name, per_size in counts.items():
+        grows = len(set(per_size)) > 1
+        print(f"{name:<22}" + ''.join(f"{count:>8}" for count in per_size) + ("   ❌ grows with N" if grows else ""))
+        if grows:
+            failed.append(name)
+
+    if failed:
+        print(f"\n❌ N+1 queries in: {', '.join(failed)}")
+        return 1
+    print("\n✅ Query counts are independent of N")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,9 +4,9 @@ Topic classification service using Claude API
 
 import os
 import json
-import requests
 from flask import Blueprint, request, jsonify
 from dotenv import load_dotenv
+from lazy_imports import llm_client
 
 load_dotenv()
 
@@ -91,36 +91,22 @@ Instructions:
 Topic:"""
 
         # Call Claude API
-        headers = {
-            'Content-Type': 'application/json',
-            'x-api-key': claude_api_key,
-            'anthropic-version': '2023-06-01'
-        }
-
-        payload = {
-            'model': 'claude-sonnet-4-20250514',
-            'max_tokens': 100,
-            'messages': [{
-                'role': 'user',
-                'content': prompt
-            }]
-        }
-
-        claude_response = requests.post(
-            'https://api.anthropic.com/v1/messages',
-            headers=headers,
-            json=payload,
-            timeout=30
-        )
-
-        if not claude_response.ok:
-            error_text = claude_response.text
-            print(f'Claude API error: {error_text}')
+        try:
+            claude_result = llm_client.get_client().create_message(
+                model='claude-sonnet-4-20250514',
+                max_tokens=100,
+                messages=[{
+                    'role': 'user',
+                    'content': prompt
+                }],
+                timeout=(10, 30)
+            )
+        except llm_client.LLMError as e:
+            print(f'Claude API error: {e}')
             return jsonify({
                 'error': 'Failed to classify topic with Claude API'
             }), 500
 
-        claude_result = claude_response.json()
         identified_topic = claude_result.get('content', [{}])[0].get('text', '').strip()
 
         # Validate that the identified topic is in our list
@@ -0,0 +1,159 @@
+"""
+Content Bundles - a course's study guide weeks compiled into one static file.
+
+build_content_bundles.py writes, per course, a compact JSON bundle with every
+week's rendered HTML sections (lesson ids, titles, content), its study guide
+topics and its YouTube videos. Next to it go gzip and, when the brotli
+package is installed, brotli variants. File names carry a hash of the content,
+so a bundle never changes once written:
+
+    instance/content_bundles/CS162.3f9a0c1d2b4e5f60.json
+    instance/content_bundles/CS162.3f9a0c1d2b4e5f60.json.gz
+    instance/content_bundles/CS162.3f9a0c1d2b4e5f60.json.br
+    instance/content_bundles/manifest.json      course -> current bundle
+
+The API serves the variant the client accepts straight from disk with
+send_file (sendfile(2) under gunicorn, or X-Sendfile with USE_X_SENDFILE), so
+a cold page load is one static read: no markdown, no database. Hashed URLs
+are served with a one-year immutable Cache-Control.
+"""
+
+import os
+import re
+import json
+import gzip
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+from flask import request, send_file
+
+DEFAULT_DIRECTORY = Path(__file__).resolve().parent / 'instance' / 'content_bundles'
+MANIFEST = 'manifest.json'
+KEEP_BUNDLES = 2  # per course: the current one and the one clients may still hold
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, no-cache'
+
+BUNDLE_NAME = re.compile(r'^[A-Z]+\d+[A-Z]?\.[0-9a-f]{16}\.json$')
+
+# Content-Encoding -> file suffix, in order of preference
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def encode_bundle(bundle: Dict) -> bytes:
+    """Compact, deterministic JSON: the same content always hashes the same."""
+    return json.dumps(bundle, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+def compress_variants(data: bytes) -> Dict[str, bytes]:
+    """Precompressed copies of a bundle, keyed by file suffix."""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli  # optional; without it only gzip is offered
+    except ImportError:
+        return variants
+    variants['.br'] = brotli.compress(data, quality=11)
+    return variants
+
+class ContentBundles:
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = Path(directory)
+        self._manifest: Dict[str, Dict] = {}
+        self._manifest_signature = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ContentBundles":
+        return cls(os.environ.get('CONTENT_BUNDLE_DIR', DEFAULT_DIRECTORY))
+
+    def manifest(self) -> Dict[str, Dict]:
+        """Current bundle of each course, reread only when the manifest file changes."""
+        try:
+            stat = (self.directory / MANIFEST).stat()
+        except FileNotFoundError:
+            return {}
+        signature = (stat.st_mtime_ns, stat.st_ino)
+        with self._lock:
+            if signature != self._manifest_signature:
+                self._manifest = json.loads((self.directory / MANIFEST).read_text(encoding='utf-8'))
+                self._manifest_signature = signature
+            return self._manifest
+
+    def current(self, course_code: str) -> Optional[Dict]:
+        """Manifest entry of a course's current bundle: {'file', 'digest', 'size', 'encodings'}."""
+        return self.manifest().get(course_code.upper())
+
+    def write(self, course_code: str, bundle: Dict) -> Dict:
+        """Write a course's bundle and its compressed variants, then point the manifest at it."""
+        data = encode_bundle(bundle)
+        digest = hashlib.sha256(data).hexdigest()[:16]
+        name = f"{course_code.upper()}.{digest}.json"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        variants = compress_variants(data)
+        for suffix, content in [('', data), *variants.items()]:
+            path = self.directory / f"{name}{suffix}"
+            if not path.exists():
+                temp_path = self.directory / f".{name}{suffix}.{os.getpid()}.tmp"
+                temp_path.write_bytes(content)
+                os.replace(temp_path, path)
+
+        entry = {
+            'file': name,
+            'digest': digest,
+            'size': len(data),
+            'encodings': [encoding for encoding, suffix in ENCODINGS if suffix in variants]
+        }
+        manifest = dict(self.manifest())
+        manifest[course_code.upper()] = entry
+        temp_path = self.directory / f".{MANIFEST}.{os.getpid()}.tmp"
+        temp_path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+        os.replace(temp_path, self.directory / MANIFEST)
+
+        self._prune(course_code.upper(), keep=name)
+        return entry
+
+    def _prune(self, course_code: str, keep: str):
+        """Delete all but the newest KEEP_BUNDLES bundles of a course."""
+        bundles = sorted(
+            self.directory.glob(f"{course_code}.*.json"),
+            key=lambda path: (path.name != keep, -path.stat().st_mtime_ns)
+        )
+        for old in bundles[KEEP_BUNDLES:]:
+            for suffix in ['', *(suffix for _, suffix in ENCODINGS)]:
+                Path(f"{old}{suffix}").unlink(missing_ok=True)
+
+    def send(self, name: str, cache_control: str):
+        """Response with a bundle file in the best encoding the client accepts; None if unknown."""
+        if not BUNDLE_NAME.match(name):
+            return None
+        path = self.directory / name
+        entry = self.manifest().get(name.split('.', 1)[0], {})
+        # The manifest only lists the encodings of the current bundle; check older ones on disk
+        encodings = entry.get('encodings', []) if entry.get('file') == name else [
+            encoding for encoding, suffix in ENCODINGS if Path(f"{path}{suffix}").exists()
+        ]
+
+        encoding = next(
+            (encoding for encoding, _ in ENCODINGS if encoding in encodings and request.accept_encodings[encoding]),
+            None
+        )
+        suffix = dict(ENCODINGS).get(encoding, '')
+        if not Path(f"{path}{suffix}").exists():
+            return None
+
+        digest = name.split('.')[1]
+        response = send_file(
+            f"{path}{suffix}",
+            mimetype='application/json',
+            etag=f"{digest}-{encoding}" if encoding else digest,
+            conditional=True
+        )
+        del response.headers['Content-Disposition']  # names the variant file, not the content
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+content_bundles = ContentBundles.from_env()
@@ -0,0 +1,177 @@
+"""
+Course Analytics - completion statistics of a course's lessons across all students.
+
+Everything is aggregated in SQL; Python only ever sees per-lesson rows, never
+per-student ones. For a page of lessons, three statements run, however many
+progress rows the course has:
+
+- students in the course: COUNT(DISTINCT user_id)
+- per lesson: students, completions and summed progress (GROUP BY lesson_id),
+  which also gives the week rollups and the drop-off between lessons
+- for the page's lessons only: students per progress value (GROUP BY
+  lesson_id, progress). Progress is an integer 0-100, so that is at most 101
+  rows per lesson, and the histogram and the exact median come from it
+
+All three are range scans of ix_lesson_progress_course_lesson, which covers
+(course_code, lesson_id, progress, completed, user_id).
+
+Lessons are ordered like the study guides ("2-10" after "2-9"). drop_off is
+1 - students(lesson) / students(previous lesson): the share of students lost
+since the lesson before, negative when more students reached this one.
+
+Responses are cached for ANALYTICS_CACHE_SECONDS (default 60) instead of
+being invalidated by every progress write. Only the users listed in
+ANALYTICS_EMAILS (comma-separated) may see them; unset, nobody can.
+"""
+
+import os
+import re
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import case, distinct, func, select
+
+from models import LessonProgress
+
+HISTOGRAM_BUCKETS = 10  # 0-9, 10-19, ..., 90-100
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+CACHE_SECONDS = int(os.environ.get('ANALYTICS_CACHE_SECONDS', 60))
+VIEWER_EMAILS = {email.strip().lower() for email in os.environ.get('ANALYTICS_EMAILS', '').split(',') if email.strip()}
+
+LESSON_ID = re.compile(r'^(\d+)-(\d+)$')
+
+def can_view(email: str) -> bool:
+    return bool(email) and email.lower() in VIEWER_EMAILS
+
+def lesson_sort_key(lesson_id: str) -> Tuple:
+    """Study guide order: by week, then section number; other ids last, alphabetically."""
+    match = LESSON_ID.match(lesson_id)
+    if match:
+        return (0, int(match.group(1)), int(match.group(2)), '')
+    return (1, 0, 0, lesson_id)
+
+def lesson_week(lesson_id: str):
+    match = LESSON_ID.match(lesson_id)
+    return int(match.group(1)) if match else None
+
+def rate(part: float, whole: float) -> float:
+    return round(part / whole, 4) if whole else 0.0
+
+def median_progress(counts: Dict[int, int]) -> float:
+    """Exact median of a distribution given as {progress value: students}."""
+    total = sum(counts.values())
+    if not total:
+        return 0.0
+    middle = [(total - 1) // 2, total // 2]  # 0-based ranks of the middle value(s)
+    values, seen = [], 0
+    for progress in sorted(counts):
+        seen += counts[progress]
+        while middle and middle[0] < seen:
+            values.append(progress)
+            middle.pop(0)
+    return sum(values) / 2
+
+def histogram(counts: Dict[int, int]) -> List[int]:
+    """Students per progress bucket; 100 falls in the last bucket."""
+    buckets = [0] * HISTOGRAM_BUCKETS
+    width = 100 // HISTOGRAM_BUCKETS
+    for progress, students in counts.items():
+        buckets[min(max(progress, 0) // width, HISTOGRAM_BUCKETS - 1)] += students
+    return buckets
+
+def bucket_labels() -> List[str]:
+    width = 100 // HISTOGRAM_BUCKETS
+    return [f"{low}-{low + width - 1}" for low in range(0, 100 - width, width)] + [f"{100 - width}-100"]
+
+def lesson_totals(session, course_code: str) -> Dict[str, Dict]:
+    """{lesson_id: {'students', 'completed', 'progress_total'}} for every lesson with progress."""
+    table = LessonProgress.__table__
+    return {
+        lesson_id: {'students': students, 'completed': completed or 0, 'progress_total': progress_total or 0}
+        for lesson_id, students, completed, progress_total in session.execute(
+            select(
+                table.c.lesson_id, func.count(),
+                func.sum(case((table.c.completed, 1), else_=0)),
+                func.sum(func.coalesce(table.c.progress, 0))
+            ).where(table.c.course_code == course_code).group_by(table.c.lesson_id)
+        )
+    }
+
+def progress_distributions(session, course_code: str, lesson_ids: List[str]) -> Dict[str, Dict[int, int]]:
+    """{lesson_id: {progress value: students}} for these lessons."""
+    if not lesson_ids:
+        return {}
+    table = LessonProgress.__table__
+    progress = func.coalesce(table.c.progress, 0)
+    distributions: Dict[str, Dict[int, int]] = {}
+    for lesson_id, value, students in session.execute(
+        select(table.c.lesson_id, progress, func.count())
+        .where(table.c.course_code == course_code, table.c.lesson_id.in_(lesson_ids))
+        .group_by(table.c.lesson_id, progress)
+    ):
+        distributions.setdefault(lesson_id, {})[value] = students
+    return distributions
+
+def week_rollups(ordered: List[str], totals: Dict[str, Dict]) -> List[Dict]:
+    weeks: Dict = {}
+    for lesson_id in ordered:
+        week = weeks.setdefault(lesson_week(lesson_id), {'lessons': 0, 'started': 0, 'completed': 0, 'progress_total': 0})
+        week['lessons'] += 1
+        week['started'] += totals[lesson_id]['students']
+        week['completed'] += totals[lesson_id]['completed']
+        week['progress_total'] += totals[lesson_id]['progress_total']
+    return [
+        {
+            'week': week,
+            'lessons': counts['lessons'],
+            'started': counts['started'],
+            'completed': counts['completed'],
+            'completion_rate': rate(counts['completed'], counts['started']),
+            'average_progress': round(counts['progress_total'] / counts['started'], 2) if counts['started'] else 0.0
+        }
+        for week, counts in weeks.items()
+    ]
+
+def course_analytics(session, course_code: str, page: int = 1, per_page: int = DEFAULT_PER_PAGE) -> Dict:
+    """Completion statistics of a course: totals, week rollups and one page of lessons."""
+    table = LessonProgress.__table__
+    students = session.execute(
+        select(func.count(distinct(table.c.user_id))).where(table.c.course_code == course_code)
+    ).scalar()
+
+    totals = lesson_totals(session, course_code)
+    ordered = sorted(totals, key=lesson_sort_key)
+    start = (page - 1) * per_page
+    page_ids = ordered[start:start + per_page]
+    distributions = progress_distributions(session, course_code, page_ids)
+
+    lessons = []
+    for position, lesson_id in enumerate(page_ids, start=start):
+        lesson = totals[lesson_id]
+        previous = totals[ordered[position - 1]]['students'] if position else None
+        lessons.append({
+            'lesson_id': lesson_id,
+            'week': lesson_week(lesson_id),
+            'students': lesson['students'],
+            'completed': lesson['completed'],
+            'completion_rate': rate(lesson['completed'], lesson['students']),
+            'average_progress': round(lesson['progress_total'] / lesson['students'], 2) if lesson['students'] else 0.0,
+            'median_progress': median_progress(distributions.get(lesson_id, {})),
+            'histogram': histogram(distributions.get(lesson_id, {})),
+            'drop_off': round(1 - lesson['students'] / previous, 4) if previous else None
+        })
+
+    return {
+        'course_code': course_code,
+        'students': students,
+        'lessons_total': len(ordered),
+        'weeks': week_rollups(ordered, totals),
+        'lessons': lessons,
+        'histogram_buckets': bucket_labels(),
+        'page': page,
+        'per_page': per_page,
+        'pages': max((len(ordered) + per_page - 1) // per_page, 1),
+        'generated_at': datetime.utcnow().isoformat()
+    }
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""
+Course Pipeline
+
+Builds courses in-process as a DAG of stages:
+
+    download (per course) -> extract -> summarize -> videos (per week)
+
+Each task starts on a worker thread as soon as its dependencies finish, so one
+week's Claude call overlaps the next week's extraction and nothing pays for a
+fresh interpreter or re-imports cv2/numpy/pymupdf. Extract, summarize and
+video outputs are cached under pipeline_cache/, keyed by a hash of their
+inputs, so a re-run only redoes weeks whose PDFs or prompt changed. Every run
+writes a JSON report (per-task status, timing and structured errors) to
+pipeline_runs/.
+
+Downloads run one at a time with a pause of DOWNLOAD_INTERVAL seconds between
+courses, like the old per-course scripts, to stay polite to course websites.
+Up to 4 weeks are summarized by Claude at once (--summarize-concurrency 1
+keeps them serial).
+
+Usage:
+    python course_pipeline.py <COURSE_CODE> [COURSE_CODE ...] [--stages STAGES] [--workers N]
+                              [--download-interval SECONDS] [--summarize-concurrency N]
+
+Example:
+    python course_pipeline.py CS162 CS170 --stages extract,summarize
+    python course_pipeline.py CS61A CS61B --download-interval 10 --summarize-concurrency 1
+    python course_pipeline.py CS162 --stages videos --max-videos 5
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from lecture_pdf_extraction import PDFContentOrganizer, reference_style_system
+from llm_client import get_client, message_text
+from process_course_by_weeks import find_week_folders, study_guide_system, week_instruction, write_week_outputs
+
+STAGES = ("download", "extract", "summarize", "videos")
+
+# Tasks of a stage allowed to run at once. PyMuPDF is not thread-safe, so
+# extraction is serialized; downloads stay polite to course websites and video
+# searches share one YouTube quota.
+STAGE_LIMITS = {"download": 1, "extract": 1, "summarize": 4, "videos": 1}
+
+# Minimum seconds between one task of a stage finishing and the next starting
+DOWNLOAD_INTERVAL = 5.0
+STAGE_INTERVALS = {"download": DOWNLOAD_INTERVAL}
+
+# Bump when extraction output changes so cached extracts are not reused
+EXTRACT_CACHE_VERSION = 1
+
+class StageAborted(Exception):
+    """Raised by a task to skip every remaining task of its stage (e.g. API quota exhausted)."""
+
+class PipelineTask:
+    """One node of the pipeline DAG."""
+
+    def __init__(self, task_id: str, stage: str, run: Callable[["PipelineTask", List[Any]], Any],
+                 deps: Sequence[str] = (), course_code: Optional[str] = None, week_num: Optional[int] = None,
+                 expand: Optional[Callable[[Any], List["PipelineTask"]]] = None):
+        self.task_id = task_id
+        self.stage = stage
+        self.run = run  # run(task, dependency results) -> result
+        self.deps = list(deps)
+        self.course_code = course_code
+        self.week_num = week_num
+        self.expand = expand  # expand(result) -> tasks to add once this one succeeds
+
+        self.status = "pending"
+        self.cached = False
+        self.result = None
+        self.error = None
+        self.seconds = 0.0
+
+    def to_report(self) -> Dict[str, Any]:
+        return {
+            "id": self.task_id,
+            "stage": self.stage,
+            "course": self.course_code,
+            "week": self.week_num,
+            "status": self.status,
+            "seconds": round(self.seconds, 3),
+            "error": self.error
+        }
+
+class PipelineRunner:
+    """Runs PipelineTasks on a thread pool in dependency order."""
+
+    def __init__(self, max_workers: int = 4, stage_limits: Optional[Dict[str, int]] = None,
+                 stage_intervals: Optional[Dict[str, float]] = None):
+        self.max_workers = max_workers
+        self.stage_limits = dict(STAGE_LIMITS, **(stage_limits or {}))
+        self.stage_intervals = dict(STAGE_INTERVALS, **(stage_intervals or {}))
+        self.stage_last_active: Dict[str, float] = {}  # stage -> monotonic time a task last started or finished
+        self.tasks: Dict[str, PipelineTask] = {}
+        self.aborted_stages = set()
+
+    def add(self, task: PipelineTask):
+        self.tasks[task.task_id] = task
+
+    def run(self) -> Dict[str, Any]:
+        """Run every task (including ones added by expand) and return the run report."""
+        started_at = datetime.now()
+        start = time.perf_counter()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                delay = self._schedule(executor, running)
+                if not running:
+                    if delay is None:
+                        break
+                    time.sleep(delay)  # only tasks waiting out a stage interval are left
+                    continue
+                done, _ = wait(running, timeout=delay, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(running.pop(future), future)
+
+        return self._report(started_at, time.perf_counter() - start)
+
+    def _schedule(self, executor: ThreadPoolExecutor, running: Dict[Any, PipelineTask]) -> Optional[float]:
+        """Submit every pending task whose dependencies have succeeded.
+
+        Returns the seconds until a task held back by its stage interval may
+        start, or None when no task is waiting on one.
+        """
+        delay = None
+        now = time.monotonic()
+        active = {}
+        for task in running.values():
+            active[task.stage] = active.get(task.stage, 0) + 1
+
+        # Tasks are kept in insertion order and always come after their
+        # dependencies, so one pass propagates skips down the DAG
+        for task in self.tasks.values():
+            if task.status != "pending":
+                continue
+
+            deps = [self.tasks[dep] for dep in task.deps]
+            blocked = next((dep for dep in deps if dep.status in ("failed", "skipped")), None)
+            if blocked:
+                task.status = "skipped"
+                task.error = {"type": "DependencyFailed", "message": f"{blocked.task_id} {blocked.status}"}
+                continue
+            if task.stage in self.aborted_stages:
+                task.status = "skipped"
+                task.error = {"type": "StageAborted", "message": f"{task.stage} stage was aborted"}
+                continue
+            if any(dep.status not in ("ok", "cached") for dep in deps):
+                continue
+            if active.get(task.stage, 0) >= self.stage_limits.get(task.stage, self.max_workers):
+                continue
+            interval = self.stage_intervals.get(task.stage, 0)
+            last_active = self.stage_last_active.get(task.stage)
+            if interval and last_active is not None and now - last_active < interval:
+                wait_seconds = interval - (now - last_active)
+                delay = wait_seconds if delay is None else min(delay, wait_seconds)
+                continue
+
+            task.status = "running"
+            active[task.stage] = active.get(task.stage, 0) + 1
+            self.stage_last_active[task.stage] = now
+            future = executor.submit(self._run_task, task, [dep.result for dep in deps])
+            running[future] = task
+        return delay
+
+    def _run_task(self, task: PipelineTask, inputs: List[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return task.run(task, inputs)
+        finally:
+            task.seconds = time.perf_counter() - start
+
+    def _finish(self, task: PipelineTask, future):
+        self.stage_last_active[task.stage] = time.monotonic()
+        try:
+            task.result = future.result()
+        except Exception as e:
+            task.status = "failed"
+            task.error = {"type": type(e).__name__, "message": str(e)}
+            if isinstance(e, StageAborted):
+                self.aborted_stages.add(task.stage)
+            print(f"❌ {task.task_id}: {type(e).__name__}: {e}")
+            return
+
+        task.status = "cached" if task.cached else "ok"
+        print(f"{'♻️ ' if task.cached else '✅'} {task.task_id} ({task.seconds:.1f}s)")
+        if task.expand:
+            for child in task.expand(task.result):
+                self.add(child)
+
+    def _report(self, started_at: datetime, seconds: float) -> Dict[str, Any]:
+        stages = {}
+        for task in self.tasks.values():
+            summary = stages.setdefault(task.stage, {"ok": 0, "cached": 0, "failed": 0, "skipped": 0, "seconds": 0.0})
+            summary[task.status] = summary.get(task.status, 0) + 1
+            summary["seconds"] = round(summary["seconds"] + task.seconds, 3)
+
+        return {
+            "started_at": started_at.isoformat(),
+            "seconds": round(seconds, 3),
+            "workers": self.max_workers,
+            "stages": stages,
+            "failed": sum(1 for task in self.tasks.values() if task.status in ("failed", "skipped")),
+            "tasks": [task.to_report() for task in self.tasks.values()]
+        }
+
+class StageCache:
+    """File-backed cache of stage outputs keyed by a hash of their inputs."""
+
+    def __init__(self, directory: str = "pipeline_cache", enabled: bool = True):
+        self.directory = Path(directory)
+        self.enabled = enabled
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, stage: str, key: str) -> Optional[Any]:
+        path = self.directory / stage / f"{key}.json"
+        if not self.enabled or not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def put(self, stage: str, key: str, value: Any):
+        if not self.enabled:
+            return
+        stage_dir = self.directory / stage
+        stage_dir.mkdir(parents=True, exist_ok=True)
+
+        # Write then rename so a concurrent reader never sees a partial file
+        tmp_path = stage_dir / f"{key}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, stage_dir / f"{key}.json")
+
+class CoursePipeline:
+    """Plans the download -> extract -> summarize -> videos DAG for a set of courses."""
+
+    def __init__(self, root: str = "..", stages: Sequence[str] = STAGES, include_figures: bool = False,
+                 reference_pdf: Optional[str] = None, max_videos_per_week: int = 3,
+                 cache_dir: str = "pipeline_cache", use_cache: bool = True):
+        unknown = set(stages) - set(STAGES)
+        if unknown:
+            raise ValueError(f"Unknown pipeline stages: {', '.join(sorted(unknown))}")
+
+        self.root = Path(root)
+        self.stages = set(stages)
+        self.include_figures = include_figures
+        self.reference_pdf = reference_pdf
+        self.max_videos_per_week = max_videos_per_week
+        self.cache = StageCache(cache_dir, use_cache)
+
+        self._system = None
+        self._video_processor = None
+        self._video_lock = threading.Lock()
+
+    def plan(self, runner: PipelineRunner, course_codes: List[str]):
+        """Add the tasks for every course to runner."""
+        if "summarize" in self.stages:
+            # Built up front: it may read the reference PDF, and PyMuPDF must
+            # not run concurrently with the extract stage
+            self._system = self._build_system()
+
+        for course_code in course_codes:
+            course_code = course_code.upper()
+            if "download" in self.stages:
+                runner.add(PipelineTask(
+                    f"{course_code}/download", "download", self._download, course_code=course_code,
+                    expand=lambda _, course_code=course_code: self.week_tasks(course_code, [f"{course_code}/download"])
+                ))
+            else:
+                for task in self.week_tasks(course_code, []):
+                    runner.add(task)
+
+    def week_tasks(self, course_code: str, deps: List[str]) -> List[PipelineTask]:
+        """Build the per-week tasks of a course."""
+        tasks = []
+        course_dir = self.root / course_code
+        course_new_dir = self.root / f"{course_code}_New"
+
+        if "extract" in self.stages or "summarize" in self.stages:
+            weeks = find_week_folders(course_dir) if course_dir.exists() else []
+        else:
+            weeks = find_week_folders(course_new_dir) if course_new_dir.exists() else []
+
+        for week_num, week_folder in weeks:
+            prefix = f"{course_code}/W{week_num}"
+            week_deps = list(deps)
+
+            if "extract" in self.stages or "summarize" in self.stages:
+                if not any(week_folder.glob("*.pdf")):
+                    continue
+                tasks.append(PipelineTask(f"{prefix}/extract", "extract",
+                                          lambda task, inputs, week_folder=week_folder: self._extract(task, week_folder),
+                                          week_deps, course_code, week_num))
+                week_deps = [f"{prefix}/extract"]
+
+            if "summarize" in self.stages:
+                tasks.append(PipelineTask(f"{prefix}/summarize", "summarize", self._summarize,
+                                          week_deps, course_code, week_num))
+                week_deps = [f"{prefix}/summarize"]
+
+            if "videos" in self.stages:
+                tasks.append(PipelineTask(f"{prefix}/videos", "videos", self._videos,
+                                          week_deps, course_code, week_num))
+
+        return tasks
+
+    def _build_system(self) -> str:
+        if self.reference_pdf:
+            _, style_profile = PDFContentOrganizer().extract_structured_pdf(self.reference_pdf, 2)
+            return reference_style_system(style_profile)
+        return study_guide_system(self.include_figures)
+
+    def _download(self, task: PipelineTask, inputs: List[Any]) -> str:
+        # Imported here so runs without the download stage don't need the scraper's dependencies
+        from course_material_downloader import CourseMaterialDownloader
+
+        if not CourseMaterialDownloader(task.course_code).run():
+            raise RuntimeError(f"Failed to download materials for {task.course_code}")
+        return task.course_code
+
+    def _extract(self, task: PipelineTask, week_folder: Path) -> Dict[str, Any]:
+        pdf_files = sorted(week_folder.glob("*.pdf"))
+
+        def extract():
+            organizer = PDFContentOrganizer(include_figures=self.include_figures)
+            if not organizer.extract_pdfs(pdf_files, week_folder.name):
+                raise RuntimeError(f"No content extracted from {week_folder}")
+            return {"pdf_files": [str(p) for p in pdf_files], "content": organizer.extracted_content}
+
+        key = self.cache.key(EXTRACT_CACHE_VERSION, self.include_figures,
+                             [(p.name, p.stat().st_size, p.stat().st_mtime_ns) for p in pdf_files])
+        return self._cached("extract", key, extract, task)
+
+    def _summarize(self, task: PipelineTask, inputs: List[Any]) -> str:
+        extracted = inputs[0]
+        if self.reference_pdf:
+            instruction = "Below is the full content to convert into study notes:"
+        else:
+            instruction = week_instruction(task.course_code, task.week_num)
+
+        payload = {
+            "model": "claude-opus-4-1-20250805",
+            "max_tokens": 4000,
+            "system": self._system,
+            "messages": [{"role": "user", "content": [{"type": "text", "text": instruction}] + extracted["content"]}]
+        }
+        message = self._cached("summarize", self.cache.key(payload), lambda: get_client().create_message(**payload),
+                               task)
+
+        week_new_folder = self.root / f"{task.course_code}_New" / f"W{task.week_num}"
+        write_week_outputs(week_new_folder, task.course_code, task.week_num,
+                           [Path(p) for p in extracted["pdf_files"]], message_text(message))
+        return str(week_new_folder / "study_guide.md")
+
+    def _videos(self, task: PipelineTask, inputs: List[Any]) -> int:
+        # Only needed for this stage; importing app sets up the database
+        from app import app
+        from week_video_processor import WeekVideoProcessor
+
+        study_guide_path = self.root / f"{task.course_code}_New" / f"W{task.week_num}" / "study_guide.md"
+        if not study_guide_path.exists():
+            raise FileNotFoundError(f"Study guide not found: {study_guide_path}")
+
+        with self._video_lock:
+            if self._video_processor is None:
+                self._video_processor = WeekVideoProcessor()
+        processor = self._video_processor
+
+        key = self.cache.key(study_guide_path.read_text(encoding='utf-8'), self.max_videos_per_week)
+
+        def find_videos():
+            try:
+                return processor.find_videos_for_week(task.course_code, task.week_num, str(study_guide_path),
+                                                      self.max_videos_per_week)
+            except Exception as e:
+                error_msg = str(e).lower()
+                if 'quota' in error_msg or 'limit' in error_msg or 'exceeded' in error_msg:
+                    raise StageAborted(f"YouTube API quota exceeded at {task.task_id}") from e
+                raise
+
+        videos = self._cached("videos", key, find_videos, task)
+        if not videos:
+            raise RuntimeError(f"No videos found for week {task.week_num}")
+
+        with app.app_context():
+            if not processor.save_week_videos(task.course_code, task.week_num, videos):
+                raise RuntimeError(f"Failed to save videos for week {task.week_num}")
+        return len(videos)
+
+    def _cached(self, stage: str, key: str, compute: Callable[[], Any], task: Optional[PipelineTask] = None) -> Any:
+        value = self.cache.get(stage, key)
+        if value is not None:
+            if task is not None:
+                task.cached = True
+            return value
+        value = compute()
+        self.cache.put(stage, key, value)
+        return value
+
+def run_pipeline(course_codes: List[str], root: str = "..", stages: Sequence[str] = STAGES, workers: int = 4,
+                 include_figures: bool = False, reference_pdf: Optional[str] = None, max_videos_per_week: int = 3,
+                 use_cache: bool = True, report_dir: str = "pipeline_runs",
+                 download_interval: float = DOWNLOAD_INTERVAL,
+                 summarize_concurrency: int = STAGE_LIMITS["summarize"]) -> Dict[str, Any]:
+    """Run the pipeline for the given courses, write the run report and return it."""
+    pipeline = CoursePipeline(root, stages, include_figures, reference_pdf, max_videos_per_week,
+                              use_cache=use_cache)
+    runner = PipelineRunner(max_workers=workers, stage_limits={"summarize": max(summarize_concurrency, 1)},
+                            stage_intervals={"download": download_interval})
+    pipeline.plan(runner, course_codes)
+
+    print(f"🚀 Running {', '.join(s for s in STAGES if s in pipeline.stages)} for {', '.join(course_codes)}")
+    report = runner.run()
+    report["courses"] = list(course_codes)
+    report["root"] = str(root)
+
+    if "summarize" in pipeline.stages:
+        report["llm"] = get_client().summarize_metrics()
+
+    Path(report_dir).mkdir(exist_ok=True)
+    report_file = Path(report_dir) / f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    report["report_file"] = str(report_file)
+
+    print(f"\n📊 Pipeline finished in {report['seconds']:.1f}s")
+    for stage, summary in report["stages"].items():
+        print(f"  {stage:<10} {summary['ok']} ok, {summary['cached']} cached, "
+              f"{summary['failed']} failed, {summary['skipped']} skipped")
+    print(f"📝 Report saved to {report_file}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the course build pipeline in-process')
+    parser.add_argument('course_codes', nargs='+', help='Course codes (e.g., CS162 CS170)')
+    parser.add_argument('--root', default='..', help='Folder containing the course folders (default: ..)')
+    parser.add_argument('--stages', default='download,extract,summarize',
+                        help=f'Comma-separated stages to run, from {",".join(STAGES)} (default: download,extract,summarize)')
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads (default: 4)')
+    parser.add_argument('--include-figures', action='store_true',
+                        help='Attach deduplicated, size-capped lecture figures to the Claude request')
+    parser.add_argument('--reference-pdf', help='Match the style of this reference PDF instead of the default notes style')
+    parser.add_argument('--max-videos', type=int, default=3, help='Maximum videos per week (default: 3)')
+    parser.add_argument('--no-cache', action='store_true', help='Ignore and do not write the stage cache')
+    parser.add_argument('--download-interval', type=float, default=DOWNLOAD_INTERVAL,
+                        help=f'Seconds to wait between course downloads (default: {DOWNLOAD_INTERVAL:g})')
+    parser.add_argument('--summarize-concurrency', type=int, default=STAGE_LIMITS["summarize"],
+                        help=f'Claude summarize calls at once (default: {STAGE_LIMITS["summarize"]})')
+
+    args = parser.parse_args()
+
+    report = run_pipeline([c.upper() for c in args.course_codes], args.root,
+                          [s.strip() for s in args.stages.split(',') if s.strip()], args.workers,
+                          args.include_figures, args.reference_pdf, args.max_videos, not args.no_cache,
+                          download_interval=args.download_interval,
+                          summarize_concurrency=args.summarize_concurrency)
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
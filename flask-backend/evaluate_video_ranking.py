@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Evaluate Video Ranking
+
+Offline comparison of the BM25 video ranker (video_ranking.py) against the
+previous keyword-substring scorer, on recorded YouTube search results.
+
+--record runs the week's searches once (uses YouTube API quota) and saves the
+queries and candidate videos for every week of a course. Fill in each week's
+"relevant" map ({video_id: grade}, 1 = useful, 2 = ideal) by hand. After that
+the evaluation runs offline as often as needed. Weeks without labels count
+only toward scoring time.
+
+Usage:
+    python evaluate_video_ranking.py --record <COURSE_CODE> <COURSE_NEW_DIR> --out FILE
+    python evaluate_video_ranking.py FILE [FILE ...] [--k N] [--repeat N]
+
+Example:
+    python evaluate_video_ranking.py --record CS162 ../CS162_New --out video_recordings/CS162.json
+    python evaluate_video_ranking.py video_recordings/*.json --k 3
+"""
+
+import sys
+import json
+import math
+import time
+import argparse
+from pathlib import Path
+from statistics import mean
+from typing import Dict, List
+
+from video_ranking import VideoRanker, course_idf, EDUCATIONAL_CHANNEL_PRIOR
+
+EDUCATIONAL_CHANNELS = ['Khan Academy', '3Blue1Brown', 'MIT OpenCourseWare', 'Crash Course', 'Veritasium']
+
+def legacy_score(video: Dict, query: str) -> float:
+    """The keyword-substring scorer the ranker replaced, kept here as the baseline."""
+    title_lower = video['title'].lower()
+    desc_lower = video.get('description', '').lower()
+
+    score = 0
+    for keyword in query.lower().split():
+        # Title matches are worth more
+        if keyword in title_lower:
+            score += 3
+        if keyword in desc_lower:
+            score += 1
+
+    # General YouTube results got a slight boost over low-scoring channel results
+    if video.get('channel') not in EDUCATIONAL_CHANNELS:
+        score += 0.1
+    return score
+
+def legacy_rank(week: Dict) -> List[Dict]:
+    """Each candidate scored against the query that found it, as before."""
+    return sorted(week["candidates"], key=lambda v: legacy_score(v, v.get('query', ' '.join(week["queries"]))),
+                  reverse=True)
+
+def legacy_week_rank(week: Dict) -> List[Dict]:
+    """The legacy scorer doing the same work as the ranker: every candidate against every query."""
+    return sorted(week["candidates"], key=lambda v: sum(legacy_score(v, q) for q in week["queries"]), reverse=True)
+
+def bm25_rank(week: Dict, ranker: VideoRanker) -> List[Dict]:
+    return ranker.rank(week["queries"], [dict(v) for v in week["candidates"]], week["idf"])
+
+def ndcg_at_k(ranked: List[Dict], relevant: Dict[str, int], k: int) -> float:
+    dcg = sum(relevant.get(v['video_id'], 0) / math.log2(i + 2) for i, v in enumerate(ranked[:k]))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum(grade / math.log2(i + 2) for i, grade in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+def precision_at_k(ranked: List[Dict], relevant: Dict[str, int], k: int) -> float:
+    return sum(1 for v in ranked[:k] if relevant.get(v['video_id'], 0) > 0) / k
+
+def new_ranker() -> VideoRanker:
+    return VideoRanker(channel_priors={name: EDUCATIONAL_CHANNEL_PRIOR for name in EDUCATIONAL_CHANNELS})
+
+def time_per_week(rank, weeks: List[Dict], repeat: int) -> float:
+    """Average microseconds to score and order one week's candidates."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for week in weeks:
+            rank(week)
+    return (time.perf_counter() - start) / (repeat * len(weeks)) * 1e6
+
+def record(course_code: str, course_new_dir: str, out: str, max_videos: int) -> int:
+    """Run the live searches for every week and save them for labeling."""
+    from app import app
+    from week_video_processor import WeekVideoProcessor
+
+    processor = WeekVideoProcessor()
+    weeks = []
+    with app.app_context():
+        for guide in sorted(Path(course_new_dir).glob("W*/study_guide.md"), key=lambda p: int(p.parent.name[1:])):
+            queries, candidates = processor.collect_candidates(course_code, str(guide), max_videos)
+            weeks.append({
+                "course_code": course_code,
+                "week_number": int(guide.parent.name[1:]),
+                "course_dir": str(Path(course_new_dir).resolve()),
+                "queries": queries,
+                "candidates": candidates,
+                "relevant": {}
+            })
+            print(f"📼 W{weeks[-1]['week_number']}: {len(candidates)} candidates")
+
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w') as f:
+        json.dump({"weeks": weeks}, f, indent=2)
+    print(f"\nRecorded {len(weeks)} weeks to {out}; add relevance labels before evaluating")
+    return 0
+
+def evaluate(files: List[str], k: int, repeat: int) -> int:
+    weeks = []
+    for path in files:
+        with open(path, 'r') as f:
+            weeks.extend(w for w in json.load(f)["weeks"] if w["candidates"])
+    if not weeks:
+        print("❌ No recorded weeks with candidates")
+        return 1
+
+    # Course IDF is computed once per course, outside the timed scoring
+    for week in weeks:
+        week["idf"] = course_idf(week["course_dir"])
+
+    labeled = [w for w in weeks if w["relevant"]]
+    ranker = new_ranker()
+    print(f"{len(weeks)} weeks, {sum(len(w['candidates']) for w in weeks)} candidates, {len(labeled)} labeled\n")
+
+    if labeled:
+        print(f"{'':<10} {'NDCG@' + str(k):>8} {'P@' + str(k):>8}")
+        for name, rank in [("legacy", legacy_rank), ("bm25", lambda w: bm25_rank(w, ranker))]:
+            ndcg = mean(ndcg_at_k(rank(w), w["relevant"], k) for w in labeled)
+            precision = mean(precision_at_k(rank(w), w["relevant"], k) for w in labeled)
+            print(f"{name:<10} {ndcg:8.3f} {precision:8.3f}")
+        print()
+
+    # Cold = fresh ranker, so tokenization is included; warm = candidates already tokenized
+    # during the per-query searches, which is the case in find_videos_for_week
+    timings = [
+        ("legacy (own query)", time_per_week(legacy_rank, weeks, repeat)),
+        ("legacy (all queries)", time_per_week(legacy_week_rank, weeks, repeat)),
+        ("bm25 cold", time_per_week(lambda w: bm25_rank(w, new_ranker()), weeks, repeat)),
+        ("bm25 warm", time_per_week(lambda w: bm25_rank(w, ranker), weeks, repeat)),
+    ]
+    print("Scoring time per week:")
+    for name, us in timings:
+        print(f"    {name:<22} {us:8.1f} us")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate video ranking on recorded YouTube search results')
+    parser.add_argument('files', nargs='*', help='Recording files to evaluate')
+    parser.add_argument('--record', nargs=2, metavar=('COURSE_CODE', 'COURSE_NEW_DIR'),
+                        help='Record live search results for every week of a course')
+    parser.add_argument('--out', help='Where to save the recording (with --record)')
+    parser.add_argument('--max-videos', type=int, default=3, help='Videos per week to collect for (default: 3)')
+    parser.add_argument('--k', type=int, default=3, help='Cutoff for NDCG and precision (default: 3)')
+    parser.add_argument('--repeat', type=int, default=200, help='Timing repetitions (default: 200)')
+
+    args = parser.parse_args()
+
+    if args.record:
+        if not args.out:
+            parser.error('--record requires --out')
+        return record(args.record[0].upper(), args.record[1], args.out, args.max_videos)
+
+    if not args.files:
+        parser.print_help()
+        return 1
+
+    return evaluate(args.files, args.k, args.repeat)
+
+if __name__ == "__main__":
+    sys.exit(main())
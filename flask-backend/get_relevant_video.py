@@ -1,4 +1,5 @@
-from googleapiclient.discovery import build
+from youtube_client import get_youtube
+from video_ranking import VideoRanker, EDUCATIONAL_CHANNEL_PRIOR
 import random
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
@@ -6,7 +7,7 @@ import os
 
 class YouTubeEducationalSearch:
     def __init__(self, api_key):
-        self.youtube = build('youtube', 'v3', developerKey=api_key)
+        self.youtube = get_youtube(api_key)
         
         # Educational channels with their IDs
         self.educational_channels = {
@@ -16,6 +17,9 @@ class YouTubeEducationalSearch:
             'Crash Course': 'UCX6b17PVsYBQ0ip5gyeme-Q',
             'Veritasium': 'UCHnyfMqiRRG1u-2MsSQLbXA'
         }
+        self.ranker = VideoRanker(
+            channel_priors={name: EDUCATIONAL_CHANNEL_PRIOR for name in self.educational_channels}
+        )
     
     def search_channel(self, channel_id, query, max_results=3):
         """Search for videos in a specific channel"""
@@ -80,7 +84,6 @@ class YouTubeEducationalSearch:
     def search_all_channels(self, query, max_results_per_channel=2):
         """Search all educational channels for relevant videos"""
         all_results = []
-        query_keywords = query.lower().split()
         
         for channel_name, channel_id in self.educational_channels.items():
             videos = self.search_channel(channel_id, query, max_results_per_channel)
@@ -112,20 +115,17 @@ class YouTubeEducationalSearch:
                         'thumbnail': snippet['thumbnails']['medium']['url'],
                         'published_at': snippet['publishedAt'],
                         'duration': duration,
-                        'duration_seconds': duration_seconds,
-                        'relevance_score': self.calculate_relevance_score(snippet, query_keywords)
+                        'duration_seconds': duration_seconds
                     }
                     
                     all_results.append(result)
         
-        # Sort by relevance score
-        all_results.sort(key=lambda x: x['relevance_score'], reverse=True)
-        if not all_results or all_results[0]['relevance_score'] <= 1:
-            general_results = self.search_general_youtube(query, query_keywords, 3)
-            all_results.extend(general_results)
-        return all_results
+        # Fall back to general YouTube when no channel video matches the query well
+        if self.ranker.is_low_relevance([query], all_results):
+            all_results.extend(self.search_general_youtube(query, 3))
+        return self.ranker.rank([query], all_results)
     
-    def search_general_youtube(self, query, query_keywords, max_results=5):
+    def search_general_youtube(self, query, max_results=5):
         """Search general YouTube when educational channels have low relevance"""
         try:
             search_response = self.youtube.search().list(
@@ -165,8 +165,7 @@ class YouTubeEducationalSearch:
                         'thumbnail': snippet['thumbnails']['medium']['url'],
                         'published_at': snippet['publishedAt'],
                         'duration': duration,
-                        'duration_seconds': duration_seconds,
-                        'relevance_score': self.calculate_relevance_score(snippet, query_keywords) + 0.1  # Slight boost to prioritize over low-scoring edu results
+                        'duration_seconds': duration_seconds
                     }
                     
                     general_results.append(result)
@@ -182,21 +181,6 @@ class YouTubeEducationalSearch:
                 print(f"Error searching general YouTube: {e}")
                 return []
 
-    def calculate_relevance_score(self, snippet, query_keywords):
-        """Simple relevance scoring based on keyword matches"""
-        title_lower = snippet['title'].lower()
-        desc_lower = snippet['description'].lower()
-        
-        score = 0
-        for keyword in query_keywords:
-            # Title matches are worth more
-            if keyword in title_lower:
-                score += 3
-            if keyword in desc_lower:
-                score += 1
-        
-        return score
-    
     def get_top_video(self, query):
         """Get the single most relevant video"""
         results = self.search_all_channels(query, max_results_per_channel=2)
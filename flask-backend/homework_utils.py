@@ -2,45 +2,17 @@
 Homework processing utilities for generating structured learning exercises from PDF files
 """
 
-import anthropic
 import base64
 import json
 import re
-import os
+import time
 from datetime import datetime
+from llm_client import get_client, message_text
 
-def create_learning_exercises(pdf_path):
-    """Create structured exercises and notes for each problem part"""
-    # Initialize the Claude client
-    api_key = os.getenv('ANTHROPIC_API_KEY')
-    client = anthropic.Anthropic(api_key=api_key)
-    
-    # Read and encode the PDF
-    with open(pdf_path, "rb") as pdf_file:
-        pdf_data = pdf_file.read()
-        pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
-    
-    # Create the message with PDF attachment
-    message = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=4000,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "document",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "application/pdf",
-                            "data": pdf_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": """
-                        Prompt:
+PROBLEM_HEADER = re.compile(r'## Problem \d+:')
 
+# Fixed instructions, sent as the system prompt ahead of the homework PDF
+EXERCISES_INSTRUCTIONS = """
 Break down the following homework assignment (algorithms/CS domain) into structured learning materials. Emphasize the problem-solving process — identifying key information and asking guiding questions.
 
 Use this EXACT markdown format:
@@ -92,14 +64,93 @@ Every problem part must include both Key Information and exactly 3 Leading Quest
 Keep explanations concise and problem-solving–oriented.
 
 Do not provide final solutions unless explicitly required.
-                        """
+"""
+
+def build_exercises_request(pdf_path):
+    """Build the Claude request (fixed instructions, then the PDF attachment) for a homework PDF"""
+    # Read and encode the PDF
+    with open(pdf_path, "rb") as pdf_file:
+        pdf_data = pdf_file.read()
+        pdf_base64 = base64.b64encode(pdf_data).decode('utf-8')
+    
+    # Create the message with PDF attachment
+    return dict(
+        model="claude-sonnet-4-20250514",
+        max_tokens=4000,
+        system=EXERCISES_INSTRUCTIONS,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "application/pdf",
+                            "data": pdf_base64
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": "Here is the homework assignment."
                     }
                 ]
             }
         ]
     )
+
+def create_learning_exercises(pdf_path):
+    """Create structured exercises and notes for each problem part"""
+    client = get_client()
+    
+    message = client.create_message(**build_exercises_request(pdf_path))
+    print(f"Claude responded in {client.last_metrics['latency_seconds']:.2f}s")
     
-    return message.content[0].text
+    return message_text(message)
+
+def stream_learning_exercises(pdf_path, timing=None):
+    """
+    Stream exercises from Claude, yielding each parsed problem as soon as its
+    section is complete (i.e. when the next "## Problem N:" header arrives).
+    
+    Problems are parsed exactly as turn_exercises_into_json would parse the
+    full response. If a timing dict is passed, time_to_first_token and
+    total_seconds are recorded in it.
+    """
+    client = get_client()
+    timing = timing if timing is not None else {}
+    timing['time_to_first_token'] = None
+    
+    buffer = ""
+    scan_from = 0
+    section_start = None
+    problem_num = 0
+    
+    start = time.perf_counter()
+    with client.stream_message(**build_exercises_request(pdf_path)) as stream:
+        for text in stream.text_stream:
+            if timing['time_to_first_token'] is None:
+                timing['time_to_first_token'] = time.perf_counter() - start
+            buffer += text
+            
+            # Headers can straddle chunks, so rescan a little before the old end
+            for match in PROBLEM_HEADER.finditer(buffer, max(scan_from - 16, 0)):
+                if section_start is not None and match.start() < section_start:
+                    continue
+                if section_start is not None:
+                    problem_num += 1
+                    yield parse_problem_section(buffer[section_start:match.start()], problem_num)
+                section_start = match.end()
+            scan_from = len(buffer)
+    
+    if section_start is not None:
+        problem_num += 1
+        yield parse_problem_section(buffer[section_start:], problem_num)
+    
+    timing['total_seconds'] = time.perf_counter() - start
+    if timing['time_to_first_token'] is None:
+        timing['time_to_first_token'] = timing['total_seconds']
+    print(f"Time to first token: {timing['time_to_first_token']:.2f}s, total: {timing['total_seconds']:.2f}s")
 
 def turn_exercises_into_json(content):
     """Turn the exercises into a JSON object"""
@@ -246,3 +297,31 @@ def process_homework_pdf(pdf_path, filename):
     except Exception as e:
         print(f"Error processing homework PDF: {str(e)}")
         raise e
+
+def stream_homework_pdf(pdf_path, filename, timing=None):
+    """
+    Streaming counterpart of process_homework_pdf.
+    
+    Yields ("problem", problem_data) as each problem is parsed, then
+    ("done", json_data) with the same structure process_homework_pdf returns.
+    """
+    try:
+        print(f"Streaming homework PDF: {pdf_path}")
+        json_data = turn_exercises_into_json("")
+        
+        for problem_data in stream_learning_exercises(pdf_path, timing):
+            json_data["problems"].append(problem_data)
+            yield "problem", problem_data
+        
+        # Add metadata
+        json_data["metadata"] = {
+            "source_file": filename,
+            "uploaded_at": datetime.utcnow().isoformat(),
+            "total_problems": len(json_data["problems"])
+        }
+        
+        yield "done", json_data
+        
+    except Exception as e:
+        print(f"Error streaming homework PDF: {str(e)}")
+        raise e
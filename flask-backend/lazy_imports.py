@@ -0,0 +1,53 @@
+"""
+Deferred imports for heavy dependencies.
+
+Importing a name from this module costs nothing; the real module is imported
+the first time one of its attributes is used. The Flask app and the CLI
+scripts import these instead of the modules themselves, so a gunicorn worker
+or a short-lived script only pays for OpenCV, pdfplumber, the Google API
+client, etc. when a request or command actually needs them.
+
+Only attribute access is deferred: `from lazy_imports import cv2` works, but
+`from cv2 import imencode` would defeat the purpose.
+
+Track the effect with benchmark_import_time.py.
+"""
+
+import importlib
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self):
+        if self._module is None:
+            self.__dict__["_module"] = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        value = getattr(self._load(), attr)
+        # Cache on the proxy so later lookups skip __getattr__ entirely
+        self.__dict__[attr] = value
+        return value
+
+    def __repr__(self):
+        state = "loaded" if self._module is not None else "not loaded"
+        return f"<lazy module '{self._name}' ({state})>"
+
+# Third-party libraries
+cv2 = LazyModule("cv2")
+np = LazyModule("numpy")
+pdfplumber = LazyModule("pdfplumber")
+markdown = LazyModule("markdown")
+httplib2 = LazyModule("httplib2")
+youtube_discovery = LazyModule("googleapiclient.discovery")
+youtube_discovery_cache = LazyModule("googleapiclient.discovery_cache")
+
+# Backend modules that pull the libraries above (or requests) in at import time
+homework_utils = LazyModule("homework_utils")
+llm_client = LazyModule("llm_client")
+week_video_processor = LazyModule("week_video_processor")
+search_index = LazyModule("search_index")
@@ -1,36 +1,43 @@
+from __future__ import annotations
+
 import pymupdf
 import json
-from dotenv import load_dotenv
+import os
 import requests
 import base64
 from pathlib import Path
-from typing import List, Dict, Any, Tuple
-import cv2
-import numpy as np
-import os
-import tempfile
-import shutil
+from typing import List, Dict, Any, Tuple, Iterable, Union, Optional
+from lazy_imports import cv2, np
+from llm_client import ClaudeClient, get_client
 
 class PDFContentOrganizer:
     """Extract figures, text, and tables from PDF and format for Claude API."""
     
-    def __init__(self, output_dir: str = "claude_outputs"):
+    def __init__(self, output_dir: str = "claude_outputs", include_figures: bool = False):
         self.final_output_dir = Path(output_dir)
         self.final_output_dir.mkdir(exist_ok=True)
         self.extracted_content = []
+        self.last_call_timing = {}
         
         # Figure extraction settings
         self.zoom_factor = 2.0
         self.min_area = 1000
         self.padding = 20
-        
-        # Create temporary directory for processing
-        self.temp_dir = tempfile.mkdtemp()
-    
-    def __del__(self):
-        """Clean up temporary directory."""
-        if hasattr(self, 'temp_dir') and os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        self.detect_scale = 0.5  # downsample factor used for contour detection
+        
+        # Figure stage settings (only used when include_figures is set)
+        self.include_figures = include_figures
+        self.max_figure_bytes_per_week = 1_500_000
+        self.max_figures_per_week = 20
+        self.max_figure_side = 1024  # figures are downscaled to fit this many pixels
+        self.figure_quality = 80  # WebP quality
+        self.max_figure_page_fraction = 0.9  # skip crops that are really the whole slide
+        self.figure_hash_distance = 6  # max Hamming distance between duplicate dHashes
+        self._reset_figure_budget()
+        
+        # Table detection settings
+        self.table_gate = True  # only run find_tables() on pages with a ruled grid
+        self.table_edge_tolerance = 3.0  # points; matches find_tables' snap tolerance
     
     def extract_content(self, course_code: str) -> bool:
         """Extract content from all PDFs in a course folder and format for Claude API."""
@@ -47,6 +54,7 @@ class PDFContentOrganizer:
             return False
         
         all_message_content = []
+        all_figures = []
         
         for week_folder in week_folders:
             pdf_paths = sorted(week_folder.glob("*.pdf"))
@@ -55,44 +63,10 @@ class PDFContentOrganizer:
                 
             print(f"Processing {len(pdf_paths)} PDFs in {week_folder.name}")
             
+            self._reset_figure_budget()
             for pdf_path in pdf_paths:
-                try:
-                    doc = pymupdf.open(pdf_path)
-                    pdf_name = pdf_path.stem
-                    
-                    text_parts = [f"# PDF: {pdf_name} (Week {week_folder.name})\n\n"]
-                    
-                    for page_num in range(len(doc)):
-                        page = doc.load_page(page_num)
-                        
-                        # Extract text content
-                        page_content = f"\n## Page {page_num + 1}\n\n"
-                        text = page.get_text().strip()
-                        if text:
-                            page_content += f"### Text:\n{text}\n\n"
-                        
-                        # Extract tables
-                        tables = page.find_tables()
-                        if tables:
-                            page_content += "### Tables:\n"
-                            for i, table in enumerate(tables):
-                                try:
-                                    table_data = table.extract()
-                                    if table_data:
-                                        # Convert to markdown table
-                                        markdown_table = self._convert_to_markdown_table(table_data)
-                                        page_content += f"\n**Table {i+1}:**\n{markdown_table}\n\n"
-                                except Exception as e:
-                                    print(f"Error extracting table {i+1} from {pdf_name}: {e}")
-                        
-                        text_parts.append(page_content)
-                    
-                    doc.close()
-                    all_message_content.extend(text_parts)
-                    
-                except Exception as e:
-                    print(f"Error processing {pdf_path}: {e}")
-                    continue
+                all_message_content.extend(self._extract_pdf_parts(pdf_path, week_folder.name))
+            all_figures.extend(self._finish_figure_week(week_folder.name))
         
         if not all_message_content:
             print(f"No content extracted from {course_code}")
@@ -100,9 +74,77 @@ class PDFContentOrganizer:
         
         # Convert to the expected format for Claude API
         combined_text = "".join(all_message_content)
-        self.extracted_content = [{"type": "text", "text": combined_text}]
+        self.extracted_content = [{"type": "text", "text": combined_text}] + all_figures
         return True
     
+    def extract_pdfs(self, pdf_paths: Iterable[Union[str, Path]], week_label: str) -> bool:
+        """Extract content from an explicit list (or iterator) of PDF paths.
+        
+        PDFs are opened in place, one at a time, so callers that already know
+        which files belong to a week don't need to stage them in a folder first.
+        """
+        all_message_content = []
+        
+        self._reset_figure_budget()
+        for pdf_path in pdf_paths:
+            all_message_content.extend(self._extract_pdf_parts(Path(pdf_path), week_label))
+        figures = self._finish_figure_week(week_label)
+        
+        if not all_message_content:
+            print(f"No content extracted for {week_label}")
+            return False
+        
+        combined_text = "".join(all_message_content)
+        self.extracted_content = [{"type": "text", "text": combined_text}] + figures
+        return True
+    
+    def _extract_pdf_parts(self, pdf_path: Path, week_label: str) -> List[str]:
+        """Extract the text and tables of a single PDF as markdown parts."""
+        try:
+            doc = pymupdf.open(pdf_path)
+            pdf_name = pdf_path.stem
+            
+            text_parts = [f"# PDF: {pdf_name} (Week {week_label})\n\n"]
+            
+            for page_num in range(len(doc)):
+                page = doc.load_page(page_num)
+                
+                # Extract text content
+                page_content = f"\n## Page {page_num + 1}\n\n"
+                text = page.get_text().strip()
+                if text:
+                    page_content += f"### Text:\n{text}\n\n"
+                
+                # Extract tables
+                tables = page.find_tables() if self._page_may_have_tables(page) else []
+                if tables:
+                    page_content += "### Tables:\n"
+                    for i, table in enumerate(tables):
+                        try:
+                            table_data = table.extract()
+                            if table_data:
+                                # Convert to markdown table
+                                markdown_table = self._convert_to_markdown_table(table_data)
+                                page_content += f"\n**Table {i+1}:**\n{markdown_table}\n\n"
+                        except Exception as e:
+                            print(f"Error extracting table {i+1} from {pdf_name}: {e}")
+                
+                # Extract figures
+                if self.include_figures:
+                    try:
+                        self._collect_page_figures(page, pdf_name, page_num)
+                    except Exception as e:
+                        print(f"Error extracting figures from {pdf_name} page {page_num + 1}: {e}")
+                
+                text_parts.append(page_content)
+            
+            doc.close()
+            return text_parts
+            
+        except Exception as e:
+            print(f"Error processing {pdf_path}: {e}")
+            return []
+    
     def _convert_to_markdown_table(self, table_data):
         """Convert table data to markdown format."""
         if not table_data or not table_data[0]:
@@ -120,65 +162,214 @@ class PDFContentOrganizer:
         
         return "\n".join([header, separator] + rows)
     
-    def _extract_page_figures(self, page, pdf_name: str, page_num: int) -> List[Dict[str, Any]]:
-        """Extract figures from a page using contour detection."""
-        # Convert page to image
+    def _reset_figure_budget(self):
+        """Start a new week for the figure stage (dedup hashes and byte cap)."""
+        self._figure_blocks = []
+        self._figure_hashes = []
+        self._figure_bytes = 0
+        self._figure_count = 0
+        self._figures_skipped = {"duplicate": 0, "budget": 0}
+    
+    def _finish_figure_week(self, week_label: str) -> List[Dict[str, Any]]:
+        """Return the figure blocks collected for the current week."""
+        if self.include_figures:
+            print(f"Attached {self._figure_count} figures ({self._figure_bytes / 1024:.0f} KB) for {week_label}; "
+                  f"skipped {self._figures_skipped['duplicate']} duplicates, {self._figures_skipped['budget']} over budget")
+        return self._figure_blocks
+    
+    def _collect_page_figures(self, page, pdf_name: str, page_num: int):
+        """Add a page's figures to the current week, skipping repeats and respecting the byte cap."""
         matrix = pymupdf.Matrix(self.zoom_factor, self.zoom_factor)
-        pix = page.get_pixmap(matrix=matrix)
-        img_data = pix.tobytes("png")
-        
-        # Convert to OpenCV format
-        nparr = np.frombuffer(img_data, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        
-        # Auto-crop figures
-        cropped_figures = self._auto_crop_figures(img)
+        pix = page.get_pixmap(matrix=matrix, alpha=False)
+        img = self._pixmap_to_array(pix)
+        page_area = img.shape[0] * img.shape[1]
         
-        api_figures = []
-        for i, cropped in enumerate(cropped_figures):
-            # Convert directly to base64 for API (no permanent saving)
-            _, buffer = cv2.imencode('.png', cropped)
-            img_base64 = base64.b64encode(buffer).decode()
+        for cropped in self._auto_crop_figures(img, rgb=True):
+            if cropped.shape[0] * cropped.shape[1] > self.max_figure_page_fraction * page_area:
+                continue
+            
+            # Slide templates and logos repeat on every page; keep the first copy only
+            figure_hash = self._perceptual_hash(cropped)
+            if any((figure_hash ^ seen).bit_count() <= self.figure_hash_distance for seen in self._figure_hashes):
+                self._figures_skipped["duplicate"] += 1
+                continue
+            self._figure_hashes.append(figure_hash)
+            
+            if self._figure_count >= self.max_figures_per_week:
+                self._figures_skipped["budget"] += 1
+                continue
+            
+            data, media_type = self._encode_figure(cropped)
+            if self._figure_bytes + len(data) > self.max_figure_bytes_per_week:
+                self._figures_skipped["budget"] += 1
+                continue
+            self._figure_bytes += len(data)
+            self._figure_count += 1
             
-            api_figures.append({
+            self._figure_blocks.append({
+                "type": "text",
+                "text": f"Figure from {pdf_name}, page {page_num + 1}:"
+            })
+            self._figure_blocks.append({
                 "type": "image",
                 "source": {
                     "type": "base64",
-                    "media_type": "image/png",
-                    "data": img_base64
+                    "media_type": media_type,
+                    "data": base64.b64encode(data).decode()
                 }
             })
-        
-        return api_figures
     
-    def _auto_crop_figures(self, img: np.ndarray) -> List[np.ndarray]:
+    @staticmethod
+    def _perceptual_hash(img: np.ndarray) -> int:
+        """64-bit difference hash (dHash) of an RGB image."""
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        bits = np.packbits(small[:, 1:] > small[:, :-1])
+        return int.from_bytes(bits.tobytes(), "big")
+    
+    def _encode_figure(self, img: np.ndarray) -> Tuple[bytes, str]:
+        """Downscale an RGB figure and re-encode it as compact WebP."""
+        height, width = img.shape[:2]
+        scale = self.max_figure_side / max(height, width)
+        if scale < 1.0:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        bgr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+        _, buffer = cv2.imencode('.webp', bgr, [cv2.IMWRITE_WEBP_QUALITY, self.figure_quality])
+        return buffer.tobytes(), "image/webp"
+    
+    @staticmethod
+    def _pixmap_to_array(pix) -> np.ndarray:
+        """View a pixmap's samples as an (h, w, n) uint8 array without copying."""
+        buf = np.frombuffer(pix.samples_mv, dtype=np.uint8)
+        img = buf.reshape(pix.height, pix.stride)[:, :pix.width * pix.n]
+        return img.reshape(pix.height, pix.width, pix.n)
+    
+    def _auto_crop_figures(self, img: np.ndarray, rgb: bool = False) -> List[np.ndarray]:
         """Figure detection and cropping logic."""
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY if rgb else cv2.COLOR_BGR2GRAY)
+        
+        # Detect on a downsampled copy; boxes are scaled back to full size
+        scale = self.detect_scale
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
         
         # Threshold and find contours
         _, thresh = cv2.threshold(gray, 240, 255, cv2.THRESH_BINARY_INV)
         contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return []
+        
+        # Filter small noise (min_area is in full-resolution pixels)
+        areas = np.array([cv2.contourArea(c) for c in contours]) / (scale * scale)
+        keep = np.flatnonzero(areas > self.min_area)
+        if keep.size == 0:
+            return []
+        rects = np.array([cv2.boundingRect(contours[i]) for i in keep], dtype=np.float64) / scale
+        
+        # Add padding and ensure bounds are within image
+        height, width = img.shape[:2]
+        boxes = np.empty((len(rects), 4), dtype=np.int64)
+        boxes[:, 0] = np.maximum(0, np.floor(rects[:, 0]) - self.padding)
+        boxes[:, 1] = np.maximum(0, np.floor(rects[:, 1]) - self.padding)
+        boxes[:, 2] = np.minimum(width, np.ceil(rects[:, 0] + rects[:, 2]) + self.padding)
+        boxes[:, 3] = np.minimum(height, np.ceil(rects[:, 1] + rects[:, 3]) + self.padding)
+        
+        boxes = self._merge_overlapping_boxes(boxes)
+        
+        # Crops are views into the page image
+        return [img[y1:y2, x1:x2] for x1, y1, x2, y2 in boxes]
+    
+    @staticmethod
+    def _merge_overlapping_boxes(boxes: np.ndarray) -> np.ndarray:
+        """Merge nested/overlapping (x1, y1, x2, y2) boxes into their unions."""
+        while len(boxes) > 1:
+            x1, y1, x2, y2 = boxes.T
+            overlaps = ((x1[:, None] < x2[None, :]) & (x1[None, :] < x2[:, None]) &
+                        (y1[:, None] < y2[None, :]) & (y1[None, :] < y2[:, None]))
+            
+            # Connected components: propagate the smallest index through overlaps
+            labels = np.arange(len(boxes))
+            while True:
+                new_labels = np.where(overlaps, labels[None, :], len(boxes)).min(axis=1)
+                new_labels = new_labels[new_labels]
+                if np.array_equal(new_labels, labels):
+                    break
+                labels = new_labels
+            
+            groups, labels = np.unique(labels, return_inverse=True)
+            if len(groups) == len(boxes):
+                break
+            
+            merged = np.empty((len(groups), 4), dtype=boxes.dtype)
+            merged[:, :2] = np.iinfo(boxes.dtype).max
+            merged[:, 2:] = np.iinfo(boxes.dtype).min
+            np.minimum.at(merged[:, 0], labels, x1)
+            np.minimum.at(merged[:, 1], labels, y1)
+            np.maximum.at(merged[:, 2], labels, x2)
+            np.maximum.at(merged[:, 3], labels, y2)
+            # Unions can overlap boxes they didn't before, so go around again
+            boxes = merged
+        
+        return boxes
+    
+    def _page_may_have_tables(self, page) -> bool:
+        """Cheap pre-check for find_tables() based on the page's vector drawings.
         
-        figures = []
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > self.min_area:  # Filter small noise
-                x, y, w, h = cv2.boundingRect(contour)
-                
-                # Add padding and ensure bounds are within image
-                x = max(0, x - self.padding)
-                y = max(0, y - self.padding)
-                w = min(img.shape[1] - x, w + 2 * self.padding)
-                h = min(img.shape[0] - y, h + 2 * self.padding)
-                
-                cropped = img[y:y+h, x:x+w]
-                figures.append(cropped)
+        find_tables() only builds tables from ruled lines, so a page needs at
+        least two horizontal and two vertical edges that each cross two or more
+        edges of the other orientation (and five such edges in total, which
+        rules out a lone box) before full detection is worth running.
+        """
+        if not self.table_gate:
+            return True
+        
+        tol = self.table_edge_tolerance
+        page_width, page_height = page.rect.width, page.rect.height
+        horizontal, vertical = [], []
+        
+        def add_rect(x0, y0, x1, y1):
+            # Slide backgrounds and frames span the page and never form cells
+            if x1 - x0 >= 0.9 * page_width and y1 - y0 >= 0.9 * page_height:
+                return
+            if x1 - x0 >= tol:
+                horizontal.extend(((y0, x0, x1), (y1, x0, x1)))
+            if y1 - y0 >= tol:
+                vertical.extend(((x0, y0, y1), (x1, y0, y1)))
+        
+        for path in page.get_cdrawings():
+            for item in path["items"]:
+                kind = item[0]
+                if kind == "l":
+                    (x0, y0), (x1, y1) = item[1], item[2]
+                    if abs(y0 - y1) <= tol and abs(x1 - x0) >= tol:
+                        horizontal.append(((y0 + y1) / 2, min(x0, x1), max(x0, x1)))
+                    elif abs(x0 - x1) <= tol and abs(y1 - y0) >= tol:
+                        vertical.append(((x0 + x1) / 2, min(y0, y1), max(y0, y1)))
+                elif kind == "re":
+                    add_rect(*item[1])
+                elif kind == "qu":
+                    xs = [point[0] for point in item[1]]
+                    ys = [point[1] for point in item[1]]
+                    add_rect(min(xs), min(ys), max(xs), max(ys))
+        
+        if len(horizontal) < 2 or len(vertical) < 2:
+            return False
+        
+        h = np.array(horizontal)
+        v = np.array(vertical)
+        crosses = ((v[None, :, 0] >= h[:, None, 1] - tol) & (v[None, :, 0] <= h[:, None, 2] + tol) &
+                   (h[:, None, 0] >= v[None, :, 1] - tol) & (h[:, None, 0] <= v[None, :, 2] + tol))
         
-        return figures
+        rows = np.unique(np.round(h[crosses.sum(axis=1) >= 2, 0] / tol)).size
+        cols = np.unique(np.round(v[crosses.sum(axis=0) >= 2, 0] / tol)).size
+        return rows >= 2 and cols >= 2 and rows + cols >= 5
     
     def _extract_tables(self, page) -> List[str]:
         """Extract tables as markdown."""
         tables = []
+        if not self._page_may_have_tables(page):
+            return tables
         for table in page.find_tables():
             try:
                 markdown_table = table.to_markdown()
@@ -207,55 +398,39 @@ class PDFContentOrganizer:
         
         return "\n".join([header, separator] + rows)
     
-    def send_to_claude_and_save(self, instruction: str, model: str = "claude-opus-4-1-20250805") -> str:
-        """Send to Claude API and save only the final response."""
-        if not hasattr(self, 'extracted_content') or not self.extracted_content:
-            raise ValueError("No content extracted. Run extract_content() first.")
-        
-        # Load API key
-        load_dotenv()
-        api_key = os.getenv('ANTHROPIC_API_KEY')
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+    def send_to_claude_and_save(self, instruction: str, model: str = "claude-opus-4-1-20250805",
+                                stream_to: Optional[Union[str, Path]] = None,
+                                system: Optional[str] = None) -> str:
+        """Send to Claude API and save only the final response.
         
-        # Create message
-        message_content = [
-            {
-                "type": "text", 
-                "text": instruction
-            }
-        ] + self.extracted_content
-        
-        message = {
-            "role": "user",
-            "content": message_content
-        }
+        If stream_to is given, the response is streamed and its text is written
+        to that file as it arrives, so the study guide fills in while Claude is
+        still generating it.
         
-        payload = {
-            "model": model,
-            "max_tokens": 4000,
-            "messages": [message]
-        }
+        Fixed instructions that are identical across calls belong in system;
+        instruction is sent with the extracted content.
+        """
+        payload = self.build_claude_request(instruction, model, system)
+        client = get_client()
         
-        headers = {
-            "Content-Type": "application/json",
-            "x-api-key": api_key,
-            "anthropic-version": "2023-06-01"
-        }
+        timestamp = __import__('datetime').datetime.now().strftime("%Y%m%d_%H%M%S")
         
         try:
             # Send request to Claude
-            response = requests.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload
-            )
-            response.raise_for_status()
+            if stream_to:
+                response_data = self._stream_claude_response(client, payload, Path(stream_to))
+            else:
+                response_data = client.create_message(**payload)
             
-            response_data = response.json()
+            metrics = client.last_metrics
+            self.last_call_timing = {
+                "time_to_first_token": metrics["time_to_first_token"],
+                "total_seconds": metrics["latency_seconds"]
+            }
+            print(f"⏱️  Time to first token: {self.last_call_timing['time_to_first_token']:.2f}s, "
+                  f"total: {self.last_call_timing['total_seconds']:.2f}s")
             
             # Save only the Claude output
-            timestamp = __import__('datetime').datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"claude_output_{timestamp}.json"
             filepath = self.final_output_dir / filename
             
@@ -276,6 +451,60 @@ class PDFContentOrganizer:
             print(f"Error saved to: {filepath}")
             return str(filepath)
     
+    def build_claude_request(self, instruction: str, model: str = "claude-opus-4-1-20250805",
+                             system: Optional[str] = None) -> Dict[str, Any]:
+        """Build the Messages API request for the extracted content (see send_to_claude_and_save)."""
+        if not hasattr(self, 'extracted_content') or not self.extracted_content:
+            raise ValueError("No content extracted. Run extract_content() first.")
+        
+        # Create message
+        message_content = [
+            {
+                "type": "text", 
+                "text": instruction
+            }
+        ] + self.extracted_content
+        
+        message = {
+            "role": "user",
+            "content": message_content
+        }
+        
+        payload = {
+            "model": model,
+            "max_tokens": 4000,
+            "messages": [message]
+        }
+        if system:
+            payload["system"] = system
+        return payload
+    
+    def _stream_claude_response(self, client: ClaudeClient, payload: Dict[str, Any],
+                                stream_to: Path) -> Dict[str, Any]:
+        """Stream a Messages API response, writing text to stream_to as it arrives.
+        
+        Text goes to <stream_to>.partial, which replaces stream_to only once the
+        stream completes; if it fails, an existing stream_to is left untouched.
+        Returns the same message dict a non-streaming call would have returned.
+        """
+        first_output = True
+        partial = stream_to.with_name(stream_to.name + ".partial")
+        
+        try:
+            with client.stream_message(**payload) as stream, open(partial, 'w', encoding='utf-8') as out:
+                for text in stream.text_stream:
+                    if first_output:
+                        print(f"First output arrived, streaming to {partial}")
+                        first_output = False
+                    out.write(text)
+                    out.flush()
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        
+        os.replace(partial, stream_to)
+        return stream.message
+    
     def get_extraction_summary(self) -> Dict[str, Any]:
         """Get summary of what was extracted."""
         if not self.extracted_content:
@@ -352,6 +581,24 @@ class PDFContentOrganizer:
 
         return pdf_text, style_profile
 
+def reference_style_system(style_profile: Dict[str, Any]) -> str:
+    """The study-guide instructions for matching a reference PDF's style profile."""
+    return f"""
+            You are an expert educational content assistant. I will provide content extracted from a PDF along with a reference style profile.
+
+            Your task: Create **study notes that cover all of the input content**, in the **exact same style, structure, and tone** as the reference PDF.
+
+            Important:
+            - Read the **entire content** carefully; do not omit any lesson or section.
+            - If the content has multiple lessons or topics, create headings/subsections for each.
+            - Replicate the formatting, bulleting, tables, and key points **exactly as in the reference style**.
+
+            Reference Style Profile:
+            - Example headings: {style_profile['example_headings']}
+            - Uses bullet points: {style_profile['uses_bullets']}
+            - Uses tables: {style_profile['uses_tables']}
+        """
+
 def generate_study_guide_from_pdf(pdf_folder: str, reference_path: str = None) -> Dict[str, Any]:
     """
     Function to convert PDF to Khan Academy-style study guide.
@@ -376,26 +623,13 @@ def generate_study_guide_from_pdf(pdf_folder: str, reference_path: str = None) -
             reference_path = "reference.pdf"
         reference_content, style_profile = organizer.extract_structured_pdf(reference_path, 2)
 
-        # Send to Claude and get the output file path
-        instruction = f"""
-            You are an expert educational content assistant. I will provide content extracted from a PDF along with a reference style profile.
-
-            Your task: Create **study notes that cover all of the input content**, in the **exact same style, structure, and tone** as the reference PDF.
-
-            Important:
-            - Read the **entire content** carefully; do not omit any lesson or section.
-            - If the content has multiple lessons or topics, create headings/subsections for each.
-            - Replicate the formatting, bulleting, tables, and key points **exactly as in the reference style**.
-
-            Reference Style Profile:
-            - Example headings: {style_profile['example_headings']}
-            - Uses bullet points: {style_profile['uses_bullets']}
-            - Uses tables: {style_profile['uses_tables']}
-
-            Below is the full content to convert into study notes:
-        """
+        # The style instructions are the same for every week built against this
+        # reference, so they go in the system prompt
+        system = reference_style_system(style_profile)
+        instruction = "Below is the full content to convert into study notes:"
         
-        output_file = organizer.send_to_claude_and_save(instruction)
+        # Send to Claude and get the output file path
+        output_file = organizer.send_to_claude_and_save(instruction, system=system)
         
         # Read the Claude response
         with open(output_file, 'r', encoding='utf-8') as f:
@@ -0,0 +1,199 @@
+"""
+Lesson Progress - batched upserts of LessonProgress rows.
+
+A student scrolling through a week reports progress for many lessons. Instead
+of a SELECT and a commit per lesson, a batch is applied as one
+INSERT ... ON CONFLICT (user_id, course_code, lesson_id) DO UPDATE per
+UPSERT_BATCH_ROWS rows, in a single transaction.
+
+Progress is monotonic, so concurrent or out-of-order requests can't lose
+updates: the database keeps the larger progress, a lesson stays completed
+once completed, and completed_at keeps the first completion time. Duplicate
+lessons within a batch are merged the same way before they are sent.
+
+progress_buffer.py reuses upsert_lesson_rows() for its write-behind flushes,
+which also carry single-lesson updates. Those overwrite (OVERWRITE mode) so a
+student can still mark a lesson incomplete.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from models import LessonProgress, db
+from progress_summary import mark_stale
+
+# Dialects with INSERT ... ON CONFLICT, for bulk upserts
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+# 8 columns per row; stays under SQLite's default limit of 999 bound parameters
+UPSERT_BATCH_ROWS = 100
+
+MAX_BATCH_UPDATES = 500
+
+# How a row is combined with the stored one
+MONOTONIC = 'monotonic'  # batch updates: progress only moves forward
+OVERWRITE = 'overwrite'  # single-lesson updates: the new values replace the stored ones
+
+def check_lesson_keys(course_code: str, lesson_ids: Iterable[str]):
+    """Raise ValueError (a 400) when the course code or a lesson id doesn't fit its column."""
+    columns = LessonProgress.__table__.c
+    for name, value, column in [('course_code', course_code, columns.course_code),
+                                *(('lesson_id', lesson_id, columns.lesson_id) for lesson_id in lesson_ids)]:
+        if len(value) > column.type.length:
+            raise ValueError(f'{name} must be at most {column.type.length} characters')
+
+def parse_progress_updates(updates, course_code: str) -> List[Dict]:
+    """Validate a request's updates: [{'lesson_id', 'progress' (0-100), 'completed'}, ...].
+
+    Raises ValueError with a message fit for a 400 response.
+    """
+    if not isinstance(updates, list) or not updates:
+        raise ValueError('updates must be a non-empty list')
+    if len(updates) > MAX_BATCH_UPDATES:
+        raise ValueError(f'At most {MAX_BATCH_UPDATES} updates per request')
+
+    parsed = []
+    for update in updates:
+        if not isinstance(update, dict) or not update.get('lesson_id'):
+            raise ValueError('Every update needs a lesson_id')
+        progress = update.get('progress', 0)
+        if isinstance(progress, bool) or not isinstance(progress, (int, float)):
+            raise ValueError(f"progress must be a number (lesson {update['lesson_id']})")
+        parsed.append({
+            'lesson_id': str(update['lesson_id']),
+            'progress': min(max(int(progress), 0), 100),
+            'completed': bool(update.get('completed', False))
+        })
+    check_lesson_keys(course_code, (update['lesson_id'] for update in parsed))
+    return parsed
+
+def merge_updates(user_id: int, course_code: str, updates: Iterable[Dict]) -> List[Dict]:
+    """One row per lesson: the largest progress, completed if any update completed it."""
+    now = datetime.utcnow()
+    rows: Dict[str, Dict] = {}
+    for update in updates:
+        row = rows.get(update['lesson_id'])
+        if row is None:
+            rows[update['lesson_id']] = {
+                'user_id': user_id,
+                'course_code': course_code,
+                'lesson_id': update['lesson_id'],
+                'progress': update['progress'],
+                'completed': update['completed'],
+                'completed_at': now if update['completed'] else None,
+                'created_at': now,
+                'updated_at': now
+            }
+        else:
+            row['progress'] = max(row['progress'], update['progress'])
+            if update['completed'] and not row['completed']:
+                row['completed'], row['completed_at'] = True, now
+    return list(rows.values())
+
+def monotonic_set(statement) -> Dict:
+    """ON CONFLICT DO UPDATE assignments that never move progress backwards."""
+    table, excluded = LessonProgress.__table__, statement.excluded
+    return {
+        'progress': case(
+            (excluded.progress > func.coalesce(table.c.progress, 0), excluded.progress), else_=table.c.progress
+        ),
+        'completed': or_(func.coalesce(table.c.completed, False), excluded.completed),
+        'completed_at': func.coalesce(table.c.completed_at, excluded.completed_at),
+        'updated_at': excluded.updated_at
+    }
+
+def overwrite_set(statement) -> Dict:
+    """ON CONFLICT DO UPDATE assignments of the single-lesson endpoint: completing stamps completed_at."""
+    table, excluded = LessonProgress.__table__, statement.excluded
+    return {
+        'progress': excluded.progress,
+        'completed': excluded.completed,
+        'completed_at': case((excluded.completed, excluded.completed_at), else_=table.c.completed_at),
+        'updated_at': excluded.updated_at
+    }
+
+UPDATE_SETS = {MONOTONIC: monotonic_set, OVERWRITE: overwrite_set}
+
+def upsert_lesson_rows(rows: List[Dict], mode: str = MONOTONIC):
+    """Upsert full LessonProgress rows, of any users and courses, in the current transaction."""
+    mark_stale(db.session, {(row['user_id'], row['course_code']) for row in rows})
+    insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+    if insert is None:
+        _apply_with_row_locks(rows, mode)
+        return
+
+    table = LessonProgress.__table__
+    for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+        statement = insert(table).values(rows[start:start + UPSERT_BATCH_ROWS])
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'course_code', 'lesson_id'],
+            set_=UPDATE_SETS[mode](statement)
+        )
+        db.session.execute(statement)
+
+def apply_progress_updates(user_id: int, course_code: str, updates: Iterable[Dict]) -> Dict[str, Dict]:
+    """Upsert a batch of lesson progress in one transaction; returns the stored progress per lesson id."""
+    rows = merge_updates(user_id, course_code, updates)
+    try:
+        upsert_lesson_rows(rows)
+        stored = _stored_progress(user_id, course_code, [row['lesson_id'] for row in rows])
+        db.session.commit()
+        return stored
+
+    except Exception:
+        db.session.rollback()
+        raise
+
+def _apply_with_row_locks(rows: List[Dict], mode: str):
+    """Same merge for databases without ON CONFLICT: lock the existing rows, then update or insert."""
+    by_course: Dict[tuple, List[Dict]] = {}
+    for row in rows:
+        by_course.setdefault((row['user_id'], row['course_code']), []).append(row)
+
+    for (user_id, course_code), course_rows in by_course.items():
+        existing = {
+            record.lesson_id: record
+            for record in LessonProgress.query.filter(
+                LessonProgress.user_id == user_id,
+                LessonProgress.course_code == course_code,
+                LessonProgress.lesson_id.in_([row['lesson_id'] for row in course_rows])
+            ).with_for_update()
+        }
+        for row in course_rows:
+            record = existing.get(row['lesson_id'])
+            if record is None:
+                db.session.add(LessonProgress(**row))
+            elif mode == OVERWRITE:
+                record.progress = row['progress']
+                record.completed = row['completed']
+                if row['completed']:
+                    record.completed_at = row['completed_at']
+                record.updated_at = row['updated_at']
+            else:
+                record.progress = max(record.progress or 0, row['progress'])
+                record.completed = bool(record.completed) or row['completed']
+                record.completed_at = record.completed_at or row['completed_at']
+                record.updated_at = row['updated_at']
+    db.session.flush()
+
+def _stored_progress(user_id: int, course_code: str, lesson_ids: List[str]) -> Dict[str, Dict]:
+    """The progress now stored for these lessons, keyed by lesson id (same shape as GET .../progress)."""
+    table = LessonProgress.__table__
+    stored = {}
+    for start in range(0, len(lesson_ids), UPSERT_BATCH_ROWS):
+        for lesson_id, progress, completed, completed_at in db.session.execute(
+            select(table.c.lesson_id, table.c.progress, table.c.completed, table.c.completed_at).where(
+                table.c.user_id == user_id,
+                table.c.course_code == course_code,
+                table.c.lesson_id.in_(lesson_ids[start:start + UPSERT_BATCH_ROWS])
+            )
+        ):
+            stored[lesson_id] = {
+                'completed': completed,
+                'progress': progress,
+                'completed_at': completed_at.isoformat() if completed_at else None
+            }
+    return stored
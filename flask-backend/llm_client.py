@@ -0,0 +1,383 @@
+"""
+Shared Claude API client.
+
+Every module that talks to Claude goes through one process-wide client so
+calls share a pooled keep-alive HTTP session, the same retry/backoff and
+timeout policy, a concurrency limit, and per-call metrics (latency, time to
+first token, input/output and prompt-cache tokens).
+
+Set ANTHROPIC_BASE_URL to point the client at a local stub
+(see stub_llm_server.py) for tests and benchmarks.
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import threading
+import uuid
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+ANTHROPIC_VERSION = "2023-06-01"
+
+# Statuses worth retrying: rate limits, transient server errors, overload
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504, 529}
+# Statuses that mean the request was rejected without taking effect; the only
+# ones retried for requests that must not run twice (batch creation)
+REJECTED_STATUSES = {429}
+
+class LLMError(requests.exceptions.RequestException):
+    """A Claude API call failed after retries (status_code is None for transport errors)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, body: str = ""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+class MessageStream:
+    """
+    A streaming Messages API response.
+
+    Iterate text_stream for text deltas as they arrive; once it is exhausted,
+    message holds the same dict a non-streaming call would have returned.
+    """
+
+    def __init__(self, client: "ClaudeClient", payload: Dict[str, Any], timeout):
+        self._client = client
+        self._payload = payload
+        self._timeout = timeout
+        self._response = None
+        self._retries = 0
+        self._start = None
+        self.message: Dict[str, Any] = {}
+        self.metrics: Dict[str, Any] = {}
+
+    def __enter__(self) -> "MessageStream":
+        self._client._slots.acquire()
+        try:
+            self._start = time.perf_counter()
+            self._response, self._retries = self._client._request("POST", "/v1/messages", self._payload,
+                                                                          self._timeout, stream=True)
+        except Exception:
+            self._client._slots.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._response is not None:
+                self._response.close()
+        finally:
+            self._client._slots.release()
+        return False
+
+    @property
+    def text_stream(self) -> Iterator[str]:
+        time_to_first_token = None
+        text_parts = []
+
+        for line in self._response.iter_lines():
+            # Server-sent events: only the "data:" lines carry JSON
+            if not line.startswith(b"data:"):
+                continue
+            event = json.loads(line[5:])
+            event_type = event.get("type")
+
+            if event_type == "message_start":
+                self.message = event["message"]
+            elif event_type == "content_block_delta" and event["delta"].get("type") == "text_delta":
+                if time_to_first_token is None:
+                    time_to_first_token = time.perf_counter() - self._start
+                text_parts.append(event["delta"]["text"])
+                yield event["delta"]["text"]
+            elif event_type == "message_delta":
+                self.message["stop_reason"] = event["delta"].get("stop_reason")
+                self.message.setdefault("usage", {}).update(event.get("usage", {}))
+            elif event_type == "error":
+                raise LLMError(event["error"].get("message", "Streaming error"))
+
+        self.message["content"] = [{"type": "text", "text": "".join(text_parts)}]
+        self.metrics = self._client._record(self._payload, self.message, self._start,
+                                            time_to_first_token, self._retries)
+
+    def get_final_message(self) -> Dict[str, Any]:
+        """Drain the stream (if needed) and return the assembled message."""
+        if "content" not in self.message:
+            for _ in self.text_stream:
+                pass
+        return self.message
+
+class ClaudeClient:
+    """Pooled, rate-limited Claude Messages API client."""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 max_concurrency: int = 4, max_retries: int = 3,
+                 timeout: Tuple[float, float] = (10.0, 600.0), pool_size: int = 10):
+        if api_key is None:
+            load_dotenv()
+            api_key = os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
+            raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+
+        self.base_url = (base_url or os.getenv('ANTHROPIC_BASE_URL') or DEFAULT_BASE_URL).rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = timeout
+
+        # One keep-alive session; connections are reused across calls and threads
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "x-api-key": api_key,
+            "anthropic-version": ANTHROPIC_VERSION
+        })
+
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self.metrics = deque(maxlen=1000)
+        self._local = threading.local()
+
+    def create_message(self, timeout=None, **payload) -> Dict[str, Any]:
+        """Send a Messages API request and return the response JSON."""
+        with self._slots:
+            start = time.perf_counter()
+            response, retries = self._request("POST", "/v1/messages", payload, timeout)
+            message = response.json()
+        self._record(payload, message, start, None, retries)
+        return message
+
+    def stream_message(self, timeout=None, **payload) -> MessageStream:
+        """Start a streaming Messages API request; use as a context manager."""
+        return MessageStream(self, dict(payload, stream=True), timeout)
+
+    @property
+    def last_metrics(self) -> Dict[str, Any]:
+        """Metrics of the most recent call made from the current thread."""
+        return getattr(self._local, "metrics", {})
+
+    def summarize_metrics(self) -> Dict[str, Any]:
+        """Aggregate the recorded per-call metrics."""
+        calls = list(self.metrics)
+        if not calls:
+            return {"calls": 0}
+        latencies = sorted(call["latency_seconds"] for call in calls)
+        return {
+            "calls": len(calls),
+            "input_tokens": sum(call["input_tokens"] for call in calls),
+            "output_tokens": sum(call["output_tokens"] for call in calls),
+            "cache_write_tokens": sum(call["cache_write_tokens"] for call in calls),
+            "cache_read_tokens": sum(call["cache_read_tokens"] for call in calls),
+            "mean_latency_seconds": sum(latencies) / len(latencies),
+            "p95_latency_seconds": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+            "retries": sum(call["retries"] for call in calls)
+        }
+
+    def _request(self, method: str, path: str, payload: Optional[Dict[str, Any]] = None, timeout=None,
+                 stream: bool = False, idempotent: bool = True) -> Tuple[requests.Response, int]:
+        """Call the API, retrying transient failures with backoff. Returns (response, retries).
+
+        A non-idempotent request is only retried when the API explicitly rejected
+        it: after a timeout or a 5xx it may have taken effect, so it is not resent.
+        """
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        retry_statuses = RETRY_STATUSES if idempotent else REJECTED_STATUSES
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                response = self.session.request(method, url, json=payload, timeout=timeout or self.timeout,
+                                                stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt == self.max_retries or not idempotent:
+                    raise LLMError(f"Claude API request failed: {e}") from e
+            else:
+                if response.ok:
+                    return response, attempt
+                body = response.text
+                response.close()
+                if response.status_code not in retry_statuses or attempt == self.max_retries:
+                    raise LLMError(f"Claude API error {response.status_code}: {body}",
+                                   status_code=response.status_code, body=body)
+                retry_after = response.headers.get("retry-after")
+
+            delay = min(30.0, 0.5 * 2 ** attempt + random.uniform(0, 0.25))
+            if retry_after:
+                try:
+                    delay = min(30.0, float(retry_after))
+                except ValueError:
+                    pass
+            logger.warning(f"Claude API call failed (attempt {attempt + 1}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _record(self, payload: Dict[str, Any], message: Dict[str, Any], start: float,
+                time_to_first_token: Optional[float], retries: int) -> Dict[str, Any]:
+        """Record metrics for a finished call."""
+        latency = time.perf_counter() - start
+        usage = message.get("usage", {})
+        metrics = {
+            "model": payload.get("model"),
+            "stream": bool(payload.get("stream")),
+            "latency_seconds": latency,
+            "time_to_first_token": time_to_first_token if time_to_first_token is not None else latency,
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "cache_write_tokens": usage.get("cache_creation_input_tokens") or 0,
+            "cache_read_tokens": usage.get("cache_read_input_tokens") or 0,
+            "retries": retries
+        }
+        self.metrics.append(metrics)
+        self._local.metrics = metrics
+        logger.info(f"Claude call: {latency:.2f}s (first token {metrics['time_to_first_token']:.2f}s), "
+                    f"{metrics['input_tokens']} in / {metrics['output_tokens']} out tokens, "
+                    f"cache {metrics['cache_read_tokens']} read / {metrics['cache_write_tokens']} written")
+        return metrics
+
+class MessageBatches:
+    """
+    Message Batches API: submit many Messages requests at once and collect
+    the results later (usually well within the 24 hour window) at a lower
+    per-token price.
+
+    Each request is {"custom_id": ..., "params": <create_message kwargs>};
+    each result is {"custom_id": ..., "result": {"type": "succeeded",
+    "message": ...}} or a result of type errored/canceled/expired.
+    """
+
+    def __init__(self, client: Optional[ClaudeClient] = None):
+        self.client = client or get_client()
+
+    def submit(self, batch_requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create a batch and return its status.
+
+        Not retried after a timeout or server error: the batch may already have
+        been accepted, and resubmitting it would run (and bill) every request twice.
+        """
+        response, _ = self.client._request("POST", "/v1/messages/batches", {"requests": batch_requests},
+                                           idempotent=False)
+        return response.json()
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        """Return the current status of a batch."""
+        response, _ = self.client._request("GET", f"/v1/messages/batches/{batch_id}")
+        return response.json()
+
+    def results(self, batch: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """Yield the results of an ended batch."""
+        response, _ = self.client._request("GET", batch["results_url"], stream=True)
+        with response:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def wait(self, batch_id: str, poll_interval: float = 60.0) -> Dict[str, Any]:
+        """Poll until the batch has ended and return its final status."""
+        while True:
+            batch = self.retrieve(batch_id)
+            counts = batch.get("request_counts", {})
+            print(f"⏳ Batch {batch_id}: {batch['processing_status']} "
+                  f"({counts.get('succeeded', 0)} succeeded, {counts.get('errored', 0)} errored, "
+                  f"{counts.get('processing', 0)} processing)")
+            if batch["processing_status"] == "ended":
+                return batch
+            time.sleep(poll_interval)
+
+class FileMessageBatches(MessageBatches):
+    """
+    File-backed stand-in for the Message Batches API.
+
+    Batches live under directory/<batch_id>/ as requests.jsonl and
+    results.jsonl. Each retrieve() processes up to requests_per_poll pending
+    requests through the regular client, so a batch completes over several
+    polls like a real one. Pair it with stub_llm_server.py for offline runs.
+    """
+
+    def __init__(self, directory: Union[str, Path], client: Optional[ClaudeClient] = None,
+                 requests_per_poll: int = 5):
+        super().__init__(client)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.requests_per_poll = requests_per_poll
+
+    def submit(self, batch_requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        batch_id = f"msgbatch_local_{uuid.uuid4().hex[:12]}"
+        batch_dir = self.directory / batch_id
+        batch_dir.mkdir()
+        with open(batch_dir / "requests.jsonl", 'w', encoding='utf-8') as f:
+            for batch_request in batch_requests:
+                f.write(json.dumps(batch_request) + "\n")
+        (batch_dir / "results.jsonl").touch()
+        return self._status(batch_id)
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        batch_dir = self.directory / batch_id
+        done = {result["custom_id"] for result in self._read_jsonl(batch_dir / "results.jsonl")}
+        pending = [r for r in self._read_jsonl(batch_dir / "requests.jsonl") if r["custom_id"] not in done]
+
+        with open(batch_dir / "results.jsonl", 'a', encoding='utf-8') as f:
+            for batch_request in pending[:self.requests_per_poll]:
+                try:
+                    message = self.client.create_message(**batch_request["params"])
+                    result = {"type": "succeeded", "message": message}
+                except LLMError as e:
+                    result = {"type": "errored", "error": {"type": "api_error", "message": str(e)}}
+                f.write(json.dumps({"custom_id": batch_request["custom_id"], "result": result}) + "\n")
+
+        return self._status(batch_id)
+
+    def results(self, batch: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        yield from self._read_jsonl(Path(batch["results_url"]))
+
+    def _status(self, batch_id: str) -> Dict[str, Any]:
+        batch_dir = self.directory / batch_id
+        total = len(self._read_jsonl(batch_dir / "requests.jsonl"))
+        results = self._read_jsonl(batch_dir / "results.jsonl")
+        succeeded = sum(1 for r in results if r["result"]["type"] == "succeeded")
+        ended = len(results) >= total
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": total - len(results),
+                "succeeded": succeeded,
+                "errored": len(results) - succeeded,
+                "canceled": 0,
+                "expired": 0
+            },
+            "results_url": str(batch_dir / "results.jsonl") if ended else None
+        }
+
+    @staticmethod
+    def _read_jsonl(path: Path) -> List[Dict[str, Any]]:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client() -> ClaudeClient:
+    """Return the process-wide Claude client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ClaudeClient(
+                    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', '4')),
+                    max_retries=int(os.getenv('LLM_MAX_RETRIES', '3'))
+                )
+    return _client
+
+def message_text(message: Dict[str, Any]) -> str:
+    """Concatenate the text blocks of a Messages API response."""
+    return "".join(block.get("text", "") for block in message.get("content", []) if block.get("type") == "text")
@@ -214,8 +214,12 @@ class LessonProgress(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-    # Unique constraint to prevent duplicate entries
-    __table_args__ = (db.UniqueConstraint('user_id', 'course_code', 'lesson_id', name='unique_user_lesson'),)
+    # Unique constraint to prevent duplicate entries; the index covers the
+    # per-lesson GROUP BYs of course analytics (course_analytics.py)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'course_code', 'lesson_id', name='unique_user_lesson'),
+        db.Index('ix_lesson_progress_course_lesson', 'course_code', 'lesson_id', 'progress', 'completed', 'user_id'),
+    )
     
     def to_dict(self):
         return {
@@ -230,6 +234,33 @@ class LessonProgress(db.Model):
             'updated_at': self.updated_at.isoformat()
         }
 
+# Per (user, course) progress counters, kept current by progress_summary.py
+class CourseProgressSummary(db.Model):
+    __tablename__ = 'course_progress_summaries'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    course_code = db.Column(db.String(20), nullable=False)
+    lessons_started = db.Column(db.Integer, nullable=False, default=0)  # LessonProgress rows
+    lessons_completed = db.Column(db.Integer, nullable=False, default=0)
+    progress_total = db.Column(db.Integer, nullable=False, default=0)  # sum of LessonProgress.progress
+    completed_course_lessons = db.Column(db.Integer, nullable=False, default=0)  # distinct Lessons with completed Progress
+    last_activity_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('user_id', 'course_code', name='unique_user_course_summary'),)
+    
+    def to_dict(self):
+        return {
+            'course_code': self.course_code,
+            'lessons_started': self.lessons_started,
+            'lessons_completed': self.lessons_completed,
+            'average_progress': round(self.progress_total / self.lessons_started, 2) if self.lessons_started else 0,
+            'completed_course_lessons': self.completed_course_lessons,
+            'last_activity_at': self.last_activity_at.isoformat() if self.last_activity_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
 class HomeworkAssignment(db.Model):
     __tablename__ = 'homework_assignments'
     
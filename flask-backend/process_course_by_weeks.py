@@ -17,61 +17,106 @@ import sys
 import json
 from pathlib import Path
 import argparse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # Import the PDF extraction class
 from lecture_pdf_extraction import PDFContentOrganizer
+from lazy_imports import search_index
 
-def process_week(week_folder: Path, course_code: str, week_num: int) -> bool:
+def find_week_folders(course_dir: Path) -> List[Tuple[int, Path]]:
+    """Return (week number, folder) for each W<N>/w<N> folder, in week order."""
+    weeks = []
+    for folder in course_dir.iterdir():
+        if folder.is_dir() and folder.name[:1] in ("W", "w") and folder.name[1:].isdigit():
+            weeks.append((int(folder.name[1:]), folder))
+    return sorted(weeks)
+
+def study_guide_system(include_figures: bool = False) -> str:
+    """The fixed study-guide instructions, identical for every week of every course."""
+    if include_figures:
+        figures_requirement = "Use the attached figures where they clarify a concept; describe them in words rather than referencing them."
+    else:
+        figures_requirement = "Ignore any images for now."
+    
+    return f"""
+        You are an educational content assistant. I will provide you with content extracted from a course's weekly lecture PDFs, including text sections and markdown-formatted tables. Your task is to create **Khan Academy-style study notes**.
+
+        Requirements:
+
+        1. Organize the content into **clear sections and subsections** using headings (##, ###).  
+        2. Summarize text into **short, digestible bullet points**.  
+        3. Include **markdown tables only if they are relevant** to the concept being explained. Do not insert unrelated tables.   
+        4. {figures_requirement}  
+        5. Include a small "Key Points" summary at the end of each major section.  
+        6. Keep explanations **concise, educational, and easy to follow**, like Khan Academy notes.  
+        7. If table entries use `<br>` tags, you may keep them as-is or convert them into lists inside the cell for readability.
+        8. Focus on the core concepts and learning objectives for this week.
+        """
+
+def week_instruction(course_code: str, week_num: int) -> str:
+    """The per-week line sent ahead of the extracted content."""
+    return f"Here is the content for {course_code} Week {week_num}:"
+
+def write_week_outputs(week_new_folder: Path, course_code: str, week_num: int, pdf_files: List[Path],
+                       study_guide_content: str):
+    """Write study_guide.md and metadata.json for a week."""
+    week_new_folder.mkdir(parents=True, exist_ok=True)
+    
+    with open(week_new_folder / "study_guide.md", 'w') as f:
+        f.write(study_guide_content)
+    search_index.index_study_guide(week_new_folder / "study_guide.md", course_code, week_num)
+    
+    # Create metadata
+    metadata = {
+        "week": week_num,
+        "course": course_code,
+        "title": f"Week {week_num} Study Guide",
+        "description": f"Study guide for {course_code} Week {week_num}",
+        "topics": [],
+        "difficulty": "intermediate",
+        "estimated_time": "60 minutes",
+        "pdf_count": len(pdf_files),
+        "pdf_files": [f.name for f in pdf_files]
+    }
+    
+    metadata_file = week_new_folder / "metadata.json"
+    with open(metadata_file, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
+def process_week(week_folder: Path, course_code: str, week_num: int, include_figures: bool = False,
+                 stream: bool = False) -> bool:
     """Process a single week's PDFs and generate study guide."""
     print(f"Processing {week_folder.name}...")
     
-    pdf_files = list(week_folder.glob("*.pdf"))
+    pdf_files = sorted(week_folder.glob("*.pdf"))
     if not pdf_files:
         print(f"No PDFs found in {week_folder.name}")
         return False
     
     print(f"Found {len(pdf_files)} PDFs in {week_folder.name}")
     
-    # Create a temporary folder for this week
-    temp_week_folder = Path(f"temp_{course_code}_{week_folder.name}")
-    temp_week_folder.mkdir(exist_ok=True)
-    
     try:
-        # Copy PDFs to temp folder
-        for pdf_file in pdf_files:
-            import shutil
-            shutil.copy2(pdf_file, temp_week_folder / pdf_file.name)
-        
         # Process with PDF extraction
-        organizer = PDFContentOrganizer()
+        organizer = PDFContentOrganizer(include_figures=include_figures)
         
-        # Extract content from temp folder
-        success = organizer.extract_content(str(temp_week_folder))
+        # Extract content straight from the week's PDFs
+        success = organizer.extract_pdfs(pdf_files, week_folder.name)
         
         if not success:
             print(f"Failed to extract content from {week_folder.name}")
             return False
         
-        # Send to Claude and save
-        instruction = f"""
-        You are an educational content assistant. I will provide you with content extracted from PDFs for {course_code} Week {week_num}, including text sections and markdown-formatted tables. Your task is to create **Khan Academy-style study notes**.
-
-        Requirements:
-
-        1. Organize the content into **clear sections and subsections** using headings (##, ###).  
-        2. Summarize text into **short, digestible bullet points**.  
-        3. Include **markdown tables only if they are relevant** to the concept being explained. Do not insert unrelated tables.   
-        4. Ignore any images for now.  
-        5. Include a small "Key Points" summary at the end of each major section.  
-        6. Keep explanations **concise, educational, and easy to follow**, like Khan Academy notes.  
-        7. If table entries use `<br>` tags, you may keep them as-is or convert them into lists inside the cell for readability.
-        8. Focus on the core concepts and learning objectives for this week.
-
-        Here is the content:
-        """
+        # Save study guide to the course_new folder
+        course_new_folder = Path(f"{course_code}_New")
+        week_new_folder = course_new_folder / week_folder.name
+        week_new_folder.mkdir(parents=True, exist_ok=True)
+        study_guide_file = week_new_folder / "study_guide.md"
         
-        output_file = organizer.send_to_claude_and_save(instruction)
+        # When streaming, study_guide.md.partial fills in as Claude generates it and
+        # replaces study_guide.md only once the response is complete
+        output_file = organizer.send_to_claude_and_save(week_instruction(course_code, week_num),
+                                                        stream_to=study_guide_file if stream else None,
+                                                        system=study_guide_system(include_figures))
         
         # Read the generated content
         with open(output_file, 'r') as f:
@@ -86,31 +131,7 @@ def process_week(week_folder: Path, course_code: str, week_num: int) -> bool:
             if isinstance(claude_response["content"], list) and len(claude_response["content"]) > 0:
                 study_guide_content = claude_response["content"][0].get("text", "")
         
-        # Save study guide to the course_new folder
-        course_new_folder = Path(f"{course_code}_New")
-        week_new_folder = course_new_folder / week_folder.name
-        week_new_folder.mkdir(parents=True, exist_ok=True)
-        
-        study_guide_file = week_new_folder / "study_guide.md"
-        with open(study_guide_file, 'w') as f:
-            f.write(study_guide_content)
-        
-        # Create metadata
-        metadata = {
-            "week": week_num,
-            "course": course_code,
-            "title": f"Week {week_num} Study Guide",
-            "description": f"Study guide for {course_code} Week {week_num}",
-            "topics": [],
-            "difficulty": "intermediate",
-            "estimated_time": "60 minutes",
-            "pdf_count": len(pdf_files),
-            "pdf_files": [f.name for f in pdf_files]
-        }
-        
-        metadata_file = week_new_folder / "metadata.json"
-        with open(metadata_file, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        write_week_outputs(week_new_folder, course_code, week_num, pdf_files, study_guide_content)
         
         print(f"✅ Generated study guide for {week_folder.name}")
         return True
@@ -118,14 +139,8 @@ def process_week(week_folder: Path, course_code: str, week_num: int) -> bool:
     except Exception as e:
         print(f"❌ Error processing {week_folder.name}: {e}")
         return False
-    
-    finally:
-        # Clean up temp folder
-        import shutil
-        if temp_week_folder.exists():
-            shutil.rmtree(temp_week_folder)
 
-def process_course(course_code: str) -> bool:
+def process_course(course_code: str, include_figures: bool = False, stream: bool = False) -> bool:
     """Process all weeks in a course."""
     course_folder = Path(course_code)
     if not course_folder.exists():
@@ -147,7 +162,7 @@ def process_course(course_code: str) -> bool:
         # Extract week number
         week_num = int(week_folder.name[1:])  # Remove 'W' prefix
         
-        if process_week(week_folder, course_code, week_num):
+        if process_week(week_folder, course_code, week_num, include_figures, stream):
             success_count += 1
     
     print(f"\n🎉 Completed! Generated study guides for {success_count}/{len(week_folders)} weeks")
@@ -156,21 +171,26 @@ def process_course(course_code: str) -> bool:
 def main():
     parser = argparse.ArgumentParser(description='Process course PDFs week by week and generate study guides')
     parser.add_argument('course_code', help='Course code (e.g., CS61A, CS188)')
+    parser.add_argument('--include-figures', action='store_true',
+                        help='Attach deduplicated, size-capped lecture figures to the Claude request')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream each study guide into study_guide.md as it is generated')
     
     args = parser.parse_args()
     
     course_code = args.course_code.upper()
     print(f"🚀 Processing course: {course_code}")
     
-    success = process_course(course_code)
+    success = process_course(course_code, args.include_figures, args.stream)
     
     if success:
         print(f"\n✅ Successfully processed {course_code}")
         print(f"📁 Study guides saved in {course_code}_New/ directory")
         print(f"🔧 Next steps:")
-        print(f"1. Create API route: nextjs-frontend/src/app/api/{course_code.lower()}/content/[week]/route.ts")
-        print(f"2. Update CourseDetail.tsx to include {course_code}")
-        print(f"3. Test the course in the frontend")
+        print(f"1. Check a week at http://localhost:5001/api/content/{course_code}/1")
+        print(f"2. Add {course_code} to the study guide courses in CourseDetail.tsx")
+        print(f"3. Rebuild bundles and search: python build_content_bundles.py {course_code} && python build_search_index.py")
+        print(f"4. Test the course in the frontend")
         return 0
     else:
         print(f"❌ Failed to process {course_code}")
@@ -0,0 +1,401 @@
+"""
+Progress Buffer - optional write-behind for high-frequency progress events.
+
+With PROGRESS_WRITE_BEHIND=1, POST /api/progress/update and the lesson
+progress POSTs don't commit per event. Each event is merged into an in-memory
+entry per (user, lesson), and a background thread writes all entries every
+PROGRESS_FLUSH_INTERVAL seconds, or as soon as PROGRESS_FLUSH_SIZE entries are
+pending, with the bulk upserts of lesson_progress.py. A class scrolling through
+the same week turns thousands of commits into a few statements per flush.
+
+Coalescing keeps the meaning of the synchronous endpoints:
+
+- lesson progress: a single-lesson update (OVERWRITE) replaces what is pending,
+  a batch update (MONOTONIC) merges into it, progress only moving forward
+- progress records: the latest completed/score/time_spent win; completed_at
+  keeps the first completion time
+
+Events are validated before they are queued (ids are integers of existing
+rows; lesson updates come through lesson_progress.parse_progress_updates), so
+a bad event gets its 400 from the POST instead of failing a flush later.
+Lesson, concept and exercise ids that were found once are remembered, so the
+existence checks cost a primary-key SELECT only the first time an id is seen
+per process; an entry for a row deleted since is rejected by its flush and
+set aside like any other. The user id comes from the JWT and is not looked up.
+
+Pending entries are flushed when the process exits (atexit), and a user's
+pending entries are flushed before their progress is read, so GETs always see
+their own writes. When a flush fails because the database is unreachable or
+busy, its entries are kept for the next one, merged under anything newer. When
+the database rejects the batch itself, it is retried per user, then per entry,
+and only the entries rejected on their own are set aside (counted and listed
+in the metrics, not retried), so one bad entry can't hold back everyone else's
+progress. The metrics show other users' entries, so only ANALYTICS_EMAILS
+users may read them. Per-process only: with several workers each keeps its own buffer.
+
+Without PROGRESS_WRITE_BEHIND the endpoints write synchronously as before.
+"""
+
+import os
+import time
+import atexit
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from lesson_progress import MONOTONIC, OVERWRITE, merge_updates, upsert_lesson_rows
+from models import Concept, Exercise, Lesson, Progress, db
+
+DEFAULT_FLUSH_INTERVAL = 2.0  # seconds
+DEFAULT_FLUSH_SIZE = 1000     # pending entries that trigger an early flush
+LOOKUP_BATCH_KEYS = 100       # (user, lesson) pairs per SELECT of existing progress records
+MAX_ID = 2**31 - 1            # largest value of an Integer column
+RECENT_REJECTIONS = 20        # set-aside entries listed in the metrics
+
+# Failures of the connection rather than of the entries: keep the batch for the next flush
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError)
+
+# (user_id, course_code, lesson_id) -> (mode, LessonProgress row)
+LessonKey = Tuple[int, str, str]
+# (user_id, lesson_id, concept_id, exercise_id) -> Progress values
+ProgressKey = Tuple[int, int, Optional[int], Optional[int]]
+
+def parse_id(name: str, value) -> int:
+    """An id as int; ValueError (a 400) when it can't be one."""
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_ID:
+        raise ValueError(f'{name} must be a positive integer')
+    return value
+
+def coalesce_lesson(older: Tuple[str, Dict], newer: Tuple[str, Dict]) -> Tuple[str, Dict]:
+    """One pending lesson entry with the same effect as writing older, then newer."""
+    older_mode, older_row = older
+    newer_mode, newer_row = newer
+    if newer_mode == OVERWRITE:
+        return OVERWRITE, dict(newer_row, created_at=older_row['created_at'])
+    return older_mode, dict(
+        older_row,
+        progress=max(older_row['progress'], newer_row['progress']),
+        completed=older_row['completed'] or newer_row['completed'],
+        completed_at=older_row['completed_at'] or newer_row['completed_at'],
+        updated_at=newer_row['updated_at']
+    )
+
+def coalesce_progress(older: Dict, newer: Dict) -> Dict:
+    """The latest values, with the first completion time."""
+    return dict(newer, completed_at=older['completed_at'] or newer['completed_at'])
+
+class ProgressBuffer:
+    def __init__(self, enabled: bool = False, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_size: int = DEFAULT_FLUSH_SIZE):
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.app = None
+
+        self._lessons: Dict[LessonKey, Tuple[str, Dict]] = {}
+        self._progress: Dict[ProgressKey, Dict] = {}
+        self._first_pending_at: Optional[float] = None
+        self._rejections = deque(maxlen=RECENT_REJECTIONS)
+        self._known_ids: Dict[type, Set[int]] = {Lesson: set(), Concept: set(), Exercise: set()}
+        self._lock = threading.Lock()        # guards the pending entries and stats
+        self._flush_lock = threading.Lock()  # one flush at a time, so writes land in order
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._stats = {
+            'events': 0, 'coalesced': 0, 'flushes': 0, 'flushed_rows': 0, 'failed_flushes': 0,
+            'rejected_entries': 0,
+            'last_flush_ms': 0.0, 'max_flush_ms': 0.0, 'total_flush_ms': 0.0
+        }
+
+    @classmethod
+    def from_env(cls) -> "ProgressBuffer":
+        return cls(
+            enabled=os.environ.get('PROGRESS_WRITE_BEHIND', '').lower() in ('1', 'true', 'yes'),
+            flush_interval=float(os.environ.get('PROGRESS_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL)),
+            flush_size=int(os.environ.get('PROGRESS_FLUSH_SIZE', DEFAULT_FLUSH_SIZE))
+        )
+
+    def init_app(self, app):
+        """Start the flusher thread (when enabled); it writes inside this app's context."""
+        self.app = app
+        app.extensions['progress_buffer'] = self
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='progress-buffer', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+        print(f"📝 Progress write-behind on: flushing every {self.flush_interval}s or {self.flush_size} entries")
+
+    @property
+    def depth(self) -> int:
+        return len(self._lessons) + len(self._progress)
+
+    def add_lesson_updates(self, user_id: int, course_code: str, updates, mode: str = MONOTONIC) -> Dict[str, Dict]:
+        """Queue updates from parse_progress_updates; returns the pending state of each lesson (GET .../progress shape)."""
+        queued = {}
+        with self._lock:
+            for row in merge_updates(user_id, course_code, updates):
+                key = (user_id, course_code, row['lesson_id'])
+                entry = (mode, row)
+                if key in self._lessons:
+                    entry = coalesce_lesson(self._lessons[key], entry)
+                    self._stats['coalesced'] += 1
+                self._lessons[key] = entry
+                queued[row['lesson_id']] = {
+                    'completed': entry[1]['completed'],
+                    'progress': entry[1]['progress'],
+                    'completed_at': entry[1]['completed_at'].isoformat() if entry[1]['completed_at'] else None
+                }
+            self._stats['events'] += 1
+            self._queued()
+        return queued
+
+    def add_progress(self, user_id: int, lesson_id: int, concept_id=None, exercise_id=None,
+                     completed: bool = False, score=None, time_spent=None) -> Dict:
+        """Queue a progress record update (POST /api/progress/update); returns the pending values.
+
+        Raises ValueError with a message fit for a 400 response.
+        """
+        user_id = parse_id('user_id', user_id)
+        lesson_id = self._existing_id('lesson_id', lesson_id, Lesson)
+        if concept_id is not None:
+            concept_id = self._existing_id('concept_id', concept_id, Concept)
+        if exercise_id is not None:
+            exercise_id = self._existing_id('exercise_id', exercise_id, Exercise)
+        if score is not None and (isinstance(score, bool) or not isinstance(score, (int, float))):
+            raise ValueError('score must be a number')
+        if time_spent is not None and (isinstance(time_spent, bool) or not isinstance(time_spent, (int, float))
+                                       or not 0 <= time_spent <= MAX_ID):
+            raise ValueError('time_spent must be a non-negative number of minutes')
+        now = datetime.utcnow()
+        key = (user_id, lesson_id, concept_id, exercise_id)
+        values = {
+            'completed': completed,
+            'score': score,
+            'time_spent': time_spent,
+            'completed_at': now if completed else None,
+            'updated_at': now
+        }
+        with self._lock:
+            if key in self._progress:
+                values = coalesce_progress(self._progress[key], values)
+                self._stats['coalesced'] += 1
+            self._progress[key] = values
+            self._stats['events'] += 1
+            self._queued()
+        return {
+            'user_id': user_id,
+            'lesson_id': lesson_id,
+            'concept_id': concept_id,
+            'exercise_id': exercise_id,
+            'completed': values['completed'],
+            'score': values['score'],
+            'time_spent': values['time_spent'],
+            'completed_at': values['completed_at'].isoformat() if values['completed_at'] else None,
+            'updated_at': values['updated_at'].isoformat()
+        }
+
+    def _existing_id(self, name: str, value, model) -> int:
+        """parse_id(), and the row must exist; looked up once per id, then remembered."""
+        value = parse_id(name, value)
+        known = self._known_ids[model]
+        if value not in known:
+            if db.session.get(model, value) is None:
+                raise ValueError(f'{name} {value} not found')
+            known.add(value)  # set.add is atomic under the GIL
+        return value
+
+    def _queued(self):
+        """Call with self._lock held, after adding an entry."""
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+        if self.depth >= self.flush_size:
+            self._wake.set()
+
+    def flush(self, user_id: Optional[int] = None) -> int:
+        """Write pending entries (only this user's, when given) now; returns the rows written."""
+        if not self.enabled:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                lessons = self._take(self._lessons, user_id)
+                progress = self._take(self._progress, user_id)
+                if not self._lessons and not self._progress:
+                    self._first_pending_at = None
+            if not lessons and not progress:
+                return 0
+
+            start = time.perf_counter()
+            with self.app.app_context():
+                written = self._write_isolating(lessons, progress)
+            if written < len(lessons) + len(progress):
+                with self._lock:
+                    self._stats['failed_flushes'] += 1
+                if not written:
+                    return 0
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['flushed_rows'] += written
+                self._stats['last_flush_ms'] = elapsed_ms
+                self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+                self._stats['total_flush_ms'] += elapsed_ms
+            return written
+
+    def _write_isolating(self, lessons: Dict, progress: Dict) -> int:
+        """Write entries in one transaction; if the database rejects it, narrow down to the
+        entries it rejects. Returns the entries written; the rest are restored or set aside."""
+        try:
+            self._write(lessons, progress)
+            return len(lessons) + len(progress)
+        except TRANSIENT_ERRORS as e:
+            with self._lock:
+                self._restore(lessons, progress)
+            print(f"❌ Progress flush failed, keeping {len(lessons) + len(progress)} entries: {e}")
+            return 0
+        except Exception as e:
+            if len(lessons) + len(progress) == 1:
+                self._set_aside(lessons, progress, e)
+                return 0
+        return sum(self._write_isolating(part_lessons, part_progress)
+                   for part_lessons, part_progress in self._split(lessons, progress))
+
+    @staticmethod
+    def _split(lessons: Dict, progress: Dict) -> List[Tuple[Dict, Dict]]:
+        """A rejected batch in parts: one per user, or one per entry when it is a single user's."""
+        users = sorted({key[0] for key in lessons} | {key[0] for key in progress})
+        if len(users) > 1:
+            return [
+                ({key: entry for key, entry in lessons.items() if key[0] == user_id},
+                 {key: values for key, values in progress.items() if key[0] == user_id})
+                for user_id in users
+            ]
+        return [({key: entry}, {}) for key, entry in lessons.items()] + \
+               [({}, {key: values}) for key, values in progress.items()]
+
+    def _set_aside(self, lessons: Dict, progress: Dict, error: Exception):
+        """Drop an entry the database rejects on its own, keeping a note of it for the metrics."""
+        key = next(iter(lessons or progress))
+        kind = 'lesson_progress' if lessons else 'progress'
+        message = str(error).splitlines()[0] if str(error) else type(error).__name__
+        with self._lock:
+            self._stats['rejected_entries'] += 1
+            self._rejections.append({
+                'kind': kind, 'key': list(key), 'error': message, 'at': datetime.utcnow().isoformat()
+            })
+        print(f"❌ Progress entry {kind} {key} rejected, setting it aside: {message}")
+
+    def _take(self, pending: Dict, user_id: Optional[int]) -> Dict:
+        """Remove and return pending entries, all of them or one user's. Call with self._lock held."""
+        if user_id is None:
+            taken = dict(pending)
+            pending.clear()
+            return taken
+        taken = {key: entry for key, entry in pending.items() if key[0] == user_id}
+        for key in taken:
+            del pending[key]
+        return taken
+
+    def _restore(self, lessons: Dict, progress: Dict):
+        """Put back the entries of a failed flush, under anything queued since. Call with self._lock held."""
+        for key, entry in lessons.items():
+            self._lessons[key] = coalesce_lesson(entry, self._lessons[key]) if key in self._lessons else entry
+        for key, values in progress.items():
+            self._progress[key] = coalesce_progress(values, self._progress[key]) if key in self._progress else values
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+
+    def _write(self, lessons: Dict[LessonKey, Tuple[str, Dict]], progress: Dict[ProgressKey, Dict]):
+        """One transaction: lesson upserts per mode, then progress records updated or inserted."""
+        try:
+            for mode in (MONOTONIC, OVERWRITE):
+                rows = [row for row_mode, row in lessons.values() if row_mode == mode]
+                if rows:
+                    upsert_lesson_rows(rows, mode)
+
+            if progress:
+                existing = self._existing_progress(list(progress))
+                for key, values in progress.items():
+                    record = existing.get(key)
+                    if record is None:
+                        user_id, lesson_id, concept_id, exercise_id = key
+                        db.session.add(Progress(
+                            user_id=user_id, lesson_id=lesson_id, concept_id=concept_id,
+                            exercise_id=exercise_id, created_at=values['updated_at'], **values
+                        ))
+                        continue
+                    record.completed = values['completed']
+                    record.score = values['score']
+                    record.time_spent = values['time_spent']
+                    record.updated_at = values['updated_at']
+                    if values['completed'] and not record.completed_at:
+                        record.completed_at = values['completed_at']
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _existing_progress(self, keys) -> Dict[ProgressKey, Progress]:
+        """Stored progress records of these keys, a few SELECTs per flush instead of one per key."""
+        pairs = sorted({(user_id, lesson_id) for user_id, lesson_id, _, _ in keys})
+        existing = {}
+        for start in range(0, len(pairs), LOOKUP_BATCH_KEYS):
+            for record in Progress.query.filter(or_(*(
+                and_(Progress.user_id == user_id, Progress.lesson_id == lesson_id)
+                for user_id, lesson_id in pairs[start:start + LOOKUP_BATCH_KEYS]
+            ))):
+                existing.setdefault((record.user_id, record.lesson_id, record.concept_id, record.exercise_id), record)
+        return existing
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self):
+        """Stop the flusher and write everything still pending (registered with atexit)."""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.flush_interval, 1.0) * 5)
+            self._thread = None
+        written = self.flush()
+        if written:
+            print(f"📝 Flushed {written} pending progress entries on shutdown")
+
+    def metrics(self) -> Dict:
+        """Buffer depth and flush latency, for GET /api/progress/buffer/metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            oldest = self._first_pending_at
+            depth = self.depth
+            rejections = list(self._rejections)
+        flushes = stats.pop('flushes')
+        total_flush_ms = stats.pop('total_flush_ms')
+        return {
+            'enabled': self.enabled,
+            'flush_interval_seconds': self.flush_interval,
+            'flush_size': self.flush_size,
+            'depth': depth,
+            'oldest_pending_seconds': round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            'flushes': flushes,
+            'avg_flush_ms': round(total_flush_ms / flushes, 2) if flushes else 0.0,
+            'last_flush_ms': round(stats.pop('last_flush_ms'), 2),
+            'max_flush_ms': round(stats.pop('max_flush_ms'), 2),
+            **stats,
+            'recent_rejections': rejections
+        }
+
+progress_buffer = ProgressBuffer.from_env()
@@ -0,0 +1,244 @@
+"""
+Progress Summary - per (user, course) progress counters.
+
+Dashboards read one CourseProgressSummary row per course instead of loading
+and counting a user's LessonProgress and Progress rows on every request. The
+counters are kept current on write, in the same transaction:
+
+- after each flush, the (user, course) of every LessonProgress and Progress
+  row added, changed or deleted is marked stale; bulk upserts that bypass the
+  ORM (lesson_progress.upsert_lesson_rows) call mark_stale() themselves
+- just before the transaction commits, each stale summary row is locked
+  (created first if missing, then SELECT ... FOR UPDATE), recomputed with
+  grouped aggregates over that user's rows of the course (an index range of
+  unique_user_lesson, not a table scan) and upserted
+
+The lock serializes concurrent transactions touching the same (user, course):
+the second one waits for the first to commit, and under READ COMMITTED (the
+PostgreSQL default) its aggregates then see the first one's rows, so the last
+writer never stores counts that miss the other's write. SQLite allows one
+writer at a time, so there the race cannot happen.
+
+Recomputing a stale pair rather than adding deltas keeps the counters exact
+whatever the write was (monotonic merges, overwrites, deletes), and they
+commit or roll back together with it. Bulk Query.update()/delete() calls
+bypass the ORM and are not seen; build_progress_summaries.py backfills (or
+--check's) the table from existing rows.
+
+The number of active lessons (the denominator of overall progress) is
+counted once per version of the 'courses' response cache namespace, which
+every write to the lessons table bumps, not once per request.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, distinct, event, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Course, CourseProgressSummary, Lesson, LessonProgress, Progress
+from response_cache import COURSES, response_cache
+
+# Dialects with INSERT ... ON CONFLICT, for bulk upserts
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+UPSERT_BATCH_ROWS = 100
+SUMMARY_BATCH_PAIRS = 100  # (user, course) pairs per aggregate query
+
+COUNTER_COLUMNS = ('lessons_started', 'lessons_completed', 'progress_total', 'completed_course_lessons')
+
+Pair = Tuple[int, str]
+
+_active_lessons: Tuple[Optional[str], int] = (None, 0)  # (courses namespace version, count)
+
+def mark_stale(session, pairs: Iterable[Pair]):
+    """Recompute these (user_id, course_code) summaries when the session commits."""
+    session.info.setdefault('progress_summary_pairs', set()).update(
+        (int(user_id), course_code) for user_id, course_code in pairs
+    )
+
+def _pairs_filter(user_column, course_column, pairs: List[Pair]):
+    return or_(*(and_(user_column == user_id, course_column == course_code) for user_id, course_code in pairs))
+
+def lesson_progress_counts(session, pairs: Optional[List[Pair]] = None,
+                           courses: Optional[List[str]] = None) -> Dict[Pair, Dict]:
+    """LessonProgress counters per (user, course): rows, completed rows, progress sum, last update."""
+    table = LessonProgress.__table__
+    query = select(
+        table.c.user_id, table.c.course_code, func.count(),
+        func.sum(case((table.c.completed, 1), else_=0)),
+        func.sum(func.coalesce(table.c.progress, 0)),
+        func.max(table.c.updated_at)
+    ).group_by(table.c.user_id, table.c.course_code)
+    if pairs is not None:
+        query = query.where(_pairs_filter(table.c.user_id, table.c.course_code, pairs))
+    if courses is not None:
+        query = query.where(table.c.course_code.in_(courses))
+
+    return {
+        (user_id, course_code): {
+            'lessons_started': started,
+            'lessons_completed': completed or 0,
+            'progress_total': progress_total or 0,
+            'last_activity_at': last_activity_at
+        }
+        for user_id, course_code, started, completed, progress_total, last_activity_at in session.execute(query)
+    }
+
+def progress_record_counts(session, pairs: Optional[List[Pair]] = None,
+                           courses: Optional[List[str]] = None) -> Dict[Pair, Dict]:
+    """Progress counters per (user, course): distinct lessons with a completed record, last update."""
+    query = (
+        select(
+            Progress.user_id, Course.code,
+            func.count(distinct(case((Progress.completed, Progress.lesson_id)))),
+            func.max(Progress.updated_at)
+        )
+        .join_from(Progress, Lesson, Progress.lesson_id == Lesson.id)
+        .join(Course, Lesson.course_id == Course.id)
+        .group_by(Progress.user_id, Course.code)
+    )
+    if pairs is not None:
+        query = query.where(_pairs_filter(Progress.user_id, Course.code, pairs))
+    if courses is not None:
+        query = query.where(Course.code.in_(courses))
+
+    return {
+        (user_id, course_code): {'completed_course_lessons': completed, 'last_activity_at': last_activity_at}
+        for user_id, course_code, completed, last_activity_at in session.execute(query)
+    }
+
+def summary_rows(session, pairs: Optional[List[Pair]] = None, courses: Optional[List[str]] = None) -> List[Dict]:
+    """CourseProgressSummary rows computed from the progress tables; all-zero rows for stale pairs without data."""
+    lessons = lesson_progress_counts(session, pairs, courses)
+    records = progress_record_counts(session, pairs, courses)
+    now = datetime.utcnow()
+
+    rows = []
+    for user_id, course_code in sorted(set(lessons) | set(records) | set(pairs or ())):
+        counts = lessons.get((user_id, course_code), {})
+        record_counts = records.get((user_id, course_code), {})
+        activity = [at for at in (counts.get('last_activity_at'), record_counts.get('last_activity_at')) if at]
+        rows.append({
+            'user_id': user_id,
+            'course_code': course_code,
+            'lessons_started': counts.get('lessons_started', 0),
+            'lessons_completed': counts.get('lessons_completed', 0),
+            'progress_total': counts.get('progress_total', 0),
+            'completed_course_lessons': record_counts.get('completed_course_lessons', 0),
+            'last_activity_at': max(activity) if activity else None,
+            'updated_at': now
+        })
+    return rows
+
+def write_summaries(session, rows: List[Dict]):
+    """Upsert summary rows in the current transaction."""
+    if not rows:
+        return
+    insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is None:
+        existing = {
+            (summary.user_id, summary.course_code): summary
+            for summary in session.query(CourseProgressSummary).filter(_pairs_filter(
+                CourseProgressSummary.user_id, CourseProgressSummary.course_code,
+                [(row['user_id'], row['course_code']) for row in rows]
+            )).with_for_update()
+        }
+        for row in rows:
+            summary = existing.get((row['user_id'], row['course_code']))
+            if summary is None:
+                session.add(CourseProgressSummary(**row))
+            else:
+                for column in (*COUNTER_COLUMNS, 'last_activity_at', 'updated_at'):
+                    setattr(summary, column, row[column])
+        session.flush()
+        return
+
+    table = CourseProgressSummary.__table__
+    for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+        statement = insert(table).values(rows[start:start + UPSERT_BATCH_ROWS])
+        statement = statement.on_conflict_do_update(
+            index_elements=['user_id', 'course_code'],
+            set_={column: statement.excluded[column] for column in (*COUNTER_COLUMNS, 'last_activity_at', 'updated_at')}
+        )
+        session.execute(statement)
+
+def lock_summaries(session, pairs: List[Pair]):
+    """Create missing summary rows, then lock them until the transaction ends."""
+    table = CourseProgressSummary.__table__
+    insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if insert is not None:
+        now = datetime.utcnow()
+        session.execute(insert(table).values([
+            {'user_id': user_id, 'course_code': course_code, 'lessons_started': 0, 'lessons_completed': 0,
+             'progress_total': 0, 'completed_course_lessons': 0, 'updated_at': now}
+            for user_id, course_code in pairs
+        ]).on_conflict_do_nothing(index_elements=['user_id', 'course_code']))
+    session.execute(
+        select(table.c.id).where(_pairs_filter(table.c.user_id, table.c.course_code, pairs))
+        .order_by(table.c.user_id, table.c.course_code).with_for_update()
+    ).all()
+
+def refresh_summaries(session, pairs: Set[Pair]):
+    """Recompute the summaries of these (user_id, course_code) pairs, holding their row locks."""
+    ordered = sorted(pairs)  # one lock order for every transaction, so they can't deadlock
+    for start in range(0, len(ordered), SUMMARY_BATCH_PAIRS):
+        batch = ordered[start:start + SUMMARY_BATCH_PAIRS]
+        lock_summaries(session, batch)
+        write_summaries(session, summary_rows(session, batch))
+
+def rebuild_summaries(session, courses: Optional[List[str]] = None) -> int:
+    """Backfill: recompute every summary (of these courses) from the progress tables; returns the row count."""
+    rows = summary_rows(session, courses=courses)
+    query = session.query(CourseProgressSummary)
+    if courses is not None:
+        query = query.filter(CourseProgressSummary.course_code.in_(courses))
+    query.delete(synchronize_session=False)
+    write_summaries(session, rows)
+    return len(rows)
+
+def active_lesson_total(session) -> int:
+    """Active lessons across all courses, recounted only when the lessons table has changed."""
+    global _active_lessons
+    version = response_cache.versions.version(COURSES)
+    cached_version, total = _active_lessons
+    if cached_version != version:
+        total = session.execute(select(func.count()).select_from(Lesson).where(Lesson.is_active.is_(True))).scalar()
+        _active_lessons = (version, total)
+    return total
+
+def _course_codes(session, lesson_ids: Set[int]) -> Dict[int, str]:
+    return dict(session.execute(
+        select(Lesson.id, Course.code).join(Course, Lesson.course_id == Course.id).where(Lesson.id.in_(lesson_ids))
+    ).all())
+
+# Session hooks: collect what each flush touched, recompute before the commit
+
+@event.listens_for(Session, 'after_flush')
+def _collect_stale(session, flush_context):
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        if isinstance(instance, LessonProgress) and instance.user_id is not None:
+            mark_stale(session, [(instance.user_id, instance.course_code)])
+        elif isinstance(instance, Progress) and instance.user_id is not None and instance.lesson_id is not None:
+            session.info.setdefault('progress_summary_lessons', set()).add(
+                (int(instance.user_id), int(instance.lesson_id))
+            )
+
+@event.listens_for(Session, 'before_commit')
+def _refresh_stale(session):
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    pairs = session.info.pop('progress_summary_pairs', set())
+    user_lessons = session.info.pop('progress_summary_lessons', None)
+    if user_lessons:
+        course_codes = _course_codes(session, {lesson_id for _, lesson_id in user_lessons})
+        pairs.update(
+            (user_id, course_codes[lesson_id]) for user_id, lesson_id in user_lessons if lesson_id in course_codes
+        )
+    if pairs:
+        refresh_summaries(session, pairs)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_stale(session):
+    session.info.pop('progress_summary_pairs', None)
+    session.info.pop('progress_summary_lessons', None)
@@ -0,0 +1,151 @@
+"""
+Query Planner - plans the YouTube searches for a course's weeks.
+
+Every search query fans out to one search.list call per educational channel
+(100 quota units each), plus one videos.list call per result. The default
+10,000 units a day cover only about twenty queries. The planner:
+
+- canonicalizes study-guide topics (drops section numbers, stopwords, plurals,
+  the course subject and template words) and runs one query per distinct topic
+  instead of three near-identical variants
+- dedupes across all weeks of a course, and reuses results when two weeks
+  share a topic
+- estimates the quota a plan will use before running it, and refuses to go
+  past an optional budget (YOUTUBE_QUOTA_BUDGET)
+"""
+
+import re
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from video_ranking import tokenize
+
+# Subject context added to each query, per course
+COURSE_SUBJECTS = {
+    'CS162': 'operating systems',
+    'CS170': 'algorithms',
+    'CS61A': 'programming python',
+    'CS61B': 'data structures',
+    'EECS126': 'probability random processes',
+    'EECS16A': 'linear algebra circuits',
+    'EECS16B': 'linear algebra circuits'
+}
+DEFAULT_SUBJECT = 'computer science'
+
+# Words that don't distinguish one topic from another (study guide boilerplate
+# headings like "Key Concepts" or "Chapter 3" reduce to nothing and are skipped)
+TEMPLATE_WORDS = frozenset(tokenize(
+    "introduction intro overview tutorial explanation lecture week notes summary review "
+    "key concept learning objective example chapter section part topic"
+))
+
+# Section numbering like "5.1" or "2.3.4" at the start of a heading
+SECTION_NUMBER = re.compile(r'^\s*\d+(?:\.\d+)*\.?\s+')
+
+MAX_QUERIES_PER_WEEK = 5
+
+# YouTube Data API quota units
+SEARCH_COST = 100
+VIDEOS_COST = 1
+GENERAL_RESULTS = 3  # results fetched by the general-YouTube fallback
+
+class QuotaBudgetExceeded(Exception):
+    """Raised instead of running a query that could go past the quota budget."""
+
+class QueryPlanner:
+    def __init__(self, course_code: str, channels: List[str], results_per_channel: int = 1,
+                 quota_budget: Optional[int] = None):
+        self.course_code = course_code
+        self.subject = COURSE_SUBJECTS.get(course_code, DEFAULT_SUBJECT)
+        self.channels = set(channels)
+        self.results_per_channel = results_per_channel
+        self.quota_budget = quota_budget
+
+        self.spent = 0  # estimated quota units used so far
+        self._results: Dict[str, List[Dict]] = {}  # canonical key -> search results
+        self._lock = threading.Lock()
+        self._subject_terms = frozenset(tokenize(self.subject))
+
+    def canonical_key(self, topic: str) -> str:
+        """Order-insensitive key of the words that make a topic distinct; empty if none do."""
+        terms = {
+            term for term in tokenize(SECTION_NUMBER.sub('', topic))
+            if len(term) > 1 and not term.isdigit()
+        } - self._subject_terms - TEMPLATE_WORDS
+        return ' '.join(sorted(terms))
+
+    def query_for(self, topic: str) -> str:
+        """The search query for a topic: the heading text plus the course subject."""
+        topic = SECTION_NUMBER.sub('', topic).strip()
+        if self._subject_terms <= set(tokenize(topic)):
+            return topic
+        return f"{topic} {self.subject}"
+
+    def plan(self, topics: List[str], max_queries: int = MAX_QUERIES_PER_WEEK) -> List[Tuple[str, str]]:
+        """Distinct (key, query) pairs for a week's topics, in topic order.
+
+        A week with no distinct topic falls back to the course subject, which is
+        searched once per course.
+        """
+        planned = []
+        seen = set()
+        for topic in topics:
+            key = self.canonical_key(topic)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            planned.append((key, self.query_for(topic)))
+            if len(planned) >= max_queries:
+                break
+        return planned or [('', self.subject)]
+
+    def plan_course(self, week_topics: Dict[int, List[str]]) -> Dict[int, List[Tuple[str, str]]]:
+        """Plan every week of a course and print what the whole run will cost."""
+        plans = {week: self.plan(topics) for week, topics in week_topics.items()}
+
+        distinct = {key: query for plan in plans.values() for key, query in plan}
+        total = sum(len(plan) for plan in plans.values())
+        expected, worst = self.estimate(list(distinct.items()))
+        print(f"Planned {len(distinct)} distinct queries for {len(plans)} weeks "
+              f"({total - len(distinct)} shared between weeks), ~{expected}-{worst} quota units")
+        if self.quota_budget is not None and expected > self.remaining_budget():
+            print(f"⚠️  Plan may exceed the quota budget ({self.remaining_budget()} units left); "
+                  f"later weeks will stop early")
+        return plans
+
+    def query_cost(self) -> Tuple[int, int]:
+        """(expected, worst case) quota units of one query that isn't cached."""
+        expected = len(self.channels) * (SEARCH_COST + self.results_per_channel * VIDEOS_COST)
+        return expected, expected + SEARCH_COST + GENERAL_RESULTS * VIDEOS_COST
+
+    def estimate(self, planned: List[Tuple[str, str]]) -> Tuple[int, int]:
+        """(expected, worst case) quota units to run the uncached queries of a plan."""
+        uncached = sum(1 for key, _ in planned if key not in self._results)
+        expected, worst = self.query_cost()
+        return uncached * expected, uncached * worst
+
+    def remaining_budget(self) -> Optional[int]:
+        if self.quota_budget is None:
+            return None
+        return self.quota_budget - self.spent
+
+    def is_cached(self, key: str) -> bool:
+        return key in self._results
+
+    def search(self, key: str, query: str, search_fn: Callable[[str], List[Dict]]) -> List[Dict]:
+        """Run a planned query through search_fn, or reuse its results from an earlier week."""
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is None:
+                expected, worst = self.query_cost()
+                remaining = self.remaining_budget()
+                if remaining is not None and worst > remaining:
+                    raise QuotaBudgetExceeded(f"YouTube API quota budget exceeded ({self.spent} units used)")
+
+                results = search_fn(query)
+                fell_back = any(result.get('channel') not in self.channels for result in results)
+                self.spent += worst if fell_back else expected
+                cached = self._results[key] = [dict(result) for result in results]
+
+        # Callers annotate and re-rank results, so hand out copies
+        return [dict(result) for result in cached]
@@ -0,0 +1,207 @@
+"""
+Response cache for read-mostly JSON endpoints.
+
+Course, lesson and week-video data only changes when a content pipeline
+runs, so the serialized responses are cached per route + query string in an
+in-process LRU. An optional Redis layer (REDIS_URL) is shared between
+workers. Every response carries a strong ETag, and a matching If-None-Match
+gets a 304 without a body.
+
+Entries belong to a namespace ('courses', 'week_videos'). Committing ORM
+changes to the tables behind a namespace bumps its version automatically.
+Code that writes with Core statements (bulk upserts) calls
+invalidate(namespace) after commit. The pipelines run as separate processes,
+so versions live outside the app: in Redis when it is configured, otherwise
+as files under instance/response_cache/ (one stat per request). Cached
+entries from an older version are ignored.
+
+Usage in a view, after any per-request checks:
+
+    return response_cache.json_response('courses', lambda: ([...], 200))
+
+Data that changes with every request of other users (progress analytics) is
+not invalidated per write; pass max_age to serve it at most that many seconds
+old instead.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+from flask import Response, request, jsonify
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+COURSES = 'courses'          # Course, Lesson, Concept, Exercise
+WEEK_VIDEOS = 'week_videos'  # WeekVideo
+ANALYTICS = 'analytics'      # LessonProgress aggregates; expire by max_age, not per write
+
+# Tables whose ORM writes invalidate each namespace
+TABLE_NAMESPACES = {
+    'courses': COURSES,
+    'lessons': COURSES,
+    'concepts': COURSES,
+    'exercises': COURSES,
+    'week_videos': WEEK_VIDEOS,
+}
+
+DEFAULT_DIRECTORY = Path(__file__).resolve().parent / 'instance' / 'response_cache'
+MAX_ENTRIES = 512
+SHARED_TTL = 24 * 3600  # seconds; entries are invalidated by version anyway
+
+class FileVersions:
+    """Namespace versions as file stats, shared by every process on the host."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def version(self, namespace: str) -> str:
+        try:
+            stat = (self.directory / namespace).stat()
+        except FileNotFoundError:
+            return '0'
+        return f"{stat.st_mtime_ns}.{stat.st_ino}"
+
+    def bump(self, namespace: str):
+        # Replacing the file gives it a new inode, so two bumps within the
+        # mtime resolution still produce different versions
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.directory / f".{namespace}.{os.getpid()}.tmp"
+        temp_path.write_text(str(os.getpid()))
+        os.replace(temp_path, self.directory / namespace)
+
+class RedisStore:
+    """Shared entries and versions in Redis, for several app hosts."""
+
+    def __init__(self, url: str):
+        import redis  # optional; only needed when REDIS_URL is set
+        self.client = redis.Redis.from_url(url)
+
+    def version(self, namespace: str) -> str:
+        value = self.client.get(f'response_cache:version:{namespace}')
+        return value.decode() if value else '0'
+
+    def bump(self, namespace: str):
+        self.client.incr(f'response_cache:version:{namespace}')
+
+    def get(self, key: str) -> Optional[Tuple[str, str, str]]:
+        value = self.client.get(f'response_cache:entry:{key}')
+        return tuple(json.loads(value)) if value else None
+
+    def set(self, key: str, entry: Tuple[str, str, str]):
+        self.client.set(f'response_cache:entry:{key}', json.dumps(entry), ex=SHARED_TTL)
+
+class ResponseCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, versions=None, shared: Optional[RedisStore] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.versions = shared or versions or FileVersions(DEFAULT_DIRECTORY)
+        self.hits = 0
+        self.misses = 0
+        # key -> (version, etag, body)
+        self._entries: "OrderedDict[str, Tuple[str, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        redis_url = os.environ.get('REDIS_URL')
+        directory = os.environ.get('RESPONSE_CACHE_DIR', DEFAULT_DIRECTORY)
+        return cls(
+            max_entries=int(os.environ.get('RESPONSE_CACHE_ENTRIES', MAX_ENTRIES)),
+            versions=FileVersions(directory),
+            shared=RedisStore(redis_url) if redis_url else None
+        )
+
+    def _lookup(self, key: str, version: str) -> Optional[Tuple[str, str, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self._store(key, entry, share=False)
+        return entry if entry is not None and entry[0] == version else None
+
+    def _store(self, key: str, entry: Tuple[str, str, str], share: bool = True):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        if share and self.shared is not None:
+            self.shared.set(key, entry)
+
+    def json_response(self, namespace: str, build: Callable[[], Tuple[Any, int]],
+                      max_age: Optional[int] = None) -> Response:
+        """Cached JSON response for the current request; build() returns (payload, status).
+
+        Only 200 responses are cached; anything else is returned as built. With
+        max_age, an entry is also rebuilt once its max_age-second window is over.
+        """
+        key = f"{namespace}:{request.full_path}"
+        if max_age:
+            key += f"@{int(time.time() // max_age)}"
+        version = self.versions.version(namespace)
+
+        entry = self._lookup(key, version)
+        if entry is None:
+            self.misses += 1
+            payload, status = build()
+            response = jsonify(payload)
+            response.status_code = status
+            if status != 200:
+                return response
+            body = response.get_data(as_text=True)
+            entry = (version, hashlib.sha256(body.encode()).hexdigest()[:32], body)
+            self._store(key, entry)
+        else:
+            self.hits += 1
+
+        _, etag, body = entry
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, status=200, mimetype='application/json')
+        response.set_etag(etag)
+        # Behind authentication: browsers may keep it, but must revalidate every time
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def invalidate(self, *namespaces: str):
+        """Mark every cached response of these namespaces stale, in all processes."""
+        for namespace in namespaces:
+            self.versions.bump(namespace)
+        prefixes = tuple(f"{namespace}:" for namespace in namespaces)
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefixes)]:
+                del self._entries[key]
+
+response_cache = ResponseCache.from_env()
+
+def invalidate(*namespaces: str):
+    """Call after committing writes to the tables behind these namespaces."""
+    response_cache.invalidate(*namespaces)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_namespaces(session, flush_context):
+    changed = session.info.setdefault('response_cache_namespaces', set())
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        namespace = TABLE_NAMESPACES.get(getattr(instance, '__tablename__', None))
+        if namespace:
+            changed.add(namespace)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    changed = session.info.pop('response_cache_namespaces', None)
+    if changed:
+        invalidate(*changed)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_namespaces(session):
+    session.info.pop('response_cache_namespaces', None)
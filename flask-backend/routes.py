@@ -1,15 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from models import User, Course, Lesson, Progress, Concept, Exercise, UserCourse, LessonProgress, HomeworkAssignment, WeekVideo, db
+from models import User, Course, Lesson, Progress, Concept, Exercise, UserCourse, LessonProgress, CourseProgressSummary, HomeworkAssignment, WeekVideo, db
 from transcript_parser import TranscriptParser
 from course_data import get_course_info, get_available_courses, get_missing_prerequisites
-from homework_utils import process_homework_pdf
-from week_video_processor import WeekVideoProcessor
+from lazy_imports import homework_utils, pdfplumber, week_video_processor
+from response_cache import response_cache, ANALYTICS, COURSES, WEEK_VIDEOS
+from study_guide_content import study_guides
+from content_bundles import content_bundles, IMMUTABLE, REVALIDATE
+from search_index import search_index
+from lesson_progress import apply_progress_updates, check_lesson_keys, parse_progress_updates, OVERWRITE
+from progress_buffer import progress_buffer
+from progress_summary import active_lesson_total
+import course_analytics
 from datetime import datetime
+import serializers
 import json
 import os
 import tempfile
-import pdfplumber
+import time
 
 # Authentication Blueprint
 auth_bp = Blueprint('auth', __name__)
@@ -83,8 +91,10 @@ courses_bp = Blueprint('courses', __name__)
 def get_courses():
     """Get all active courses"""
     try:
-        courses = Course.query.filter_by(is_active=True).all()
-        return jsonify([course.to_dict() for course in courses]), 200
+        def build():
+            return serializers.course.rows(Course.is_active == True), 200
+        
+        return response_cache.json_response(COURSES, build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -93,14 +103,18 @@ def get_courses():
 def get_course(course_id):
     """Get specific course with lessons"""
     try:
-        course = Course.query.get(course_id)
-        if not course:
-            return jsonify({'error': 'Course not found'}), 404
-        
-        course_data = course.to_dict()
-        course_data['lessons'] = [lesson.to_dict() for lesson in course.lessons if lesson.is_active]
+        def build():
+            courses = serializers.course.rows(Course.id == course_id)
+            if not courses:
+                return {'error': 'Course not found'}, 404
+            
+            course_data = courses[0]
+            course_data['lessons'] = serializers.lesson_trees(
+                Lesson.course_id == course_id, Lesson.is_active == True, order_by=(Lesson.id,)
+            )
+            return course_data, 200
         
-        return jsonify(course_data), 200
+        return response_cache.json_response(COURSES, build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -109,8 +123,12 @@ def get_course(course_id):
 def get_course_lessons(course_id):
     """Get lessons for a specific course"""
     try:
-        lessons = Lesson.query.filter_by(course_id=course_id, is_active=True).order_by(Lesson.week, Lesson.order).all()
-        return jsonify([lesson.to_dict() for lesson in lessons]), 200
+        def build():
+            return serializers.lesson_trees(
+                Lesson.course_id == course_id, Lesson.is_active == True, order_by=(Lesson.week, Lesson.order)
+            ), 200
+        
+        return response_cache.json_response(COURSES, build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -122,11 +140,13 @@ lessons_bp = Blueprint('lessons', __name__)
 def get_lesson(lesson_id):
     """Get specific lesson with concepts and exercises"""
     try:
-        lesson = Lesson.query.get(lesson_id)
-        if not lesson:
-            return jsonify({'error': 'Lesson not found'}), 404
+        def build():
+            lessons = serializers.lesson_trees(Lesson.id == lesson_id)
+            if not lessons:
+                return {'error': 'Lesson not found'}, 404
+            return lessons[0], 200
         
-        return jsonify(lesson.to_dict()), 200
+        return response_cache.json_response(COURSES, build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -135,8 +155,10 @@ def get_lesson(lesson_id):
 def get_lesson_concepts(lesson_id):
     """Get concepts for a specific lesson"""
     try:
-        concepts = Concept.query.filter_by(lesson_id=lesson_id).order_by(Concept.order).all()
-        return jsonify([concept.to_dict() for concept in concepts]), 200
+        def build():
+            return serializers.concept.rows(Concept.lesson_id == lesson_id, order_by=(Concept.order,)), 200
+        
+        return response_cache.json_response(COURSES, build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -145,8 +167,10 @@ def get_lesson_concepts(lesson_id):
 def get_lesson_exercises(lesson_id):
     """Get exercises for a specific lesson"""
     try:
-        exercises = Exercise.query.filter_by(lesson_id=lesson_id).order_by(Exercise.order).all()
-        return jsonify([exercise.to_dict() for exercise in exercises]), 200
+        def build():
+            return serializers.exercise.rows(Exercise.lesson_id == lesson_id, order_by=(Exercise.order,)), 200
+        
+        return response_cache.json_response(COURSES, build)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -156,23 +180,28 @@ progress_bp = Blueprint('progress', __name__)
 @progress_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_user_progress():
-    """Get user's overall progress"""
+    """Get user's overall progress (?records=false skips the individual progress records)"""
     try:
         user_id = get_jwt_identity()
-        progress_records = Progress.query.filter_by(user_id=user_id).all()
+        progress_buffer.flush(int(user_id))
         
-        # Calculate overall statistics
-        total_lessons = Lesson.query.filter_by(is_active=True).count()
-        completed_lessons = Progress.query.filter_by(user_id=user_id, completed=True).distinct(Progress.lesson_id).count()
+        # Per-course counters, maintained on write (progress_summary.py)
+        summaries = CourseProgressSummary.query.filter_by(user_id=user_id).order_by(CourseProgressSummary.course_code).all()
+        completed_lessons = sum(summary.completed_course_lessons for summary in summaries)
+        total_lessons = active_lesson_total(db.session)
         
         overall_progress = (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
         
-        return jsonify({
+        response = {
             'overall_progress': round(overall_progress, 2),
             'completed_lessons': completed_lessons,
             'total_lessons': total_lessons,
-            'progress_records': [record.to_dict() for record in progress_records]
-        }), 200
+            'courses': [summary.to_dict() for summary in summaries]
+        }
+        if request.args.get('records', 'true').lower() != 'false':
+            response['progress_records'] = [record.to_dict() for record in Progress.query.filter_by(user_id=user_id)]
+        
+        return jsonify(response), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -182,6 +211,7 @@ def get_lesson_progress(lesson_id):
     """Get progress for a specific lesson"""
     try:
         user_id = get_jwt_identity()
+        progress_buffer.flush(int(user_id))
         progress_records = Progress.query.filter_by(user_id=user_id, lesson_id=lesson_id).all()
         
         return jsonify([record.to_dict() for record in progress_records]), 200
@@ -206,6 +236,16 @@ def update_progress():
         if not lesson_id:
             return jsonify({'error': 'Lesson ID is required'}), 400
         
+        if progress_buffer.enabled:
+            try:
+                queued = progress_buffer.add_progress(
+                    int(user_id), lesson_id, concept_id, exercise_id,
+                    completed=completed, score=score, time_spent=time_spent
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(queued), 202
+        
         # Check if progress record exists
         progress = Progress.query.filter_by(
             user_id=user_id,
@@ -506,6 +546,24 @@ def get_recommendations():
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@progress_bp.route('/buffer/metrics', methods=['GET'])
+@jwt_required()
+def get_progress_buffer_metrics():
+    """Write-behind buffer depth and flush latency (lists other users' rejected entries, so viewers only)"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if not course_analytics.can_view(user.email):
+            return jsonify({'error': 'Not allowed to view progress buffer metrics'}), 403
+        
+        return jsonify(progress_buffer.metrics()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Lesson Progress Blueprint
 lesson_progress_bp = Blueprint('lesson_progress', __name__)
 
@@ -523,6 +581,22 @@ def update_lesson_progress(course_code, lesson_id):
         data = request.get_json()
         completed = data.get('completed', False)
         progress = data.get('progress', 0)
+        try:
+            check_lesson_keys(course_code, [lesson_id])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if progress_buffer.enabled:
+            try:
+                updates = parse_progress_updates([{'lesson_id': lesson_id, 'progress': progress, 'completed': completed}],
+                                                 course_code)
+                queued = progress_buffer.add_lesson_updates(user.id, course_code, updates, mode=OVERWRITE)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify({
+                'message': 'Progress update queued',
+                'progress': dict(queued[lesson_id], lesson_id=lesson_id, course_code=course_code)
+            }), 202
         
         # Find existing progress record
         lesson_progress = LessonProgress.query.filter_by(
@@ -561,6 +635,58 @@ def update_lesson_progress(course_code, lesson_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@lesson_progress_bp.route('/<course_code>/lessons/progress', methods=['POST'])
+@jwt_required()
+def update_lesson_progress_batch(course_code):
+    """Update progress for many lessons at once; progress only ever moves forward"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        try:
+            updates = parse_progress_updates(data.get('updates'), course_code)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if progress_buffer.enabled:
+            progress_dict = progress_buffer.add_lesson_updates(user.id, course_code, updates)
+            return jsonify({
+                'message': f'Progress update queued for {len(progress_dict)} lessons',
+                'progress': progress_dict
+            }), 202
+        
+        progress_dict = apply_progress_updates(user.id, course_code, updates)
+        
+        return jsonify({
+            'message': f'Progress updated for {len(progress_dict)} lessons',
+            'progress': progress_dict
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@lesson_progress_bp.route('/<course_code>/lessons/progress/summary', methods=['GET'])
+@jwt_required()
+def get_lesson_progress_summary(course_code):
+    """Get a user's progress counters for a course: one row, no per-lesson records"""
+    try:
+        user_id = get_jwt_identity()
+        progress_buffer.flush(int(user_id))
+        
+        summary = CourseProgressSummary.query.filter_by(user_id=user_id, course_code=course_code).first()
+        if not summary:
+            summary = CourseProgressSummary(course_code=course_code, lessons_started=0, lessons_completed=0,
+                                            progress_total=0, completed_course_lessons=0)
+        
+        return jsonify({'summary': summary.to_dict()}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @lesson_progress_bp.route('/<course_code>/lessons/progress', methods=['GET'])
 @jwt_required()
 def get_lesson_progress(course_code):
@@ -572,6 +698,8 @@ def get_lesson_progress(course_code):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
+        progress_buffer.flush(user.id)
+        
         # Get all progress records for this user and course
         progress_records = LessonProgress.query.filter_by(
             user_id=user_id,
@@ -594,6 +722,32 @@ def get_lesson_progress(course_code):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@lesson_progress_bp.route('/<course_code>/analytics', methods=['GET'])
+@jwt_required()
+def get_course_analytics(course_code):
+    """Completion rates, progress histograms, medians and drop-off per lesson across all students"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if not course_analytics.can_view(user.email):
+            return jsonify({'error': 'Not allowed to view course analytics'}), 403
+        
+        page = request.args.get('page', 1, type=int)
+        per_page = request.args.get('per_page', course_analytics.DEFAULT_PER_PAGE, type=int)
+        if page < 1 or not 1 <= per_page <= course_analytics.MAX_PER_PAGE:
+            return jsonify({'error': f'page must be >= 1 and per_page 1-{course_analytics.MAX_PER_PAGE}'}), 400
+        
+        def build():
+            return course_analytics.course_analytics(db.session, course_code, page, per_page), 200
+        
+        return response_cache.json_response(ANALYTICS, build, max_age=course_analytics.CACHE_SECONDS)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Homework Blueprint
 homework_bp = Blueprint('homework', __name__)
 
@@ -644,35 +798,9 @@ def upload_homework(course_code):
         
         try:
             # Process the homework PDF
-            exercises_data = process_homework_pdf(temp_path, file.filename)
-            
-            # Check if user already has homework for this course
-            existing_homework = HomeworkAssignment.query.filter_by(
-                user_id=user_id,
-                course_code=course_code
-            ).first()
-            
-            if existing_homework:
-                # Update existing homework
-                existing_homework.title = exercises_data.get('title', 'Homework Assignment')
-                existing_homework.original_filename = file.filename
-                existing_homework.exercises_data = json.dumps(exercises_data)
-                existing_homework.total_problems = len(exercises_data.get('problems', []))
-                existing_homework.uploaded_at = datetime.utcnow()
-                existing_homework.updated_at = datetime.utcnow()
-            else:
-                # Create new homework assignment
-                homework = HomeworkAssignment(
-                    user_id=user_id,
-                    course_code=course_code,
-                    title=exercises_data.get('title', 'Homework Assignment'),
-                    original_filename=file.filename,
-                    exercises_data=json.dumps(exercises_data),
-                    total_problems=len(exercises_data.get('problems', []))
-                )
-                db.session.add(homework)
+            exercises_data = homework_utils.process_homework_pdf(temp_path, file.filename)
             
-            db.session.commit()
+            save_homework_assignment(user_id, course_code, file.filename, exercises_data)
             
             return jsonify({
                 'success': True,
@@ -692,6 +820,103 @@ def upload_homework(course_code):
             'message': str(e)
         }), 500
 
+@homework_bp.route('/<course_code>/homework/upload/stream', methods=['POST'])
+@jwt_required()
+def upload_homework_stream(course_code):
+    """Upload a homework PDF and stream problems back as newline-delimited JSON as they are generated"""
+    try:
+        user_id = get_jwt_identity()
+        user = User.query.get(user_id)
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if 'file' not in request.files:
+            return jsonify({
+                'error': 'No file provided',
+                'message': 'Please include a PDF file in the \'file\' field'
+            }), 400
+        
+        file = request.files['file']
+        
+        if file.filename == '':
+            return jsonify({
+                'error': 'No file selected',
+                'message': 'Please select a PDF file to upload'
+            }), 400
+        
+        if not file.filename.lower().endswith('.pdf'):
+            return jsonify({
+                'error': 'Invalid file type',
+                'message': 'Only PDF files are allowed'
+            }), 400
+        
+        # Save file temporarily
+        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
+            file.save(temp_file.name)
+            temp_path = temp_file.name
+        filename = file.filename
+        
+    except Exception as e:
+        return jsonify({
+            'error': 'Internal server error',
+            'message': str(e)
+        }), 500
+    
+    def generate():
+        timing = {}
+        try:
+            for event, payload in homework_utils.stream_homework_pdf(temp_path, filename, timing):
+                if event == 'problem':
+                    yield json.dumps({'event': 'problem', 'problem': payload}) + '\n'
+                else:
+                    save_homework_assignment(user_id, course_code, filename, payload)
+                    yield json.dumps({
+                        'event': 'done',
+                        'data': payload,
+                        'timing': timing,
+                        'message': f'Successfully processed {filename} and generated {len(payload.get("problems", []))} problems'
+                    }) + '\n'
+        except Exception as e:
+            db.session.rollback()
+            yield json.dumps({'event': 'error', 'error': 'Internal server error', 'message': str(e)}) + '\n'
+        finally:
+            # Clean up temporary file
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+def save_homework_assignment(user_id, course_code, filename, exercises_data):
+    """Create or replace the user's homework assignment for a course"""
+    # Check if user already has homework for this course
+    existing_homework = HomeworkAssignment.query.filter_by(
+        user_id=user_id,
+        course_code=course_code
+    ).first()
+    
+    if existing_homework:
+        # Update existing homework
+        existing_homework.title = exercises_data.get('title', 'Homework Assignment')
+        existing_homework.original_filename = filename
+        existing_homework.exercises_data = json.dumps(exercises_data)
+        existing_homework.total_problems = len(exercises_data.get('problems', []))
+        existing_homework.uploaded_at = datetime.utcnow()
+        existing_homework.updated_at = datetime.utcnow()
+    else:
+        # Create new homework assignment
+        homework = HomeworkAssignment(
+            user_id=user_id,
+            course_code=course_code,
+            title=exercises_data.get('title', 'Homework Assignment'),
+            original_filename=filename,
+            exercises_data=json.dumps(exercises_data),
+            total_problems=len(exercises_data.get('problems', []))
+        )
+        db.session.add(homework)
+    
+    db.session.commit()
+
 @homework_bp.route('/<course_code>/homework', methods=['GET'])
 @jwt_required()
 def get_homework(course_code):
@@ -776,23 +1001,27 @@ def get_week_videos(course_code, week_number):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get videos from database
-        videos = WeekVideo.query.filter_by(
-            course_code=course_code.upper(),
-            week_number=week_number
-        ).order_by(WeekVideo.relevance_score.desc()).all()
-        
-        if not videos:
-            return jsonify({
-                'message': f'No videos found for {course_code} Week {week_number}',
-                'videos': []
-            }), 200
+        def build():
+            # Get videos from database
+            videos = serializers.week_video.rows(
+                WeekVideo.course_code == course_code.upper(),
+                WeekVideo.week_number == week_number,
+                order_by=(WeekVideo.relevance_score.desc(),)
+            )
+            
+            if not videos:
+                return {
+                    'message': f'No videos found for {course_code} Week {week_number}',
+                    'videos': []
+                }, 200
+            
+            return {
+                'course_code': course_code.upper(),
+                'week_number': week_number,
+                'videos': videos
+            }, 200
         
-        return jsonify({
-            'course_code': course_code.upper(),
-            'week_number': week_number,
-            'videos': [video.to_dict() for video in videos]
-        }), 200
+        return response_cache.json_response(WEEK_VIDEOS, build)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -808,25 +1037,29 @@ def get_course_videos(course_code):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get all videos for the course
-        videos = WeekVideo.query.filter_by(
-            course_code=course_code.upper()
-        ).order_by(WeekVideo.week_number, WeekVideo.relevance_score.desc()).all()
-        
-        # Organize by week
-        videos_by_week = {}
-        for video in videos:
-            week_num = video.week_number
-            if week_num not in videos_by_week:
-                videos_by_week[week_num] = []
-            videos_by_week[week_num].append(video.to_dict())
+        def build():
+            # Get all videos for the course
+            videos = serializers.week_video.rows(
+                WeekVideo.course_code == course_code.upper(),
+                order_by=(WeekVideo.week_number, WeekVideo.relevance_score.desc())
+            )
+            
+            # Organize by week
+            videos_by_week = {}
+            for video in videos:
+                week_num = video['week_number']
+                if week_num not in videos_by_week:
+                    videos_by_week[week_num] = []
+                videos_by_week[week_num].append(video)
+            
+            return {
+                'course_code': course_code.upper(),
+                'videos_by_week': videos_by_week,
+                'total_weeks': len(videos_by_week),
+                'total_videos': len(videos)
+            }, 200
         
-        return jsonify({
-            'course_code': course_code.upper(),
-            'videos_by_week': videos_by_week,
-            'total_weeks': len(videos_by_week),
-            'total_videos': len(videos)
-        }), 200
+        return response_cache.json_response(WEEK_VIDEOS, build)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -855,7 +1088,7 @@ def generate_week_videos(course_code):
         
         # Initialize video processor
         try:
-            processor = WeekVideoProcessor()
+            processor = week_video_processor.WeekVideoProcessor()
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         
@@ -912,7 +1145,7 @@ def generate_single_week_videos(course_code, week_number):
         
         # Initialize video processor
         try:
-            processor = WeekVideoProcessor()
+            processor = week_video_processor.WeekVideoProcessor()
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         
@@ -958,3 +1191,88 @@ def generate_single_week_videos(course_code, week_number):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+# Study Guide Content Blueprint
+content_bp = Blueprint('content', __name__)
+
+@content_bp.route('/<course_code>', methods=['GET'])
+def get_course_content(course_code):
+    """Get a course's prebuilt content bundle: every week's lessons, topics and videos"""
+    try:
+        entry = content_bundles.current(course_code)
+        response = content_bundles.send(entry['file'], REVALIDATE) if entry else None
+        if response is None:
+            return jsonify({'error': f'No content bundle built for {course_code.upper()}'}), 404
+        # Clients that cache by URL can switch to the immutable one
+        response.headers['Content-Location'] = url_for('content.get_content_bundle', name=entry['file'])
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/bundles/<name>', methods=['GET'])
+def get_content_bundle(name):
+    """Get a content bundle by its hashed file name; never changes, so cached for a year"""
+    try:
+        response = content_bundles.send(name, IMMUTABLE)
+        if response is None:
+            return jsonify({'error': 'Content bundle not found'}), 404
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@content_bp.route('/<course_code>/<int:week>', methods=['GET'])
+def get_study_guide_content(course_code, week):
+    """Get a week's study guide sections as HTML lessons"""
+    try:
+        guide = study_guides.week(course_code, week)
+        if guide is None:
+            return jsonify({'error': f'Study guide for {course_code.upper()} week {week} not found'}), 404
+        
+        etag, lessons = guide
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = jsonify({'lessons': lessons})
+        response.set_etag(etag)
+        # Study guides are public; let browsers keep them but revalidate
+        response.headers['Cache-Control'] = 'public, no-cache'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Search Blueprint
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('', methods=['GET'])
+@jwt_required()
+def search():
+    """Search study guides, concepts and the user's homework; ?q=...&course=...&limit=...&offset=..."""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Query parameter q is required'}), 400
+        
+        limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        
+        start = time.perf_counter()
+        search_index.refresh_guides_if_due()
+        results = search_index.search(
+            query,
+            user_id=int(get_jwt_identity()),
+            course_code=request.args.get('course'),
+            limit=limit,
+            offset=offset
+        )
+        
+        return jsonify({
+            'query': query,
+            'results': results,
+            'took_ms': round((time.perf_counter() - start) * 1000, 1)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
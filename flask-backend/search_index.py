@@ -0,0 +1,349 @@
+"""
+Search Index - full-text search over study guides, concepts and homework.
+
+A SQLite FTS5 index (instance/search_index.sqlite3, separate from the app
+database so it works the same on PostgreSQL) holds one document per:
+
+- study guide section of <COURSE>_New/W*/study_guide.md (ref: lesson id "<week>-<n>")
+- Concept row (ref: concept id)
+- homework problem in HomeworkAssignment.exercises_data (ref: "<assignment id>:<problem number>"),
+  visible only to the assignment's user
+
+Every document belongs to a source (one guide file, one row) with a
+signature, so updates are incremental:
+
+- write_week_outputs() reindexes a guide as the pipelines write it, and the
+  search endpoint re-stats all guides at most every REFRESH_INTERVAL seconds
+  to pick up guides written any other way
+- committing Concept / HomeworkAssignment changes through the ORM reindexes
+  those rows (session events, like response_cache)
+- build_search_index.py backfills or rebuilds everything
+
+Results are ranked with BM25, titles weighted above bodies, and come back
+with an HTML-escaped snippet around the matches.
+"""
+
+import os
+import re
+import html
+import json
+import hashlib
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from study_guide_content import split_sections, DEFAULT_ROOT
+from topic_scanner import WEEK_FOLDER
+
+DEFAULT_PATH = Path(__file__).resolve().parent / 'instance' / 'search_index.sqlite3'
+REFRESH_INTERVAL = 30  # seconds between guide re-stats from the search endpoint
+
+GUIDE, CONCEPT, HOMEWORK = 'study_guide', 'concept', 'homework'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    signature TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents USING fts5(
+    title, body,
+    source UNINDEXED, kind UNINDEXED, course_code UNINDEXED, week UNINDEXED, ref UNINDEXED, user_id UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+"""
+
+# BM25 column weights: title, body
+TITLE_WEIGHT, BODY_WEIGHT = 5.0, 1.0
+SNIPPET_TOKENS = 16
+MAX_QUERY_TERMS = 12
+
+# Markdown punctuation that shouldn't show up in snippets
+MARKUP = re.compile(r'[*`#>→]+')
+QUERY_TERM = re.compile(r'\w+')
+
+# Placeholders for the highlight markers, swapped for <mark> after escaping
+MARK_START, MARK_END = '\x02', '\x03'
+
+# (title, body, week, ref)
+Document = Tuple[str, str, Optional[int], str]
+
+def content_signature(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()[:16]
+
+def plain_text(markdown_text: str) -> str:
+    return ' '.join(MARKUP.sub(' ', markdown_text).split())
+
+def match_expression(query: str) -> str:
+    """FTS5 MATCH expression for free text: every term must match, the last one as a prefix."""
+    terms = QUERY_TERM.findall(query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def guide_documents(week: int, content: str) -> List[Document]:
+    """One document per "## " section, numbered like the content API's lesson ids."""
+    return [
+        (title, plain_text(body), week, f"{week}-{number}")
+        for number, (title, body) in enumerate(split_sections(content), start=1)
+        if title and body.strip()
+    ]
+
+def concept_documents(concept_id: int, week: Optional[int], title: str, content: Optional[str],
+                      analogy: Optional[str]) -> List[Document]:
+    body = ' '.join(text for text in (content, analogy) if text)
+    return [(title, plain_text(body), week, str(concept_id))]
+
+def homework_documents(assignment_id: int, exercises_data: str) -> List[Document]:
+    """One document per problem: its title, learning notes, parts and check-your-understanding."""
+    try:
+        problems = json.loads(exercises_data).get('problems', [])
+    except (ValueError, AttributeError):
+        return []
+
+    documents = []
+    for problem in problems:
+        texts = [text for notes in problem.get('learning_notes', {}).values() for text in notes]
+        for part in problem.get('parts', []):
+            texts.append(part.get('description', ''))
+            texts.extend(part.get('key_information', []))
+            texts.extend(part.get('leading_questions', []))
+        texts.append(problem.get('check_understanding', ''))
+        documents.append((problem.get('title', ''), plain_text(' '.join(texts)), None,
+                          f"{assignment_id}:{problem.get('number', '')}"))
+    return documents
+
+class SearchIndex:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._last_refresh: Dict[str, float] = {}
+
+    @classmethod
+    def from_env(cls) -> "SearchIndex":
+        return cls(os.environ.get('SEARCH_INDEX_PATH', DEFAULT_PATH))
+
+    def connection(self) -> sqlite3.Connection:
+        """This thread's connection, creating the index on first use."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    # Writing
+
+    def signatures(self, prefix: str) -> Dict[str, str]:
+        # Range scan on the primary key: prefix <= source < prefix with its last character bumped
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        rows = self.connection().execute(
+            'SELECT source, signature FROM sources WHERE source >= ? AND source < ?', (prefix, upper)
+        )
+        return dict(rows)
+
+    def replace_source(self, source: str, signature: str, kind: str, course_code: Optional[str],
+                       documents: Iterable[Document], user_id: Optional[int] = None):
+        """Swap a source's documents for new ones, in one transaction."""
+        connection = self.connection()
+        with connection:
+            connection.execute('DELETE FROM documents WHERE source = ?', (source,))
+            connection.executemany(
+                'INSERT INTO documents (title, body, source, kind, course_code, week, ref, user_id) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(title, body, source, kind, course_code, week, ref, user_id) for title, body, week, ref in documents]
+            )
+            connection.execute('INSERT OR REPLACE INTO sources (source, signature) VALUES (?, ?)', (source, signature))
+
+    def remove_source(self, source: str):
+        connection = self.connection()
+        with connection:
+            connection.execute('DELETE FROM documents WHERE source = ?', (source,))
+            connection.execute('DELETE FROM sources WHERE source = ?', (source,))
+
+    def index_guide(self, path, course_code: str, week: int, signature: Optional[str] = None):
+        path = Path(path)
+        if signature is None:
+            stat = path.stat()
+            signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+        documents = guide_documents(week, path.read_text(encoding='utf-8'))
+        self.replace_source(f"{GUIDE}:{course_code}:{week}", signature, GUIDE, course_code, documents)
+
+    def refresh_guides(self, root=DEFAULT_ROOT) -> int:
+        """Reindex the study guides under root that changed since they were indexed; returns how many."""
+        indexed = self.signatures(f"{GUIDE}:")
+        found = set()
+        changed = 0
+        for path in Path(root).glob("*_New/*/study_guide.md"):
+            match = WEEK_FOLDER.match(path.parent.name)
+            if not match:
+                continue
+            course_code, week = path.parent.parent.name[:-len("_New")], int(match.group(1))
+            if path.parent.name.startswith('w') and (path.parent.parent / f"W{week}" / 'study_guide.md').exists():
+                continue  # W<week> wins over w<week>, as in StudyGuideContent.guide_path
+            source = f"{GUIDE}:{course_code}:{week}"
+            found.add(source)
+
+            stat = path.stat()
+            signature = f"{stat.st_mtime_ns}:{stat.st_size}"
+            if indexed.get(source) != signature:
+                self.index_guide(path, course_code, week, signature)
+                changed += 1
+
+        for source in indexed.keys() - found:
+            self.remove_source(source)
+        return changed
+
+    def refresh_database(self, session) -> int:
+        """Reindex the Concept and HomeworkAssignment rows that changed; returns how many."""
+        from models import Course, Lesson, Concept, HomeworkAssignment
+
+        changed = 0
+        concepts = session.execute(
+            select(Concept.id, Concept.title, Concept.content, Concept.analogy, Course.code, Lesson.week)
+            .join_from(Concept, Lesson, Concept.lesson_id == Lesson.id)
+            .join(Course, Lesson.course_id == Course.id)
+        )
+        indexed = self.signatures(f"{CONCEPT}:")
+        found = set()
+        for concept_id, title, content, analogy, course_code, week in concepts:
+            source = f"{CONCEPT}:{concept_id}"
+            found.add(source)
+            signature = content_signature(course_code, week, title, content, analogy)
+            if indexed.get(source) != signature:
+                self.replace_source(source, signature, CONCEPT, course_code,
+                                    concept_documents(concept_id, week, title, content, analogy))
+                changed += 1
+        for source in indexed.keys() - found:
+            self.remove_source(source)
+
+        assignments = session.execute(select(
+            HomeworkAssignment.id, HomeworkAssignment.user_id, HomeworkAssignment.course_code,
+            HomeworkAssignment.exercises_data
+        ))
+        indexed = self.signatures(f"{HOMEWORK}:")
+        found = set()
+        for assignment_id, user_id, course_code, exercises_data in assignments:
+            source = f"{HOMEWORK}:{assignment_id}"
+            found.add(source)
+            signature = content_signature(user_id, course_code, exercises_data)
+            if indexed.get(source) != signature:
+                self.replace_source(source, signature, HOMEWORK, course_code,
+                                    homework_documents(assignment_id, exercises_data), user_id)
+                changed += 1
+        for source in indexed.keys() - found:
+            self.remove_source(source)
+        return changed
+
+    def refresh_guides_if_due(self, root=DEFAULT_ROOT):
+        """refresh_guides() at most once per REFRESH_INTERVAL in this process."""
+        key = str(root)
+        now = time.monotonic()
+        if now - self._last_refresh.get(key, float('-inf')) >= REFRESH_INTERVAL:
+            self._last_refresh[key] = now
+            self.refresh_guides(root)
+
+    # Searching
+
+    def search(self, query: str, user_id: Optional[int] = None, course_code: Optional[str] = None,
+               limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Best matches first: public documents plus the user's own homework."""
+        expression = match_expression(query)
+        if not expression:
+            return []
+
+        sql = (
+            "SELECT kind, course_code, week, ref, title, "
+            f"snippet(documents, 1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_TOKENS}), "
+            f"bm25(documents, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank "
+            "FROM documents WHERE documents MATCH ? AND (user_id IS NULL OR user_id = ?)"
+        )
+        parameters = [expression, user_id]
+        if course_code:
+            sql += " AND course_code = ?"
+            parameters.append(course_code.upper())
+        sql += " ORDER BY rank LIMIT ? OFFSET ?"
+        parameters += [limit, offset]
+
+        return [
+            {
+                'kind': kind,
+                'course_code': course,
+                'week': week,
+                'ref': ref,
+                'title': title,
+                'snippet': html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'),
+                'score': round(-rank, 4)
+            }
+            for kind, course, week, ref, title, snippet, rank in self.connection().execute(sql, parameters)
+        ]
+
+search_index = SearchIndex.from_env()
+
+def index_study_guide(path, course_code: str, week: int):
+    """Call after writing a study guide so it is searchable right away."""
+    try:
+        search_index.index_guide(path, course_code, week)
+    except (OSError, sqlite3.Error) as e:
+        # The endpoint's periodic refresh will pick it up
+        print(f"⚠️  Could not index {path}: {e}")
+
+# Keep concepts and homework in sync with committed ORM changes
+
+def _row_update(session, instance) -> Optional[Tuple[str, Optional[tuple]]]:
+    """(source, replace_source args or None to remove) for a changed Concept / HomeworkAssignment."""
+    table = getattr(instance, '__tablename__', None)
+    if table == 'concepts':
+        source = f"{CONCEPT}:{instance.id}"
+        if instance in session.deleted:
+            return source, None
+        from models import Course, Lesson
+        row = session.connection().execute(
+            select(Course.code, Lesson.week).join_from(Lesson, Course, Lesson.course_id == Course.id)
+            .where(Lesson.id == instance.lesson_id)
+        ).first()
+        course_code, week = row if row else (None, None)
+        documents = concept_documents(instance.id, week, instance.title, instance.content, instance.analogy)
+        signature = content_signature(course_code, week, instance.title, instance.content, instance.analogy)
+        return source, (source, signature, CONCEPT, course_code, documents)
+    if table == 'homework_assignments':
+        source = f"{HOMEWORK}:{instance.id}"
+        if instance in session.deleted:
+            return source, None
+        documents = homework_documents(instance.id, instance.exercises_data)
+        signature = content_signature(instance.user_id, instance.course_code, instance.exercises_data)
+        return source, (source, signature, HOMEWORK, instance.course_code, documents, instance.user_id)
+    return None
+
+@event.listens_for(Session, 'after_flush')
+def _collect_updates(session, flush_context):
+    pending = session.info.setdefault('search_index_updates', {})
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        update = _row_update(session, instance)
+        if update:
+            pending[update[0]] = update[1]
+
+@event.listens_for(Session, 'after_commit')
+def _apply_updates(session):
+    pending = session.info.pop('search_index_updates', None)
+    for source, arguments in (pending or {}).items():
+        try:
+            if arguments is None:
+                search_index.remove_source(source)
+            else:
+                search_index.replace_source(*arguments)
+        except sqlite3.Error as e:
+            print(f"⚠️  Could not update search index for {source}: {e}")
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_updates(session):
+    session.info.pop('search_index_updates', None)
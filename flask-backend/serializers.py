@@ -0,0 +1,145 @@
+"""
+Serializers - fast JSON-ready dicts for the course and video API responses.
+
+Model.to_dict() reads every attribute through the ORM, one at a time, calls
+.isoformat() per datetime and json.loads() per exercise's hints. These
+serializers are compiled once per model instead:
+
+- the fields are the model's columns, in the order to_dict() lists them
+- only the columns that need it get a converter (datetimes, hints)
+- rows() selects the columns as plain tuples, skipping ORM objects altogether,
+  and zips them straight into dicts
+
+The output is the same as to_dict(); benchmark_serialization.py checks that
+and measures the difference.
+
+install_json_provider() swaps Flask's stdlib JSON encoder for orjson when it
+is installed.
+"""
+
+import json
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import DateTime, select
+
+from models import db, Course, Lesson, Concept, Exercise, WeekVideo
+
+def isoformat(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+@lru_cache(maxsize=4096)
+def _parse_hints(hints: str) -> tuple:
+    return tuple(json.loads(hints))
+
+def parse_hints(hints: Optional[str]) -> List[Any]:
+    """Exercise hints (a JSON string column) as a list; exercises share a few hint strings."""
+    return list(_parse_hints(hints)) if hints else []
+
+class ModelSerializer:
+    """to_dict() for one model, compiled from its columns."""
+
+    def __init__(self, model, converters: Optional[Dict[str, Callable]] = None):
+        self.model = model
+        table_columns = list(model.__table__.columns)
+        self.fields = tuple(column.key for column in table_columns)
+        self.columns = tuple(getattr(model, field) for field in self.fields)
+
+        converters = dict(converters or {})
+        for column in table_columns:
+            if isinstance(column.type, DateTime):
+                converters.setdefault(column.key, isoformat)
+        self._converters = tuple(
+            (index, converters[field]) for index, field in enumerate(self.fields) if field in converters
+        )
+        self._values = attrgetter(*self.fields)
+
+    def from_row(self, row) -> Dict[str, Any]:
+        """Dict of one row of self.columns."""
+        if self._converters:
+            row = list(row)
+            for index, convert in self._converters:
+                row[index] = convert(row[index])
+        return dict(zip(self.fields, row))
+
+    def __call__(self, instance) -> Dict[str, Any]:
+        """Dict of a loaded model instance."""
+        return self.from_row(self._values(instance))
+
+    def many(self, instances) -> List[Dict[str, Any]]:
+        return [self.from_row(self._values(instance)) for instance in instances]
+
+    def rows(self, *criteria, order_by=()) -> List[Dict[str, Any]]:
+        """Dicts of the rows matching criteria, selected as tuples without building ORM objects."""
+        statement = select(*self.columns).where(*criteria).order_by(*order_by)
+        return [self.from_row(row) for row in db.session.execute(statement)]
+
+course = ModelSerializer(Course)
+lesson = ModelSerializer(Lesson)
+concept = ModelSerializer(Concept)
+exercise = ModelSerializer(Exercise, {'hints': parse_hints})
+week_video = ModelSerializer(WeekVideo)
+
+def lesson_trees(*criteria, order_by=()) -> List[Dict[str, Any]]:
+    """Lesson.to_dict() of the matching lessons, concepts and exercises included, in three queries."""
+    lessons = lesson.rows(*criteria, order_by=order_by)
+    if not lessons:
+        return []
+
+    children = {row['id']: ([], []) for row in lessons}
+    lesson_ids = list(children)
+    for row in concept.rows(Concept.lesson_id.in_(lesson_ids), order_by=(Concept.id,)):
+        children[row['lesson_id']][0].append(row)
+    for row in exercise.rows(Exercise.lesson_id.in_(lesson_ids), order_by=(Exercise.id,)):
+        children[row['lesson_id']][1].append(row)
+
+    for row in lessons:
+        row['concepts'], row['exercises'] = children[row['id']]
+    return lessons
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, with the same output rules as the default one.
+
+    Keys are sorted and int keys stringified like the stdlib encoder does, and
+    datetimes, Decimals etc. go through Flask's own fallback. Calls with extra
+    json.dumps() arguments are handed to the stdlib provider.
+    """
+
+    def __init__(self, app, orjson):
+        super().__init__(app)
+        self.orjson = orjson
+
+    def _options(self, pretty: bool = False) -> int:
+        options = self.orjson.OPT_NON_STR_KEYS | self.orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= self.orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= self.orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.orjson.dumps(obj, default=self.default, option=self._options()).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return self.orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        body = self.orjson.dumps(obj, default=self.default, option=self._options(pretty))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+def install_json_provider(app) -> bool:
+    """Use orjson for app.json when it is installed; returns whether it is."""
+    try:
+        import orjson  # optional; the stdlib encoder is used without it
+    except ImportError:
+        return False
+    app.json = OrjsonProvider(app, orjson)
+    return True
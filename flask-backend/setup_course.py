@@ -3,7 +3,8 @@
 Course Setup Script
 
 This script provides an easy interface to set up a new course with materials.
-It combines downloading materials and running PDF extraction.
+It combines downloading materials and running PDF extraction, using the
+in-process pipeline in course_pipeline.py.
 
 Usage:
     python setup_course.py <COURSE_CODE>
@@ -15,29 +16,13 @@ Example:
 
 import os
 import sys
-import subprocess
 import argparse
-from pathlib import Path
 
 # Add current directory to path to import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from course_data import COURSE_WEBSITES, get_course_info
-from course_material_downloader import CourseMaterialDownloader
-
-def run_command(command, description):
-    """Run a command and handle errors"""
-    print(f"\n🔄 {description}...")
-    try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print(f"✅ {description} completed successfully")
-        if result.stdout:
-            print(result.stdout)
-        return True
-    except subprocess.CalledProcessError as e:
-        print(f"❌ {description} failed:")
-        print(f"Error: {e.stderr}")
-        return False
+from course_pipeline import run_pipeline
 
 def setup_course(course_code: str, skip_download: bool = False, skip_extraction: bool = False):
     """Set up a complete course with materials and study guides"""
@@ -58,59 +43,34 @@ def setup_course(course_code: str, skip_download: bool = False, skip_extraction:
     print(f"🌐 Website: {course_info['website']}")
     print(f"📂 Category: {course_info['category']}")
     
-    # Step 1: Download materials
+    # Steps 1-2: Download materials and generate study guides in-process
+    stages = []
     if not skip_download:
-        print(f"\n📥 Step 1: Downloading materials for {course_code}")
-        downloader = CourseMaterialDownloader(course_code)
-        if not downloader.run():
-            print(f"❌ Failed to download materials for {course_code}")
-            return False
-        print(f"✅ Materials downloaded to {course_code}/ directory")
+        stages.append("download")
     else:
         print(f"⏭️  Skipping download step")
-    
-    # Step 2: Run PDF extraction
     if not skip_extraction:
-        print(f"\n🧠 Step 2: Generating study guides for {course_code}")
-        
-        # Check if we have the extraction script
-        extraction_script = Path("lecture_pdf_extraction.py")
-        if not extraction_script.exists():
-            print(f"❌ PDF extraction script not found: {extraction_script}")
-            return False
-        
-        # Check if we have any PDFs to extract
-        course_dir = Path(f"../{course_code}")
-        has_pdfs = False
-        if course_dir.exists():
-            for week_dir in course_dir.glob("W*"):
-                if week_dir.is_dir():
-                    for file in week_dir.glob("*.pdf"):
-                        has_pdfs = True
-                        break
-                if has_pdfs:
-                    break
-        
-        if not has_pdfs:
-            print(f"⚠️  No PDF files found in {course_code}/ directory")
-            print(f"📝 Study guides will contain placeholder content")
-            print(f"💡 You can manually add PDFs to the week directories and re-run extraction")
-        else:
-            # Run extraction
-            if not run_command(f"python lecture_pdf_extraction.py {course_code}", 
-                              f"PDF extraction for {course_code}"):
-                print(f"⚠️  PDF extraction failed, but placeholder study guides were created")
-        
-        print(f"✅ Study guides available in {course_code}_New/ directory")
+        stages.extend(["extract", "summarize"])
     else:
         print(f"⏭️  Skipping extraction step")
     
-    # Step 3: Create API route (optional)
+    if stages:
+        print(f"\n🧠 Running {', '.join(stages)} for {course_code}")
+        report = run_pipeline([course_code], stages=stages)
+        if any(task["stage"] == "download" and task["status"] == "failed" for task in report["tasks"]):
+            print(f"❌ Failed to download materials for {course_code}")
+            return False
+        if report["failed"]:
+            print(f"⚠️  {report['failed']} pipeline tasks failed, see {report['report_file']}")
+        print(f"✅ Study guides available in {course_code}_New/ directory")
+    
+    # Step 3: Frontend integration
     print(f"\n🔧 Step 3: Next steps for frontend integration")
     print(f"To add {course_code} support to the frontend:")
-    print(f"1. Create API route: nextjs-frontend/src/app/api/{course_code.lower()}/content/[week]/route.ts")
+    print(f"1. The Flask API already serves it: http://localhost:5001/api/content/{course_code}/<week>")
     print(f"2. Update CourseDetail.tsx to include {course_code} in supported courses")
-    print(f"3. Test the course in the frontend")
+    print(f"3. Rebuild bundles and search: python build_content_bundles.py {course_code} && python build_search_index.py")
+    print(f"4. Test the course in the frontend")
     
     print(f"\n🎉 Course setup completed for {course_code}!")
     return True
@@ -3,27 +3,60 @@
 Batch Course Setup Script
 
 This script can set up multiple courses at once, useful for setting up
-all courses in a category or a custom list.
+all courses in a category or a custom list. Courses are run through the
+in-process pipeline in course_pipeline.py; a JSON run report is written to
+pipeline_runs/.
 
 Usage:
     python setup_multiple_courses.py --category "CS Core"
     python setup_multiple_courses.py --courses "CS61A,CS61B,CS61C"
     python setup_multiple_courses.py --all
+    python setup_multiple_courses.py --all --batch
 """
 
 import os
 import sys
 import argparse
-import time
-from pathlib import Path
+from typing import List
 
 # Add current directory to path to import our modules
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from course_data import COURSE_WEBSITES, COURSE_CATEGORIES
-from setup_course import setup_course
+from course_pipeline import DOWNLOAD_INTERVAL, STAGE_LIMITS, run_pipeline
+from batch_build_study_guides import build_study_guides_batch
 
-def setup_courses_in_category(category: str, skip_download: bool = False, skip_extraction: bool = False):
+def setup_courses(courses: List[str], skip_download: bool = False, skip_extraction: bool = False,
+                  batch: bool = False, workers: int = 4, download_interval: float = DOWNLOAD_INTERVAL,
+                  summarize_concurrency: int = STAGE_LIMITS["summarize"]):
+    """Download and build study guides for courses through the in-process course pipeline
+
+    Downloads wait download_interval seconds between courses to be respectful to servers.
+    """
+    stages = []
+    if not skip_download:
+        stages.append("download")
+    if not skip_extraction and not batch:
+        stages.extend(["extract", "summarize"])
+    
+    failed_courses = set()
+    if stages:
+        report = run_pipeline(courses, stages=stages, workers=workers, download_interval=download_interval,
+                              summarize_concurrency=summarize_concurrency)
+        failed_courses = {task["course"] for task in report["tasks"] if task["status"] in ("failed", "skipped")}
+    
+    # In batch mode the study guides are built for all courses together afterwards
+    if batch and not skip_extraction:
+        print(f"\n🧠 Building study guides for {len(courses)} courses in batch mode")
+        if not build_study_guides_batch(courses):
+            failed_courses.update(courses)
+    
+    success_count = len(courses) - len(failed_courses)
+    print(f"\n🎉 Completed! {success_count}/{len(courses)} courses set up successfully")
+    return success_count == len(courses)
+
+def setup_courses_in_category(category: str, skip_download: bool = False, skip_extraction: bool = False,
+                              batch: bool = False, workers: int = 4, **pipeline_options):
     """Set up all courses in a specific category"""
     if category not in COURSE_CATEGORIES:
         print(f"❌ Category '{category}' not found")
@@ -34,27 +67,10 @@ def setup_courses_in_category(category: str, skip_download: bool = False, skip_e
     
     courses = COURSE_CATEGORIES[category]
     print(f"📚 Setting up {len(courses)} courses in category: {category}")
-    
-    success_count = 0
-    for i, course in enumerate(courses, 1):
-        print(f"\n{'='*60}")
-        print(f"📖 Course {i}/{len(courses)}: {course}")
-        print(f"{'='*60}")
-        
-        if setup_course(course, skip_download, skip_extraction):
-            success_count += 1
-        else:
-            print(f"❌ Failed to set up {course}")
-        
-        # Add delay between courses to be respectful to servers
-        if i < len(courses):
-            print(f"⏳ Waiting 5 seconds before next course...")
-            time.sleep(5)
-    
-    print(f"\n🎉 Completed! {success_count}/{len(courses)} courses set up successfully")
-    return success_count == len(courses)
+    return setup_courses(courses, skip_download, skip_extraction, batch, workers, **pipeline_options)
 
-def setup_custom_courses(course_list: str, skip_download: bool = False, skip_extraction: bool = False):
+def setup_custom_courses(course_list: str, skip_download: bool = False, skip_extraction: bool = False,
+                         batch: bool = False, workers: int = 4, **pipeline_options):
     """Set up a custom list of courses"""
     courses = [course.strip().upper() for course in course_list.split(',')]
     
@@ -65,27 +81,10 @@ def setup_custom_courses(course_list: str, skip_download: bool = False, skip_ext
         return False
     
     print(f"📚 Setting up {len(courses)} custom courses")
-    
-    success_count = 0
-    for i, course in enumerate(courses, 1):
-        print(f"\n{'='*60}")
-        print(f"📖 Course {i}/{len(courses)}: {course}")
-        print(f"{'='*60}")
-        
-        if setup_course(course, skip_download, skip_extraction):
-            success_count += 1
-        else:
-            print(f"❌ Failed to set up {course}")
-        
-        # Add delay between courses
-        if i < len(courses):
-            print(f"⏳ Waiting 5 seconds before next course...")
-            time.sleep(5)
-    
-    print(f"\n🎉 Completed! {success_count}/{len(courses)} courses set up successfully")
-    return success_count == len(courses)
+    return setup_courses(courses, skip_download, skip_extraction, batch, workers, **pipeline_options)
 
-def setup_all_courses(skip_download: bool = False, skip_extraction: bool = False):
+def setup_all_courses(skip_download: bool = False, skip_extraction: bool = False, batch: bool = False,
+                      workers: int = 4, **pipeline_options):
     """Set up all available courses"""
     all_courses = list(COURSE_WEBSITES.keys())
     print(f"📚 Setting up ALL {len(all_courses)} courses")
@@ -96,24 +95,9 @@ def setup_all_courses(skip_download: bool = False, skip_extraction: bool = False
         print("❌ Cancelled by user")
         return False
     
-    success_count = 0
-    for i, course in enumerate(all_courses, 1):
-        print(f"\n{'='*60}")
-        print(f"📖 Course {i}/{len(all_courses)}: {course}")
-        print(f"{'='*60}")
-        
-        if setup_course(course, skip_download, skip_extraction):
-            success_count += 1
-        else:
-            print(f"❌ Failed to set up {course}")
-        
-        # Add delay between courses
-        if i < len(all_courses):
-            print(f"⏳ Waiting 10 seconds before next course...")
-            time.sleep(10)
-    
-    print(f"\n🎉 Completed! {success_count}/{len(all_courses)} courses set up successfully")
-    return success_count == len(all_courses)
+    # Longer pause between downloads when fetching every course
+    pipeline_options.setdefault('download_interval', 10)
+    return setup_courses(all_courses, skip_download, skip_extraction, batch, workers, **pipeline_options)
 
 def main():
     parser = argparse.ArgumentParser(description='Set up multiple courses with materials and study guides')
@@ -122,6 +106,13 @@ def main():
     parser.add_argument('--all', action='store_true', help='Set up ALL available courses (use with caution!)')
     parser.add_argument('--skip-download', action='store_true', help='Skip downloading materials')
     parser.add_argument('--skip-extraction', action='store_true', help='Skip PDF extraction')
+    parser.add_argument('--batch', action='store_true',
+                        help='Build all study guides in one Message Batches API run after downloading (slower, cheaper)')
+    parser.add_argument('--workers', type=int, default=4, help='Pipeline worker threads (default: 4)')
+    parser.add_argument('--download-interval', type=float,
+                        help=f'Seconds to wait between course downloads (default: {DOWNLOAD_INTERVAL:g}, 10 with --all)')
+    parser.add_argument('--summarize-concurrency', type=int, default=STAGE_LIMITS["summarize"],
+                        help=f'Claude summarize calls at once (default: {STAGE_LIMITS["summarize"]})')
     parser.add_argument('--list-categories', action='store_true', help='List all available categories')
     
     args = parser.parse_args()
@@ -139,13 +130,19 @@ def main():
         return 1
     
     success = False
+    pipeline_options = {'summarize_concurrency': args.summarize_concurrency}
+    if args.download_interval is not None:
+        pipeline_options['download_interval'] = args.download_interval
     
     if args.category:
-        success = setup_courses_in_category(args.category, args.skip_download, args.skip_extraction)
+        success = setup_courses_in_category(args.category, args.skip_download, args.skip_extraction,
+                                            args.batch, args.workers, **pipeline_options)
     elif args.courses:
-        success = setup_custom_courses(args.courses, args.skip_download, args.skip_extraction)
+        success = setup_custom_courses(args.courses, args.skip_download, args.skip_extraction,
+                                       args.batch, args.workers, **pipeline_options)
     elif args.all:
-        success = setup_all_courses(args.skip_download, args.skip_extraction)
+        success = setup_all_courses(args.skip_download, args.skip_extraction, args.batch, args.workers,
+                                    **pipeline_options)
     
     return 0 if success else 1
 
@@ -11,15 +11,13 @@ Example:
     python simple_week_processor.py CS61A
 """
 
-import os
 import sys
 import json
 from pathlib import Path
 import argparse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import pymupdf
-from dotenv import load_dotenv
-import anthropic
+from llm_client import get_client, message_text
 
 def extract_pdf_content(pdf_path: Path) -> str:
     """Extract text content from a single PDF."""
@@ -39,14 +37,13 @@ def extract_pdf_content(pdf_path: Path) -> str:
         print(f"Error extracting content from {pdf_path}: {e}")
         return ""
 
-def send_to_claude(content: str, course_code: str, week_num: int) -> str:
-    """Send content to Claude and get study guide."""
-    load_dotenv()
-    api_key = os.getenv('ANTHROPIC_API_KEY')
-    if not api_key:
-        raise ValueError("ANTHROPIC_API_KEY not found in environment variables")
+def send_to_claude(content: str, course_code: str, week_num: int, stream_path: Optional[Path] = None) -> str:
+    """Send content to Claude and get study guide.
     
-    client = anthropic.Anthropic(api_key=api_key)
+    If stream_path is given, the response is streamed and written to that file
+    as it arrives.
+    """
+    client = get_client()
     
     instruction = f"""
     You are an educational content assistant. I will provide you with content extracted from PDFs for {course_code} Week {week_num}. Your task is to create **Khan Academy-style study notes**.
@@ -65,19 +62,31 @@ def send_to_claude(content: str, course_code: str, week_num: int) -> str:
     {content}
     """
     
+    payload = {
+        "model": "claude-3-5-sonnet-20241022",
+        "max_tokens": 4000,
+        "messages": [{"role": "user", "content": instruction}]
+    }
+    
     try:
-        response = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4000,
-            messages=[{"role": "user", "content": instruction}]
-        )
+        if stream_path:
+            with client.stream_message(**payload) as stream, open(stream_path, 'w') as out:
+                for text in stream.text_stream:
+                    out.write(text)
+                    out.flush()
+            study_guide = message_text(stream.message)
+        else:
+            study_guide = message_text(client.create_message(**payload))
         
-        return response.content[0].text
+        metrics = client.last_metrics
+        print(f"⏱️  Time to first token: {metrics['time_to_first_token']:.2f}s, "
+              f"total: {metrics['latency_seconds']:.2f}s")
+        return study_guide
     except Exception as e:
         print(f"Error calling Claude API: {e}")
         return f"# Week {week_num} Study Guide\n\nError generating study guide: {e}"
 
-def process_week(week_folder: Path, course_code: str, week_num: int) -> bool:
+def process_week(week_folder: Path, course_code: str, week_num: int, stream: bool = False) -> bool:
     """Process a single week's PDFs and generate study guide."""
     print(f"Processing {week_folder.name}...")
     
@@ -102,16 +111,16 @@ def process_week(week_folder: Path, course_code: str, week_num: int) -> bool:
     # Combine all content
     combined_content = "\n\n".join(all_content)
     
-    # Send to Claude
-    print(f"Generating study guide for {week_folder.name}...")
-    study_guide = send_to_claude(combined_content, course_code, week_num)
-    
     # Save study guide in the main CourseMate folder
     course_new_folder = Path(f"../{course_code}_New")
     week_new_folder = course_new_folder / week_folder.name
     week_new_folder.mkdir(parents=True, exist_ok=True)
-    
     study_guide_file = week_new_folder / "study_guide.md"
+    
+    # Send to Claude
+    print(f"Generating study guide for {week_folder.name}...")
+    study_guide = send_to_claude(combined_content, course_code, week_num, study_guide_file if stream else None)
+    
     with open(study_guide_file, 'w') as f:
         f.write(study_guide)
     
@@ -135,7 +144,7 @@ def process_week(week_folder: Path, course_code: str, week_num: int) -> bool:
     print(f"✅ Generated study guide for {week_folder.name}")
     return True
 
-def process_course(course_code: str) -> bool:
+def process_course(course_code: str, stream: bool = False) -> bool:
     """Process all weeks in a course."""
     course_folder = Path(f"../{course_code}")
     if not course_folder.exists():
@@ -157,7 +166,7 @@ def process_course(course_code: str) -> bool:
         # Extract week number
         week_num = int(week_folder.name[1:])  # Remove 'W' prefix
         
-        if process_week(week_folder, course_code, week_num):
+        if process_week(week_folder, course_code, week_num, stream):
             success_count += 1
     
     print(f"\n🎉 Completed! Generated study guides for {success_count}/{len(week_folders)} weeks")
@@ -166,13 +175,15 @@ def process_course(course_code: str) -> bool:
 def main():
     parser = argparse.ArgumentParser(description='Process course PDFs week by week and generate study guides')
     parser.add_argument('course_code', help='Course code (e.g., CS61A, CS188)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream each study guide into study_guide.md as it is generated')
     
     args = parser.parse_args()
     
     course_code = args.course_code.upper()
     print(f"🚀 Processing course: {course_code}")
     
-    success = process_course(course_code)
+    success = process_course(course_code, args.stream)
     
     if success:
         print(f"\n✅ Successfully processed {course_code}")
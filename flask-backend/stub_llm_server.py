@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Stub LLM Server
+
+A local stand-in for the Claude Messages API (POST /v1/messages) that returns
+canned text, either as JSON or as a server-sent event stream, after a
+configurable delay. System prompts marked with cache_control that reach the
+API's minimum cacheable length (MIN_CACHE_TOKENS) are reported as cache
+writes the first time they are seen and as cache reads afterwards. Point the
+backend at it with ANTHROPIC_BASE_URL to test or benchmark the pipelines
+without network access or API spend.
+
+Usage:
+    python stub_llm_server.py [--port PORT] [--latency SECONDS] [--text TEXT]
+
+Example:
+    python stub_llm_server.py --port 8765 --latency 0.2
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8765 ANTHROPIC_API_KEY=stub python simple_week_processor.py CS162
+"""
+
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MIN_CACHE_TOKENS = 1024  # shortest cacheable prefix for Sonnet/Opus; shorter ones are not cached
+
+DEFAULT_TEXT = "## Problem 1: Stub\n**Problem:** Stub problem text.\n\n---\n"
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    latency = 0.0
+    text = DEFAULT_TEXT
+    chunk_size = 16
+    cached_prefixes = set()
+
+    def cache_usage(self, payload, total_tokens):
+        """Emulate prompt caching of a system prompt marked with cache_control."""
+        system = payload.get("system")
+        if not isinstance(system, list) or not any("cache_control" in block for block in system):
+            return {"input_tokens": total_tokens}
+
+        prefix = json.dumps([payload.get("model"), system], sort_keys=True)
+        prefix_tokens = min(len(prefix) // 4, total_tokens)
+        if prefix_tokens < MIN_CACHE_TOKENS:
+            return {"input_tokens": total_tokens}
+        usage = {"input_tokens": total_tokens - prefix_tokens}
+        if prefix in self.cached_prefixes:
+            usage["cache_read_input_tokens"] = prefix_tokens
+        else:
+            self.cached_prefixes.add(prefix)
+            usage["cache_creation_input_tokens"] = prefix_tokens
+        return usage
+
+    def do_POST(self):
+        if self.path != "/v1/messages":
+            self.send_error(404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        time.sleep(self.latency)
+
+        message = {
+            "id": "msg_stub",
+            "type": "message",
+            "role": "assistant",
+            "model": payload.get("model", "stub"),
+            "content": [],
+            "stop_reason": None,
+            "usage": dict(self.cache_usage(payload, length // 4), output_tokens=0)
+        }
+
+        if not payload.get("stream"):
+            message["content"] = [{"type": "text", "text": self.text}]
+            message["stop_reason"] = "end_turn"
+            message["usage"]["output_tokens"] = len(self.text) // 4
+            body = json.dumps(message).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        events = [("message_start", {"type": "message_start", "message": message}),
+                  ("content_block_start", {"type": "content_block_start", "index": 0,
+                                           "content_block": {"type": "text", "text": ""}})]
+        for i in range(0, len(self.text), self.chunk_size):
+            events.append(("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                   "delta": {"type": "text_delta", "text": self.text[i:i + self.chunk_size]}}))
+        events.extend([("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                       ("message_delta", {"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                          "usage": {"output_tokens": len(self.text) // 4}}),
+                       ("message_stop", {"type": "message_stop"})])
+        body = b"".join(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode() for name, data in events)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a stub Claude Messages API')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before responding (default: 0)')
+    parser.add_argument('--text', default=DEFAULT_TEXT, help='Response text')
+
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency
+    StubHandler.text = args.text
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StubHandler)
+    print(f"🧪 Stub LLM server on http://127.0.0.1:{args.port} (latency {args.latency}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
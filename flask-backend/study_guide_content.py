@@ -0,0 +1,150 @@
+"""
+Study Guide Content - a course week's study guide as rendered HTML sections.
+
+<COURSE>_New/W<week>/study_guide.md is split on its "## " headers into
+sections, and each section's markdown is rendered to HTML. That happens once
+per content change, not per page view:
+
+- in memory, each guide keeps the stat (mtime, size) it was rendered from;
+  a request whose stat matches costs one os.stat()
+- a changed stat re-reads the file; when the bytes hash the same (a touch or
+  a fresh checkout) the rendered sections are kept
+- rendered sections are also saved under instance/content_cache/, keyed by
+  the content hash, so other workers and restarts skip rendering too
+
+The content hash doubles as the response ETag.
+"""
+
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from lazy_imports import markdown
+
+DEFAULT_ROOT = Path(__file__).resolve().parent.parent  # where the <COURSE>_New folders live
+DEFAULT_CACHE_DIRECTORY = Path(__file__).resolve().parent / 'instance' / 'content_cache'
+MAX_GUIDES = 256
+
+# Bump when rendering changes, so cached HTML from the old renderer is ignored
+RENDERER_VERSION = 1
+MARKDOWN_EXTENSIONS = ['fenced_code', 'tables']
+
+COURSE_CODE = re.compile(r'^[A-Za-z]+\d+[A-Za-z]?$')  # CS162, EECS16A; never a path
+SECTION_START = re.compile(r'^## ', re.MULTILINE)
+LEADING_HASHES = re.compile(r'^#+\s*')
+
+def split_sections(content: str) -> List[Tuple[str, str]]:
+    """(title, markdown) of each "## " section, without the "# Course Title" preamble."""
+    chunks = SECTION_START.split(content)
+    if chunks[0].lstrip().startswith('# '):
+        chunks = chunks[1:]
+
+    sections = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        title_line, _, body = chunk.partition('\n')
+        sections.append((LEADING_HASHES.sub('', title_line.strip()).strip(), body))
+    return sections
+
+def render_sections(week: int, content: str) -> List[Dict[str, str]]:
+    """Lessons of a week: id "<week>-<n>", title and HTML content; empty sections are dropped."""
+    lessons = []
+    for number, (title, body) in enumerate(split_sections(content), start=1):
+        html = markdown.markdown(body, extensions=MARKDOWN_EXTENSIONS)
+        if title and html.strip():
+            lessons.append({'id': f"{week}-{number}", 'title': title, 'content': html})
+    return lessons
+
+class StudyGuideContent:
+    def __init__(self, root=DEFAULT_ROOT, cache_directory=DEFAULT_CACHE_DIRECTORY, max_guides: int = MAX_GUIDES):
+        self.root = Path(root)
+        self.cache_directory = Path(cache_directory) if cache_directory else None
+        self.max_guides = max_guides
+        self.renders = 0
+        # path -> ((mtime_ns, size), digest, lessons)
+        self._guides: "OrderedDict[Path, Tuple[Tuple[int, int], str, List[Dict]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "StudyGuideContent":
+        return cls(
+            root=os.environ.get('STUDY_GUIDE_ROOT', DEFAULT_ROOT),
+            cache_directory=os.environ.get('CONTENT_CACHE_DIR', DEFAULT_CACHE_DIRECTORY)
+        )
+
+    def guide_path(self, course_code: str, week: int) -> Optional[Path]:
+        """<COURSE>_New/W<week>/study_guide.md; a lowercase w<week> folder (see topic_scanner.WEEK_FOLDER) also counts."""
+        if not COURSE_CODE.match(course_code):
+            return None
+        course_dir = self.root / f"{course_code.upper()}_New"
+        path = course_dir / f"W{week}" / 'study_guide.md'
+        if not path.exists() and (course_dir / f"w{week}" / 'study_guide.md').exists():
+            return course_dir / f"w{week}" / 'study_guide.md'
+        return path
+
+    def week(self, course_code: str, week: int) -> Optional[Tuple[str, List[Dict[str, str]]]]:
+        """(ETag, lessons) of a week's study guide, or None when there is none."""
+        path = self.guide_path(course_code, week)
+        if path is None:
+            return None
+        try:
+            stat = path.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._guides.get(path)
+            if cached is not None:
+                self._guides.move_to_end(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        if cached is not None and cached[1] == digest:
+            lessons = cached[2]
+        else:
+            lessons = self._load(digest)
+            if lessons is None:
+                lessons = render_sections(week, data.decode('utf-8'))
+                self.renders += 1
+                self._save(digest, lessons)
+
+        with self._lock:
+            self._guides[path] = (signature, digest, lessons)
+            self._guides.move_to_end(path)
+            while len(self._guides) > self.max_guides:
+                self._guides.popitem(last=False)
+        return digest, lessons
+
+    def _cache_file(self, digest: str) -> Path:
+        return self.cache_directory / f"{digest}.v{RENDERER_VERSION}.json"
+
+    def _load(self, digest: str) -> Optional[List[Dict[str, str]]]:
+        if self.cache_directory is None:
+            return None
+        try:
+            return json.loads(self._cache_file(digest).read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _save(self, digest: str, lessons: List[Dict[str, str]]):
+        if self.cache_directory is None:
+            return
+        try:
+            self.cache_directory.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_directory / f".{digest}.{os.getpid()}.tmp"
+            temp_path.write_text(json.dumps(lessons), encoding='utf-8')
+            os.replace(temp_path, self._cache_file(digest))
+        except OSError as e:
+            # Only a cache: serve the render anyway
+            print(f"⚠️  Could not cache rendered study guide: {e}")
+
+study_guides = StudyGuideContent.from_env()
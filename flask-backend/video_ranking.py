@@ -0,0 +1,215 @@
+"""
+Video Ranking - BM25 relevance scoring for YouTube search results.
+
+Each candidate's title and description are tokenized once, and all candidates
+for a week are scored together against that week's search queries in one
+vectorized pass:
+
+    score = BM25F(title x3 + description, per-course IDF)
+            + channel prior + duration prior
+
+The IDF comes from the course's generated study guides
+(<COURSE>_New/W*/study_guide.md). Terms that show up in every week, like the
+course subject or "example", count for little. Terms specific to a few weeks
+count for a lot. Query terms that appear in no study guide come from the
+query templates ("tutorial", "explanation"), not the course, so they get the
+lowest course weight.
+"""
+
+import re
+import math
+import threading
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from lazy_imports import np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it its of on or that the this
+to was what when where which why with vs you your
+""".split())
+
+# BM25 parameters; titles count three times as much as descriptions (as before)
+K1 = 1.2
+B = 0.75
+TITLE_WEIGHT = 3.0
+
+# Added to the score of videos from the curated educational channels
+EDUCATIONAL_CHANNEL_PRIOR = 0.5
+
+# Duration prior: shorts and trailers are rarely useful, 4-15 minutes is ideal
+DURATION_POINTS = [0, 120, 240, 900, 1200]
+DURATION_PRIORS = [-1.0, -0.5, 0.0, 0.0, -0.25]
+
+# Below this fraction of the best achievable score, results count as low relevance;
+# at or above HIGH_RELEVANCE_FRACTION a video is a confident match for its query
+LOW_RELEVANCE_FRACTION = 0.2
+HIGH_RELEVANCE_FRACTION = 0.5
+
+# Tokenized candidates kept per ranker before the cache is reset
+MAX_CACHED_VIDEOS = 10000
+
+def stem(token: str) -> str:
+    """Strip common English plural endings (processes -> process, queries -> query)."""
+    if len(token) <= 3:
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("sses", "xes", "ches", "shes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem."""
+    return [stem(token) for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+@lru_cache(maxsize=4096)
+def query_terms(query: str) -> frozenset:
+    """Distinct tokens of a search query; queries repeat across candidates and weeks."""
+    return frozenset(tokenize(query))
+
+class CourseIDF:
+    """Inverse document frequencies over a course's study guides (one document per week)."""
+
+    def __init__(self, document_frequency: Dict[str, int], num_documents: int):
+        self.num_documents = num_documents
+        self.weights = {
+            term: math.log(1 + (num_documents - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+        # Unknown terms are treated like the most common course vocabulary
+        self.default = min(self.weights.values()) if self.weights else 1.0
+
+    @classmethod
+    def from_study_guides(cls, course_new_dir: Path) -> "CourseIDF":
+        document_frequency = Counter()
+        guides = sorted(Path(course_new_dir).glob("W*/study_guide.md"))
+        for guide in guides:
+            document_frequency.update(set(tokenize(guide.read_text(encoding='utf-8'))))
+        return cls(document_frequency, len(guides))
+
+    def weight(self, term: str) -> float:
+        return self.weights.get(term, self.default)
+
+_idf_cache: Dict[str, Tuple[tuple, CourseIDF]] = {}
+_idf_lock = threading.Lock()
+
+def course_idf(course_new_dir) -> CourseIDF:
+    """IDF for a <COURSE>_New folder, recomputed only when its study guides change."""
+    course_new_dir = Path(course_new_dir)
+    guides = sorted(course_new_dir.glob("W*/study_guide.md"))
+    signature = tuple((str(g), g.stat().st_mtime_ns, g.stat().st_size) for g in guides)
+
+    with _idf_lock:
+        cached = _idf_cache.get(str(course_new_dir))
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    idf = CourseIDF.from_study_guides(course_new_dir)
+    with _idf_lock:
+        _idf_cache[str(course_new_dir)] = (signature, idf)
+    return idf
+
+class VideoRanker:
+    """Scores search results against a set of queries."""
+
+    def __init__(self, channel_priors: Optional[Dict[str, float]] = None,
+                 k1: float = K1, b: float = B, title_weight: float = TITLE_WEIGHT):
+        self.channel_priors = channel_priors or {}
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+        self._terms: Dict[str, Tuple[Counter, float]] = {}
+        self._lock = threading.Lock()
+
+    def _video_terms(self, video: Dict) -> Tuple[Counter, float]:
+        """Weighted term frequencies and field length of a video, tokenized once per video id."""
+        video_id = video['video_id']
+        cached = self._terms.get(video_id)
+        if cached is not None:
+            return cached
+
+        title = tokenize(video['title'])
+        description = tokenize(video.get('description', ''))
+        frequencies = Counter()
+        for token in title:
+            frequencies[token] += self.title_weight
+        frequencies.update(description)
+        cached = (frequencies, self.title_weight * len(title) + len(description))
+
+        with self._lock:
+            if len(self._terms) >= MAX_CACHED_VIDEOS:
+                self._terms.clear()
+            self._terms[video_id] = cached
+        return cached
+
+    def _query_weights(self, queries: Iterable[str], idf: Optional[CourseIDF]) -> Tuple[List[str], "np.ndarray"]:
+        """Query vocabulary and per-term weights (IDF x saturated query frequency)."""
+        counts = Counter()
+        for query in queries:
+            counts.update(query_terms(query))
+        terms = list(counts)
+        weights = np.array([
+            (idf.weight(term) if idf else 1.0) * (1 + math.log(counts[term])) for term in terms
+        ])
+        return terms, weights
+
+    def max_score(self, queries: Iterable[str], idf: Optional[CourseIDF] = None) -> float:
+        """Upper bound of the text score for these queries (every term saturated)."""
+        _, weights = self._query_weights(queries, idf)
+        return float(weights.sum() * (self.k1 + 1))
+
+    def text_scores(self, queries: Iterable[str], videos: List[Dict], idf: Optional[CourseIDF] = None) -> "np.ndarray":
+        """BM25F score of every video against the queries, in one pass."""
+        if not videos:
+            return np.zeros(0)
+
+        terms, weights = self._query_weights(queries, idf)
+        video_terms = [self._video_terms(video) for video in videos]
+
+        tf = np.array([[frequencies.get(term, 0.0) for term in terms] for frequencies, _ in video_terms],
+                      dtype=float).reshape(len(videos), len(terms))
+        lengths = np.array([length for _, length in video_terms], dtype=float)
+        average_length = lengths.mean() or 1.0
+
+        norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        return (tf * (self.k1 + 1) / (tf + norm[:, None])) @ weights
+
+    def score(self, queries: Iterable[str], videos: List[Dict], idf: Optional[CourseIDF] = None) -> "np.ndarray":
+        """Text score plus channel and duration priors for every video."""
+        if not videos:
+            return np.zeros(0)
+
+        channel = np.array([self.channel_priors.get(video.get('channel'), 0.0) for video in videos])
+        duration = np.interp([video.get('duration_seconds', DURATION_POINTS[-2]) for video in videos],
+                             DURATION_POINTS, DURATION_PRIORS)
+        return self.text_scores(queries, videos, idf) + channel + duration
+
+    def rank(self, queries: Iterable[str], videos: List[Dict], idf: Optional[CourseIDF] = None) -> List[Dict]:
+        """Set each video's relevance_score and return them best first."""
+        queries = list(queries)
+        scores = self.score(queries, videos, idf)
+        for video, score in zip(videos, scores):
+            video['relevance_score'] = round(float(score), 4)
+        return sorted(videos, key=lambda video: video['relevance_score'], reverse=True)
+
+    def relevance_fractions(self, queries: Iterable[str], videos: List[Dict],
+                            idf: Optional[CourseIDF] = None) -> "np.ndarray":
+        """Text score of every video as a fraction of the best achievable score."""
+        queries = list(queries)
+        best = self.max_score(queries, idf)
+        if not videos or not best:
+            return np.zeros(len(videos))
+        return self.text_scores(queries, videos, idf) / best
+
+    def is_low_relevance(self, queries: Iterable[str], videos: List[Dict], idf: Optional[CourseIDF] = None) -> bool:
+        """True if no video matches a meaningful share of the query terms."""
+        if not videos:
+            return True
+        return self.relevance_fractions(queries, videos, idf).max() < LOW_RELEVANCE_FRACTION
@@ -7,14 +7,27 @@ to find relevant educational videos for each week of a course.
 """
 
 import os
-import re
 import json
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 
 from get_relevant_video import YouTubeEducationalSearch
+from video_ranking import course_idf, HIGH_RELEVANCE_FRACTION
+from query_planner import QueryPlanner
+from topic_scanner import scan_topics, scan_course
 from models import WeekVideo, db
+from response_cache import invalidate, WEEK_VIDEOS
+
+# Dialects with INSERT ... ON CONFLICT, for bulk upserts of week videos
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+UPSERT_KEY_COLUMNS = ('course_code', 'week_number', 'topic')
+
+# 13 columns per row; stays under SQLite's default limit of 999 bound parameters
+UPSERT_BATCH_ROWS = 75
 
 class WeekVideoProcessor:
     def __init__(self, api_key: str = None):
@@ -28,6 +41,21 @@ class WeekVideoProcessor:
         
         self.youtube_searcher = YouTubeEducationalSearch(api_key)
         
+        # One planner per course, so weeks sharing a topic reuse its search results
+        budget = os.getenv('YOUTUBE_QUOTA_BUDGET')
+        self.quota_budget = int(budget) if budget else None
+        self.planners: Dict[str, QueryPlanner] = {}
+    
+    def planner_for(self, course_code: str) -> QueryPlanner:
+        """The query planner (and its result cache) for a course."""
+        if course_code not in self.planners:
+            self.planners[course_code] = QueryPlanner(
+                course_code,
+                list(self.youtube_searcher.educational_channels),
+                quota_budget=self.quota_budget
+            )
+        return self.planners[course_code]
+        
     def extract_topics_from_study_guide(self, study_guide_path: str) -> List[str]:
         """
         Extract key topics from a study guide markdown file.
@@ -48,44 +76,14 @@ class WeekVideoProcessor:
             print(f"Error reading study guide: {e}")
             return []
         
-        topics = []
-        
-        # Extract section headers (lines starting with ## or ###)
-        section_headers = re.findall(r'^#{2,3}\s+(.+)$', content, re.MULTILINE)
-        topics.extend(section_headers)
-        
-        # Extract key concepts mentioned in bullet points or arrows
-        key_concepts = re.findall(r'→\s*([^→\n]+)', content)
-        topics.extend([concept.strip() for concept in key_concepts])
-        
-        # Extract bold terms (wrapped in **)
-        bold_terms = re.findall(r'\*\*([^*]+)\*\*', content)
-        topics.extend(bold_terms)
-        
-        # Extract terms in quotes
-        quoted_terms = re.findall(r'"([^"]+)"', content)
-        topics.extend(quoted_terms)
-        
-        # Clean and filter topics
-        cleaned_topics = []
-        for topic in topics:
-            # Clean up the topic
-            topic = topic.strip()
-            topic = re.sub(r'[^\w\s\-\.]', '', topic)  # Remove special characters except spaces, hyphens, dots
-            topic = re.sub(r'\s+', ' ', topic)  # Normalize whitespace
-            
-            # Filter out very short or very long topics
-            if 3 <= len(topic) <= 100 and topic not in cleaned_topics:
-                cleaned_topics.append(topic)
-        
-        # Remove duplicates and return top topics
-        unique_topics = list(dict.fromkeys(cleaned_topics))  # Preserves order while removing duplicates
-        return unique_topics[:10]  # Return top 10 topics
+        return scan_topics(content)
     
     def generate_search_queries(self, topics: List[str], course_code: str) -> List[str]:
         """
         Generate search queries for YouTube based on topics and course context.
         
+        Near-duplicate topics collapse to one query each (see query_planner.py).
+        
         Args:
             topics: List of topics extracted from study guide
             course_code: Course code (e.g., 'CS162', 'CS170')
@@ -93,81 +91,65 @@ class WeekVideoProcessor:
         Returns:
             List of search queries optimized for YouTube search
         """
-        queries = []
-        
-        # Course-specific context
-        course_context = {
-            'CS162': 'operating systems',
-            'CS170': 'algorithms',
-            'CS61A': 'programming python',
-            'CS61B': 'data structures',
-            'EECS126': 'probability random processes',
-            'EECS16A': 'linear algebra circuits',
-            'EECS16B': 'linear algebra circuits'
-        }
-        
-        course_subject = course_context.get(course_code, 'computer science')
-        
-        # Generate queries combining topics with course context
-        for topic in topics[:5]:  # Use top 5 topics
-            # Direct topic query
-            queries.append(topic)
-            
-            # Topic with course context
-            queries.append(f"{topic} {course_subject}")
-            
-            # Topic with educational context
-            queries.append(f"{topic} tutorial explanation")
-        
-        return queries[:10]  # Limit to 10 queries
+        return [query for _, query in self.planner_for(course_code).plan(topics)]
     
-    def find_videos_for_week(self, course_code: str, week_number: int, 
-                           study_guide_path: str, max_videos: int = 3) -> List[Dict]:
+    def collect_candidates(self, course_code: str, study_guide_path: str, max_videos: int = 3,
+                           topics: Optional[List[str]] = None) -> Tuple[List[str], List[Dict]]:
         """
-        Find relevant YouTube videos for a specific week based on study guide content.
+        Run the YouTube searches for a week's study guide.
         
         Args:
             course_code: Course code (e.g., 'CS162', 'CS170')
-            week_number: Week number (1, 2, 3, etc.)
             study_guide_path: Path to the study guide markdown file
-            max_videos: Maximum number of videos to find per week
+            max_videos: Number of videos wanted; searching stops once this many strong matches are found
+            topics: Topics already scanned from the study guide (read from study_guide_path if omitted)
             
         Returns:
-            List of video dictionaries with metadata
+            Tuple of (search queries, unique candidate videos)
         """
-        print(f"Processing week {week_number} for {course_code}...")
-        
         # Extract topics from study guide
-        topics = self.extract_topics_from_study_guide(study_guide_path)
+        if topics is None:
+            topics = self.extract_topics_from_study_guide(study_guide_path)
         if not topics:
             print(f"No topics found in study guide: {study_guide_path}")
-            return []
+            return [], []
         
         print(f"Extracted topics: {topics[:5]}...")  # Show first 5 topics
         
-        # Generate search queries
-        search_queries = self.generate_search_queries(topics, course_code)
-        print(f"Generated {len(search_queries)} search queries")
+        # Plan the searches; queries already run for an earlier week are reused
+        planner = self.planner_for(course_code)
+        planned = planner.plan(topics)
+        search_queries = [query for _, query in planned]
+        expected, worst = planner.estimate(planned)
+        print(f"Planned {len(planned)} search queries "
+              f"({sum(1 for key, _ in planned if planner.is_cached(key))} cached, ~{expected}-{worst} quota units)")
         
         # Search for videos
         all_videos = []
         seen_video_ids = set()
+        confident = 0
+        ranker = self.youtube_searcher.ranker
         
-        for query in search_queries:
+        for key, query in planned:
             try:
                 print(f"Searching for: {query}")
-                results = self.youtube_searcher.search_all_channels(query, max_results_per_channel=1)
+                results = planner.search(
+                    key, query,
+                    lambda q: self.youtube_searcher.search_all_channels(q, max_results_per_channel=1)
+                )
                 
-                for result in results:
-                    video_id = result['video_id']
-                    if video_id not in seen_video_ids:
-                        seen_video_ids.add(video_id)
-                        all_videos.append(result)
-                        
-                        if len(all_videos) >= max_videos * 2:  # Get more than needed for filtering
-                            break
+                new_results = [result for result in results if result['video_id'] not in seen_video_ids]
+                for result in new_results:
+                    seen_video_ids.add(result['video_id'])
+                    result['query'] = query
+                    all_videos.append(result)
                 
-                if len(all_videos) >= max_videos * 2:
+                # Stop once enough distinct videos match their topic well (the subject
+                # words appended to every query would make this too strict)
+                fractions = ranker.relevance_fractions([key or query], new_results)
+                confident += int((fractions >= HIGH_RELEVANCE_FRACTION).sum())
+                if confident >= max_videos:
+                    print(f"Found {confident} strong matches, skipping remaining queries")
                     break
                     
             except Exception as e:
@@ -179,56 +161,130 @@ class WeekVideoProcessor:
                     print(f"Error searching for '{query}': {e}")
                     continue
         
-        # Sort by relevance score and return top videos
-        all_videos.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return all_videos[:max_videos]
+        return search_queries, all_videos
     
-    def save_week_videos(self, course_code: str, week_number: int, videos: List[Dict]) -> bool:
+    def find_videos_for_week(self, course_code: str, week_number: int, 
+                           study_guide_path: str, max_videos: int = 3,
+                           topics: Optional[List[str]] = None) -> List[Dict]:
         """
-        Save videos to database for a specific week.
+        Find relevant YouTube videos for a specific week based on study guide content.
+        
+        Candidates from all of the week's searches are re-scored together against
+        all of its queries, weighted by IDF over the course's study guides.
+        
+        Args:
+            course_code: Course code (e.g., 'CS162', 'CS170')
+            week_number: Week number (1, 2, 3, etc.)
+            study_guide_path: Path to the study guide markdown file
+            max_videos: Maximum number of videos to find per week
+            topics: Topics already scanned from the study guide (read from study_guide_path if omitted)
+            
+        Returns:
+            List of video dictionaries with metadata
+        """
+        print(f"Processing week {week_number} for {course_code}...")
+        
+        search_queries, all_videos = self.collect_candidates(course_code, study_guide_path, max_videos, topics)
+        
+        # Study guides live in <COURSE>_New/W<N>/study_guide.md
+        idf = course_idf(Path(study_guide_path).parent.parent)
+        ranked = self.youtube_searcher.ranker.rank(search_queries, all_videos, idf)
+        return ranked[:max_videos]
+    
+    def week_video_rows(self, course_code: str, week_number: int, videos: List[Dict]) -> List[Dict]:
+        """
+        Build week_videos rows for a week's videos.
+        
+        The topic is the first few words of the title. Titles that share them
+        (e.g. "Dynamic Programming Part 1" and "... Part 2") get a numeric suffix,
+        so they don't collide on the unique_week_topic_video constraint.
+        """
+        now = datetime.utcnow()
+        rows = []
+        used_topics = set()
+        for video in videos:
+            # Create topic name from video title (first few words)
+            base_topic = ' '.join(video['title'].split()[:4])
+            topic = base_topic
+            suffix = 2
+            while topic in used_topics:
+                topic = f"{base_topic} ({suffix})"
+                suffix += 1
+            used_topics.add(topic)
+            
+            rows.append({
+                'course_code': course_code,
+                'week_number': week_number,
+                'topic': topic,
+                'video_title': video['title'],
+                'video_url': video['url'],
+                'video_id': video['video_id'],
+                'channel_name': video['channel'],
+                'duration_seconds': video['duration_seconds'],
+                'relevance_score': video['relevance_score'],
+                'thumbnail_url': video.get('thumbnail', ''),
+                'description': video.get('description', '')[:500],  # Limit description length
+                'created_at': now,
+                'updated_at': now
+            })
+        return rows
+    
+    def save_course_videos(self, course_code: str, videos_by_week: Dict[int, List[Dict]]) -> bool:
+        """
+        Replace the saved videos of one or more weeks of a course in a single transaction.
+        
+        Videos are upserted on (course_code, week_number, topic) with one
+        INSERT ... ON CONFLICT DO UPDATE per UPSERT_BATCH_ROWS rows (SQLite and
+        Postgres), and rows of those weeks that weren't regenerated are removed
+        with one DELETE. Other databases fall back to DELETE + bulk INSERT.
         
         Args:
             course_code: Course code
-            week_number: Week number
-            videos: List of video dictionaries
+            videos_by_week: Videos to keep, keyed by week number
             
         Returns:
             True if successful, False otherwise
         """
+        rows = [
+            row
+            for week_number, videos in videos_by_week.items()
+            for row in self.week_video_rows(course_code, week_number, videos)
+        ]
+        table = WeekVideo.__table__
+        weeks = table.c.course_code == course_code, table.c.week_number.in_(list(videos_by_week))
+        
         try:
-            # Clear existing videos for this week
-            WeekVideo.query.filter_by(
-                course_code=course_code,
-                week_number=week_number
-            ).delete()
-            
-            # Save new videos
-            for i, video in enumerate(videos):
-                # Extract video ID from URL
-                video_id = video['video_id']
+            insert = UPSERT_INSERTS.get(db.engine.dialect.name)
+            if insert is None:
+                db.session.execute(table.delete().where(*weeks))
+                if rows:
+                    db.session.execute(table.insert(), rows)
+            else:
+                # Drop rows of these weeks whose topic isn't being written again
+                stale = table.delete().where(*weeks)
+                if rows:
+                    stale = stale.where(
+                        tuple_(table.c.week_number, table.c.topic).notin_(
+                            [(row['week_number'], row['topic']) for row in rows]
+                        )
+                    )
+                db.session.execute(stale)
                 
-                # Create topic name from video title (first few words)
-                topic_words = video['title'].split()[:4]
-                topic = ' '.join(topic_words)
-                
-                week_video = WeekVideo(
-                    course_code=course_code,
-                    week_number=week_number,
-                    topic=topic,
-                    video_title=video['title'],
-                    video_url=video['url'],
-                    video_id=video_id,
-                    channel_name=video['channel'],
-                    duration_seconds=video['duration_seconds'],
-                    relevance_score=video['relevance_score'],
-                    thumbnail_url=video.get('thumbnail', ''),
-                    description=video.get('description', '')[:500]  # Limit description length
-                )
-                
-                db.session.add(week_video)
+                for start in range(0, len(rows), UPSERT_BATCH_ROWS):
+                    statement = insert(table).values(rows[start:start + UPSERT_BATCH_ROWS])
+                    statement = statement.on_conflict_do_update(
+                        index_elements=['course_code', 'week_number', 'topic'],
+                        set_={
+                            column: statement.excluded[column]
+                            for column in rows[0] if column not in UPSERT_KEY_COLUMNS + ('created_at',)
+                        }
+                    )
+                    db.session.execute(statement)
             
             db.session.commit()
-            print(f"Saved {len(videos)} videos for {course_code} Week {week_number}")
+            invalidate(WEEK_VIDEOS)
+            weeks_label = ', '.join(f"W{week}" for week in sorted(videos_by_week))
+            print(f"Saved {len(rows)} videos for {course_code} {weeks_label}")
             return True
             
         except Exception as e:
@@ -236,6 +292,20 @@ class WeekVideoProcessor:
             print(f"Error saving videos: {e}")
             return False
     
+    def save_week_videos(self, course_code: str, week_number: int, videos: List[Dict]) -> bool:
+        """
+        Save videos to database for a specific week, replacing its previous videos.
+        
+        Args:
+            course_code: Course code
+            week_number: Week number
+            videos: List of video dictionaries
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        return self.save_course_videos(course_code, {week_number: videos})
+    
     def process_course_weeks(self, course_code: str, course_path: str, 
                            max_videos_per_week: int = 3) -> Dict[str, int]:
         """
@@ -270,6 +340,14 @@ class WeekVideoProcessor:
         results['total_weeks'] = len(week_dirs)
         print(f"Found {len(week_dirs)} weeks for {course_code}")
         
+        # Scan every study guide in one go and plan all weeks up front, so shared
+        # topics are searched once and the quota cost is known
+        week_topics = scan_course(course_path)
+        self.planner_for(course_code).plan_course(week_topics)
+        
+        # Saved together at the end: one upsert for the whole course
+        videos_by_week = {}
+        
         for week_dir in week_dirs:
             week_number = int(week_dir.name[1:])  # Extract number from W1, W2, etc.
             study_guide_path = week_dir / 'study_guide.md'
@@ -283,18 +361,13 @@ class WeekVideoProcessor:
             try:
                 # Find videos for this week
                 videos = self.find_videos_for_week(
-                    course_code, week_number, str(study_guide_path), max_videos_per_week
+                    course_code, week_number, str(study_guide_path), max_videos_per_week,
+                    week_topics.get(week_number)
                 )
                 
                 if videos:
-                    # Save videos to database
-                    if self.save_week_videos(course_code, week_number, videos):
-                        results['processed_weeks'] += 1
-                        results['total_videos'] += len(videos)
-                        print(f"✓ Week {week_number}: {len(videos)} videos")
-                    else:
-                        error_msg = f"Failed to save videos for week {week_number}"
-                        results['errors'].append(error_msg)
+                    videos_by_week[week_number] = videos
+                    print(f"✓ Week {week_number}: {len(videos)} videos")
                 else:
                     error_msg = f"No videos found for week {week_number}"
                     print(error_msg)
@@ -311,6 +384,13 @@ class WeekVideoProcessor:
                     print(error_msg)
                     results['errors'].append(error_msg)
         
+        if videos_by_week:
+            if self.save_course_videos(course_code, videos_by_week):
+                results['processed_weeks'] = len(videos_by_week)
+                results['total_videos'] = sum(len(videos) for videos in videos_by_week.values())
+            else:
+                results['errors'].append(f"Failed to save videos for {len(videos_by_week)} weeks")
+        
         return results
     
     def get_week_videos(self, course_code: str, week_number: int) -> List[Dict]:
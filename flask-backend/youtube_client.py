@@ -0,0 +1,55 @@
+"""
+Shared YouTube Data API client.
+
+googleapiclient.discovery.build() reads and parses the YouTube discovery
+document and creates a fresh httplib2 transport every time it is called, so
+building a client per request (as the week video routes do) pays that setup
+and a new TLS handshake on every search.
+
+get_youtube() parses the discovery document bundled with
+google-api-python-client once per process and hands out long-lived clients
+built from it. httplib2.Http is not thread-safe, so each thread gets its own
+client and transport; the transport keeps its connection to googleapis.com
+alive between requests.
+"""
+
+import json
+import threading
+
+from lazy_imports import httplib2, youtube_discovery, youtube_discovery_cache
+
+API_NAME = "youtube"
+API_VERSION = "v3"
+
+# Seconds to wait on a single YouTube API call
+HTTP_TIMEOUT = 30
+
+_document = None
+_document_lock = threading.Lock()
+_local = threading.local()
+
+def discovery_document() -> dict:
+    """The parsed YouTube discovery document, loaded once per process."""
+    global _document
+    if _document is None:
+        with _document_lock:
+            if _document is None:
+                content = youtube_discovery_cache.get_static_doc(API_NAME, API_VERSION)
+                if content is None:
+                    raise RuntimeError(f"No bundled discovery document for {API_NAME} {API_VERSION}")
+                _document = json.loads(content)
+    return _document
+
+def get_youtube(api_key: str):
+    """Return this thread's YouTube client for api_key, building it on first use."""
+    clients = getattr(_local, "clients", None)
+    if clients is None:
+        clients = _local.clients = {}
+
+    if api_key not in clients:
+        clients[api_key] = youtube_discovery.build_from_document(
+            discovery_document(),
+            developerKey=api_key,
+            http=httplib2.Http(timeout=HTTP_TIMEOUT)
+        )
+    return clients[api_key]
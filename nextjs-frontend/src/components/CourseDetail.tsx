@@ -42,6 +42,49 @@ interface Lesson {
   content?: string;
 }
 
+interface WeekContent {
+  week: number;
+  lessons: any[];
+  topics?: any[];
+  videos?: any[];
+}
+
+interface CourseBundle {
+  course_code: string;
+  weeks: WeekContent[];
+}
+
+// Every week of a course comes in one prebuilt bundle (GET /api/content/<course>),
+// fetched once per page load and shared by all weeks
+const courseBundles: { [courseCode: string]: Promise<CourseBundle | null> } = {};
+
+const loadCourseBundle = (courseCode: string): Promise<CourseBundle | null> => {
+  if (!courseBundles[courseCode]) {
+    courseBundles[courseCode] = fetch(`http://localhost:5001/api/content/${courseCode}`)
+      .then(response => (response.ok ? response.json() : null))
+      .catch(error => {
+        console.error('Error fetching course bundle:', error);
+        return null;
+      })
+      .then(bundle => {
+        if (!bundle) delete courseBundles[courseCode]; // no bundle built (404) or failed: retry next time
+        return bundle;
+      });
+  }
+  return courseBundles[courseCode];
+};
+
+// A week's lessons from the course bundle; the per-week route when the course
+// has no bundle yet or the bundle predates this week's study guide
+const fetchWeekContent = async (courseCode: string, week: number): Promise<WeekContent | null> => {
+  const bundle = await loadCourseBundle(courseCode);
+  const bundled = bundle?.weeks.find(entry => entry.week === week);
+  if (bundled) return bundled;
+
+  const response = await fetch(`http://localhost:5001/api/content/${courseCode}/${week}`);
+  return response.ok ? response.json() : null;
+};
+
 interface CourseDetailProps {
   courseCode: string;
   courseName: string;
@@ -87,9 +130,8 @@ export default function CourseDetail({
     
     try {
       const [week, lessonNumber] = lessonId.split('-');
-      const response = await fetch(`/api/cs162/content/${week}`);
-      if (response.ok) {
-        const data = await response.json();
+      const data = await fetchWeekContent(courseCode, parseInt(week, 10));
+      if (data) {
         setLessonContent(prev => ({
           ...prev,
           [lessonId]: data
@@ -159,9 +201,8 @@ export default function CourseDetail({
     try {
       // Fetch the lessons for this week based on course code
       console.log('Fetching lessons for week:', week);
-      const response = await fetch(`/api/${courseCode.toLowerCase()}/content/${week}`);
-      if (response.ok) {
-        const data = await response.json();
+      const data = await fetchWeekContent(courseCode, week);
+      if (data) {
         const lessons = data.lessons;
         console.log('Found', lessons.length, 'lessons for week', week);
         